@@ -0,0 +1,112 @@
+"""Partition coin_tweet_analysis by day
+
+Revision ID: 2b7e4d9f6c18
+Revises: 8a4c1f7e2d35
+Create Date: 2026-10-18 20:26:53.118406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2b7e4d9f6c18'
+down_revision = '8a4c1f7e2d35'
+branch_labels = None
+depends_on = None
+
+# days of partitions made ahead of today, as app.partitions does
+PREMAKE_DAYS = 7
+
+CREATE_PARTITIONS = """
+DO $$
+DECLARE
+    partition_day date;
+BEGIN
+    FOR partition_day IN
+        SELECT generate_series(
+            coalesce((SELECT min(publish_date AT TIME ZONE 'UTC')::date FROM coin_tweet_analysis_heap),
+                     (now() AT TIME ZONE 'UTC')::date),
+            greatest((SELECT max(publish_date AT TIME ZONE 'UTC')::date FROM coin_tweet_analysis_heap),
+                     (now() AT TIME ZONE 'UTC')::date + %(premake)s),
+            interval '1 day'
+        )::date
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE %%I PARTITION OF coin_tweet_analysis FOR VALUES FROM (%%L) TO (%%L)',
+            'coin_tweet_analysis_p' || to_char(partition_day, 'YYYYMMDD'),
+            partition_day::timestamp AT TIME ZONE 'UTC',
+            (partition_day + 1)::timestamp AT TIME ZONE 'UTC'
+        );
+    END LOOP;
+END
+$$;
+"""
+
+# (name, function, event, referencing) of the triggers kept by the rollup migrations
+TRIGGERS = [
+    ('coin_sentiment_rollup_insert', 'coin_sentiment_rollup', 'INSERT', 'NEW TABLE AS new_rows'),
+    ('coin_sentiment_rollup_update', 'coin_sentiment_rollup', 'UPDATE', 'OLD TABLE AS old_rows NEW TABLE AS new_rows'),
+    ('coin_sentiment_rollup_delete', 'coin_sentiment_rollup', 'DELETE', 'OLD TABLE AS old_rows'),
+    ('coin_author_sketch_insert', 'coin_author_sketch', 'INSERT', 'NEW TABLE AS new_rows'),
+    ('coin_author_sketch_update', 'coin_author_sketch', 'UPDATE', 'OLD TABLE AS old_rows NEW TABLE AS new_rows'),
+    ('coin_keyword_rollup_insert', 'coin_keyword_rollup', 'INSERT', 'NEW TABLE AS new_rows'),
+    ('coin_keyword_rollup_update', 'coin_keyword_rollup', 'UPDATE', 'OLD TABLE AS old_rows NEW TABLE AS new_rows'),
+    ('coin_keyword_rollup_delete', 'coin_keyword_rollup', 'DELETE', 'OLD TABLE AS old_rows'),
+]
+
+SECONDARY_INDEXES = [
+    ('ix_coin_date', ['coin_name', 'publish_date']),
+    ('ix_coin_tweet_analysis_coin_name', ['coin_name']),
+    ('ix_coin_tweet_analysis_id', ['id']),
+    ('ix_coin_tweet_analysis_publish_date', ['publish_date']),
+    ('ix_coin_tweet_analysis_sentiment', ['sentiment']),
+    ('ix_coin_tweet_analysis_author_id', ['author_id']),
+]
+
+
+def _create_triggers():
+    for name, function, event, referencing in TRIGGERS:
+        op.execute(f"""
+            CREATE TRIGGER {name} AFTER {event} ON coin_tweet_analysis
+            REFERENCING {referencing}
+            FOR EACH STATEMENT EXECUTE FUNCTION {function}()
+        """)
+
+
+def _create_indexes():
+    for name, columns in SECONDARY_INDEXES:
+        op.create_index(name, 'coin_tweet_analysis', columns, unique=False)
+
+
+def upgrade():
+    # the old table and its triggers go away once the rows are copied;
+    # the rollups already count them, so the triggers are only created afterwards
+    op.rename_table('coin_tweet_analysis', 'coin_tweet_analysis_heap')
+    op.execute(
+        "CREATE TABLE coin_tweet_analysis (LIKE coin_tweet_analysis_heap INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (publish_date)"
+    )
+    op.execute(CREATE_PARTITIONS % {'premake': PREMAKE_DAYS})
+    op.execute("INSERT INTO coin_tweet_analysis SELECT * FROM coin_tweet_analysis_heap")
+    op.drop_table('coin_tweet_analysis_heap')
+
+    # indexes on the parent are built on every partition
+    op.create_primary_key('coin_tweet_analysis_pkey', 'coin_tweet_analysis', ['id', 'publish_date'])
+    op.create_index('ix_coin_tweet_analysis_twitter_id', 'coin_tweet_analysis', ['twitter_id', 'publish_date'], unique=True)
+    _create_indexes()
+    _create_triggers()
+
+
+def downgrade():
+    # archived days are not restored
+    op.rename_table('coin_tweet_analysis', 'coin_tweet_analysis_partitioned')
+    op.execute("CREATE TABLE coin_tweet_analysis (LIKE coin_tweet_analysis_partitioned INCLUDING DEFAULTS)")
+    op.execute("INSERT INTO coin_tweet_analysis SELECT * FROM coin_tweet_analysis_partitioned")
+    # drops the partitions with it
+    op.drop_table('coin_tweet_analysis_partitioned')
+
+    op.create_primary_key('coin_tweet_analysis_pkey', 'coin_tweet_analysis', ['id'])
+    op.create_index('ix_coin_tweet_analysis_twitter_id', 'coin_tweet_analysis', ['twitter_id'], unique=True)
+    _create_indexes()
+    _create_triggers()
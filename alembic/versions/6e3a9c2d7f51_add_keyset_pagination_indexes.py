@@ -0,0 +1,30 @@
+"""Add keyset pagination indexes
+
+Revision ID: 6e3a9c2d7f51
+Revises: 2b7e4d9f6c18
+Create Date: 2026-10-18 21:14:37.502861
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6e3a9c2d7f51'
+down_revision = '2b7e4d9f6c18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # (coin_name, publish_date) look-ups are served by the wider index as well;
+    # on the partitioned parent it is built on every partition
+    op.create_index('ix_coin_date_id', 'coin_tweet_analysis', ['coin_name', 'publish_date', 'id'], unique=False)
+    op.drop_index('ix_coin_date', table_name='coin_tweet_analysis')
+    op.create_index('ix_trades_buy_date_id', 'trades', ['buy_date', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_trades_buy_date_id', table_name='trades')
+    op.create_index('ix_coin_date', 'coin_tweet_analysis', ['coin_name', 'publish_date'], unique=False)
+    op.drop_index('ix_coin_date_id', table_name='coin_tweet_analysis')
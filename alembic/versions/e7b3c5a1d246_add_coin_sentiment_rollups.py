@@ -0,0 +1,122 @@
+"""Add coin sentiment rollups
+
+Revision ID: e7b3c5a1d246
+Revises: d4e8a2b6f019
+Create Date: 2026-10-18 17:20:36.118402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b3c5a1d246'
+down_revision = 'd4e8a2b6f019'
+branch_labels = None
+depends_on = None
+
+ROLLUP_TABLES = {'coin_sentiment_minute': 'minute', 'coin_sentiment_hour': 'hour'}
+
+# One statement-level trigger per operation: the transition tables hold every
+# row the statement touched, so a bulk insert costs one aggregate per rollup.
+ROLLUP_FUNCTION = """
+CREATE OR REPLACE FUNCTION coin_sentiment_rollup() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    changes text;
+    target record;
+BEGIN
+    changes := CASE TG_OP
+        WHEN 'INSERT' THEN
+            'SELECT coin_name, publish_date, sentiment, 1 AS sign FROM new_rows'
+        WHEN 'DELETE' THEN
+            'SELECT coin_name, publish_date, sentiment, -1 AS sign FROM old_rows'
+        ELSE
+            'SELECT coin_name, publish_date, sentiment, 1 AS sign FROM new_rows '
+            'UNION ALL SELECT coin_name, publish_date, sentiment, -1 AS sign FROM old_rows'
+    END;
+    FOR target IN SELECT * FROM (VALUES ('coin_sentiment_minute', 'minute'), ('coin_sentiment_hour', 'hour')) AS t(name, unit) LOOP
+        EXECUTE format($sql$
+            INSERT INTO %I AS r (coin_name, bucket, mentions, positive, negative, neutral, weight_sum)
+            SELECT coin_name,
+                   date_trunc(%L, publish_date, 'UTC'),
+                   sum(sign),
+                   coalesce(sum(sign) FILTER (WHERE sentiment = 'positive'), 0),
+                   coalesce(sum(sign) FILTER (WHERE sentiment = 'negative'), 0),
+                   coalesce(sum(sign) FILTER (WHERE sentiment = 'neutral'), 0),
+                   coalesce(sum(sign) FILTER (WHERE sentiment = 'positive'), 0)
+                     - coalesce(sum(sign) FILTER (WHERE sentiment = 'negative'), 0)
+            FROM (%s) AS changes
+            GROUP BY 1, 2
+            ON CONFLICT (coin_name, bucket) DO UPDATE SET
+                mentions = r.mentions + EXCLUDED.mentions,
+                positive = r.positive + EXCLUDED.positive,
+                negative = r.negative + EXCLUDED.negative,
+                neutral = r.neutral + EXCLUDED.neutral,
+                weight_sum = r.weight_sum + EXCLUDED.weight_sum
+        $sql$, target.name, target.unit, changes);
+    END LOOP;
+    RETURN NULL;
+END;
+$$;
+"""
+
+
+def upgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    for table in ROLLUP_TABLES:
+        op.create_table(table,
+        sa.Column('coin_name', sa.String(length=255), nullable=False),
+        sa.Column('bucket', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('mentions', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('positive', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('negative', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('neutral', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('weight_sum', sa.Integer(), server_default='0', nullable=False),
+        sa.PrimaryKeyConstraint('coin_name', 'bucket')
+        )
+        op.create_index(f'ix_{table}_bucket', table, ['bucket'], unique=False)
+    # ### end Alembic commands ###
+
+    op.execute(ROLLUP_FUNCTION)
+    op.execute("""
+        CREATE TRIGGER coin_sentiment_rollup_insert AFTER INSERT ON coin_tweet_analysis
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION coin_sentiment_rollup()
+    """)
+    op.execute("""
+        CREATE TRIGGER coin_sentiment_rollup_update AFTER UPDATE ON coin_tweet_analysis
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION coin_sentiment_rollup()
+    """)
+    op.execute("""
+        CREATE TRIGGER coin_sentiment_rollup_delete AFTER DELETE ON coin_tweet_analysis
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION coin_sentiment_rollup()
+    """)
+
+    # existing tweets
+    for table, unit in ROLLUP_TABLES.items():
+        op.execute(f"""
+            INSERT INTO {table} (coin_name, bucket, mentions, positive, negative, neutral, weight_sum)
+            SELECT coin_name,
+                   date_trunc('{unit}', publish_date, 'UTC'),
+                   count(*),
+                   count(*) FILTER (WHERE sentiment = 'positive'),
+                   count(*) FILTER (WHERE sentiment = 'negative'),
+                   count(*) FILTER (WHERE sentiment = 'neutral'),
+                   count(*) FILTER (WHERE sentiment = 'positive') - count(*) FILTER (WHERE sentiment = 'negative')
+            FROM coin_tweet_analysis
+            GROUP BY 1, 2
+        """)
+
+
+def downgrade():
+    for trigger in ('insert', 'update', 'delete'):
+        op.execute(f'DROP TRIGGER IF EXISTS coin_sentiment_rollup_{trigger} ON coin_tweet_analysis')
+    op.execute('DROP FUNCTION IF EXISTS coin_sentiment_rollup()')
+    # ### commands auto generated by Alembic - please adjust! ###
+    for table in ROLLUP_TABLES:
+        op.drop_index(f'ix_{table}_bucket', table_name=table)
+        op.drop_table(table)
+    # ### end Alembic commands ###
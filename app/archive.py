@@ -0,0 +1,166 @@
+"""Append-only archive of raw ScrapeStorm responses.
+
+Responses are written as NDJSON records to compressed segment files, one
+segment per UTC hour (``2026/10/18/14.ndjson.zst``). Every process that
+writes to a segment appends a new compressed frame/member, which both zstd
+and gzip readers decode as one continuous stream. Processes that write at
+the same time, such as ingestion workers, each name a ``writer`` and get
+segments of their own (``2026/10/18/14.worker-1.ndjson.zst``). ``index.ndjson`` gets one
+line per closed write session, so replay can pick segments by time range
+without opening them.
+"""
+
+import gzip
+import io
+import logging
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import IO, Any, Dict, Iterator, List
+
+import orjson
+import zstandard
+
+from app.settings import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.ndjson"
+EXTENSIONS = {"zstd": ".ndjson.zst", "gzip": ".ndjson.gz"}
+
+
+@dataclass
+class SegmentInfo:
+    """Index line describing what one write session appended to a segment."""
+
+    segment: str
+    first_at: str
+    last_at: str
+    responses: int = 0
+    entries: int = 0
+    queries: List[str] = field(default_factory=list)
+
+
+def _open_write(path: Path, compression: str) -> IO[bytes]:
+    if compression == "zstd":
+        return zstandard.ZstdCompressor().stream_writer(path.open("ab"), closefd=True)
+    return gzip.open(path, "ab")
+
+
+def _open_read(path: Path) -> IO[bytes]:
+    if path.name.endswith(EXTENSIONS["zstd"]):
+        # read_across_frames: every write session appended its own frame
+        reader = zstandard.ZstdDecompressor().stream_reader(path.open("rb"), read_across_frames=True, closefd=True)
+        return io.BufferedReader(reader)
+    return gzip.open(path, "rb")
+
+
+class PayloadArchive:
+    """Writes raw responses to hourly compressed segments and reads them back."""
+
+    def __init__(
+        self,
+        root: str | Path = settings.archive_dir,
+        compression: str = settings.archive_compression,
+        writer: str | None = None,
+    ):
+        if compression not in EXTENSIONS:
+            raise ValueError(f"Unknown archive compression: {compression}")
+        self.root = Path(root)
+        self.compression = compression
+        self.writer = writer
+        self._writers: Dict[Path, IO[bytes]] = {}
+        self._sessions: Dict[Path, SegmentInfo] = {}
+
+    def segment_path(self, at: datetime) -> Path:
+        at = at.astimezone(timezone.utc)
+        suffix = f".{self.writer}" if self.writer else ""
+        return self.root / f"{at:%Y/%m/%d/%H}{suffix}{EXTENSIONS[self.compression]}"
+
+    def append(self, response: Dict[str, Any], query: str, cursor: str | None = None):
+        """Appends one raw search response with the request that produced it."""
+        now = datetime.now(timezone.utc)
+        path = self.segment_path(now)
+        writer = self._writers.get(path)
+        if writer is None:
+            # close the previous hour's segment before starting the next one
+            self.close()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            writer = self._writers[path] = _open_write(path, self.compression)
+            self._sessions[path] = SegmentInfo(
+                segment=str(path.relative_to(self.root)), first_at=now.isoformat(), last_at=now.isoformat()
+            )
+
+        record = {"fetched_at": now.isoformat(), "query": query, "cursor": cursor, "response": response}
+        writer.write(orjson.dumps(record) + b"\n")
+
+        info = self._sessions[path]
+        info.last_at = now.isoformat()
+        info.responses += 1
+        info.entries += len(response.get("data", {}).get("entries", []))
+        if query not in info.queries:
+            info.queries.append(query)
+
+    def close(self):
+        """Finishes the open segments and records them in the index."""
+        if not self._writers:
+            return
+        with (self.root / INDEX_FILE).open("ab") as index:
+            for path, writer in self._writers.items():
+                writer.close()
+                info = self._sessions.pop(path)
+                index.write(orjson.dumps(asdict(info)) + b"\n")
+                logger.info(f"Archived {info.responses} responses ({info.entries} tweets) to {path}")
+        self._writers.clear()
+
+    def __enter__(self) -> "PayloadArchive":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def segments(self, since: datetime | None = None, until: datetime | None = None) -> List[Path]:
+        """Returns the segments that may hold responses fetched in [since, until], oldest first.
+
+        Uses the index when there is one; segments missing from it (e.g.
+        left by a crashed run) are found by listing the directory.
+        """
+        index = self.root / INDEX_FILE
+        sessions = [orjson.loads(line) for line in index.read_bytes().splitlines()] if index.exists() else []
+        found = {
+            self.root / info["segment"]
+            for info in sessions
+            if (since is None or datetime.fromisoformat(info["last_at"]) >= since)
+            and (until is None or datetime.fromisoformat(info["first_at"]) <= until)
+        }
+
+        indexed = {self.root / info["segment"] for info in sessions}
+        for extension in EXTENSIONS.values():
+            for path in self.root.glob(f"*/*/*/*{extension}"):
+                if path in indexed:
+                    continue
+                # the first 13 characters are the hour, e.g. 2026/10/18/14, before any writer suffix
+                hour = datetime.strptime(
+                    path.relative_to(self.root).as_posix()[:13], "%Y/%m/%d/%H"
+                ).replace(tzinfo=timezone.utc)
+                if (since is None or hour + timedelta(hours=1) > since) and (until is None or hour <= until):
+                    found.add(path)
+        return sorted(found)
+
+    def read(self, since: datetime | None = None, until: datetime | None = None) -> Iterator[Dict[str, Any]]:
+        """Yields archived records fetched in [since, until], oldest first."""
+        for path in self.segments(since, until):
+            try:
+                with _open_read(path) as f:
+                    for line in f:
+                        record = orjson.loads(line)
+                        fetched_at = datetime.fromisoformat(record["fetched_at"])
+                        if since is not None and fetched_at < since:
+                            continue
+                        if until is not None and fetched_at > until:
+                            continue
+                        yield record
+            except (EOFError, OSError, zstandard.ZstdError, orjson.JSONDecodeError) as e:
+                # a segment cut short by a crash is read up to the damage
+                logger.warning(f"Stopped reading damaged archive segment {path}: {e}")
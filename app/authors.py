@@ -0,0 +1,134 @@
+"""Author reputation: cached account scores backed by the authors table."""
+
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models import Author
+from app.settings import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+SPAM_SCORE_THRESHOLD = 4
+# score used for authors missing from the table, e.g. tweets stored before it existed
+DEFAULT_AUTHOR_SCORE = 5.0
+
+PROFILE_FIELDS = (
+    "is_verified",
+    "is_blue_verified",
+    "followers_count",
+    "friends_count",
+    "statuses_count",
+    "has_photo",
+    "has_banner",
+)
+
+
+class AuthorReputation:
+    """In-process TTL cache of author scores keyed by Twitter user id.
+
+    A score is computed with ``scorer`` the first time an author is seen and
+    reused until it is ``ttl`` old. Authors scored since the last ``flush``
+    are written to the authors table with one bulk upsert.
+    """
+
+    def __init__(
+        self,
+        scorer: Callable[[Any], float],
+        max_size: int = settings.author_cache_size,
+        ttl: timedelta = timedelta(minutes=settings.author_cache_ttl_minutes),
+    ):
+        self.scorer = scorer
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._scores: OrderedDict[str, tuple[datetime, float]] = OrderedDict()
+        self._pending: Dict[str, dict] = {}
+
+    def _remember(self, user_id: str, score: float, scored_at: datetime):
+        self._scores[user_id] = (scored_at, score)
+        self._scores.move_to_end(user_id)
+        while len(self._scores) > self.max_size:
+            self._scores.popitem(last=False)
+
+    def cached_score(self, user_id: str) -> float | None:
+        """Returns the author's score if it is cached and fresh, without scoring anything."""
+        entry = self._scores.get(user_id)
+        if entry is None or entry[0] < datetime.now(timezone.utc) - self.ttl:
+            return None
+        self._scores.move_to_end(user_id)
+        self.hits += 1
+        return entry[1]
+
+    def score(self, user) -> float:
+        """Returns the author's cached score, computing it if missing or stale."""
+        cached = self.cached_score(user.id)
+        if cached is not None:
+            return cached
+
+        self.misses += 1
+        score = float(self.scorer(user))
+        self._remember(user.id, score, datetime.now(timezone.utc))
+        self._pending[user.id] = {
+            "twitter_user_id": user.id,
+            "screen_name": user.name,
+            "account_created_at": user.created_at,
+            **{field: getattr(user, field) for field in PROFILE_FIELDS},
+            "score": score,
+        }
+        return score
+
+    def is_spammer(self, user) -> bool:
+        return self.score(user) < SPAM_SCORE_THRESHOLD
+
+    def warm(self, db: Session):
+        """Loads the scores of authors updated within the TTL."""
+        cutoff = datetime.now(timezone.utc) - self.ttl
+        stmt = (
+            select(Author.twitter_user_id, Author.score, Author.updated_at)
+            .where(Author.updated_at >= cutoff)
+            .order_by(Author.updated_at.desc())
+            .limit(self.max_size)
+        )
+        try:
+            rows = db.execute(stmt).all()
+        except Exception as e:
+            logger.error(f"Failed to load author scores: {e}")
+            db.rollback()
+            return
+        for row in reversed(rows):
+            self._remember(row.twitter_user_id, row.score, row.updated_at)
+        logger.info(f"Loaded {len(rows)} cached author scores.")
+
+    def flush(self, db: Session):
+        """Upserts the authors scored since the last flush."""
+        if not self._pending:
+            return
+        rows = list(self._pending.values())
+        stmt = insert(Author).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["twitter_user_id"],
+            set_={
+                **{column: stmt.excluded[column] for column in rows[0] if column != "twitter_user_id"},
+                "updated_at": stmt.excluded.updated_at,
+            },
+        )
+        try:
+            db.execute(stmt)
+            db.commit()
+            self._pending.clear()
+            logger.info(f"Upserted {len(rows)} authors.")
+        except Exception as e:
+            logger.error(f"Failed to upsert authors: {e}")
+            db.rollback()
+
+    def __str__(self) -> str:
+        total = self.hits + self.misses
+        return f"{self.hits} cached, {self.misses} scored ({self.hits / total if total else 0.0:.0%} hit rate)"
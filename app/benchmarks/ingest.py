@@ -0,0 +1,185 @@
+"""End-to-end benchmark of one scheduler cycle against the fake upstreams.
+
+Starts ``app.fake_servers`` in a subprocess, points the app at it, and runs
+the tweet analysis and trading simulation once, reporting per-stage latency
+and throughput. Collection state is rewound so every query pages through
+its whole fake timeline; run it against a scratch database::
+
+    python -m app.benchmarks.ingest --tweets-per-query 1000 --json bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# far above real tweet ids and increasing between runs, so stored tweets never hide fake ones
+START_ID_BASE = 5_000_000_000_000_000_000
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_until_ready(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(url, timeout=1):
+                return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Fake upstreams did not start within {timeout}s")
+            time.sleep(0.2)
+
+
+def _stage_report(stats) -> Dict[str, Any]:
+    return {
+        "stage": stats.name,
+        "workers": stats.workers,
+        "calls": len(stats.latencies),
+        "in": stats.received,
+        "out": stats.emitted,
+        "errors": stats.errors,
+        "p50_ms": stats.latency_percentile(0.5) * 1000,
+        "p95_ms": stats.latency_percentile(0.95) * 1000,
+        "busy_s": stats.busy_seconds,
+        "items_per_busy_s": stats.received / stats.busy_seconds if stats.busy_seconds else 0.0,
+    }
+
+
+async def run_cycle(start_id: int) -> Dict[str, Any]:
+    """Rewinds collection state below ``start_id`` and runs one scheduler cycle."""
+    # imported here so the settings pick up the environment set by main()
+    from app.collection import load_enabled_collection_states, save_collection_states
+    from app.database import get_db
+    from app.settings import get_settings
+    from app.trading_simulation import main as run_trading_simulation
+    from app.tweet_analysis import SEARCH_KEYWORDS, main as run_tweet_analysis
+
+    settings = get_settings()
+    with get_db() as db:
+        states = load_enabled_collection_states(db, SEARCH_KEYWORDS)
+        for state in states.values():
+            state.newest_tweet_id = start_id
+            state.last_cursor = None
+            state.backfill_until_id = None
+            # full credit, so every query pages through its whole timeline regardless of its yield
+            state.poll_credit = float(settings.collection_max_pages)
+        save_collection_states(db, states.values())
+
+    started = time.monotonic()
+    stage_stats = await run_tweet_analysis()
+    analysis_seconds = time.monotonic() - started
+    started = time.monotonic()
+    await run_trading_simulation()
+    trading_seconds = time.monotonic() - started
+
+    tweets = stage_stats[0].received if stage_stats else 0
+    return {
+        "queries": len(states),
+        "tweets": tweets,
+        "tweet_analysis_s": analysis_seconds,
+        "trading_simulation_s": trading_seconds,
+        "cycle_s": analysis_seconds + trading_seconds,
+        "tweets_per_s": tweets / analysis_seconds if analysis_seconds else 0.0,
+        "stages": [_stage_report(s) for s in stage_stats],
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    print(
+        f"\n{report['tweets']} tweets from {report['queries']} queries: "
+        f"tweet analysis {report['tweet_analysis_s']:.2f}s ({report['tweets_per_s']:,.0f} tweets/s), "
+        f"trading simulation {report['trading_simulation_s']:.2f}s, cycle {report['cycle_s']:.2f}s\n"
+    )
+    columns = ["stage", "workers", "calls", "in", "out", "errors", "p50_ms", "p95_ms", "busy_s", "items_per_busy_s"]
+    rows: List[List[str]] = [columns]
+    for stage in report["stages"]:
+        rows.append([f"{stage[c]:,.1f}" if isinstance(stage[c], float) else str(stage[c]) for c in columns])
+    widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+    for row in rows:
+        print("  ".join(value.rjust(width) for value, width in zip(row, widths)))
+    print(f"\nUpstream responses: {report['upstreams']}")
+
+
+def main():
+    """Benchmarks a full scheduler cycle against local fake upstreams."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--tweets-per-query", type=int, default=200)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--scrapestorm", default="latency=0.3,jitter=0.1", help="fake upstream profile")
+    parser.add_argument("--openai", default="latency=0.5,jitter=0.1", help="fake upstream profile")
+    parser.add_argument("--coingecko", default="latency=0.1,jitter=0.02", help="fake upstream profile")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--archive", action="store_true", help="archive the fake responses too")
+    parser.add_argument("--json", metavar="PATH", help="also write the report as JSON, e.g. to compare releases")
+    args = parser.parse_args()
+
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    start_id = START_ID_BASE + int(time.time()) * 1_000_000
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "app.fake_servers",
+            "--port", str(port),
+            "--tweets-per-query", str(args.tweets_per_query),
+            "--page-size", str(args.page_size),
+            "--start-id", str(start_id),
+            "--seed", str(args.seed),
+            "--scrapestorm", args.scrapestorm,
+            "--openai", args.openai,
+            "--coingecko", args.coingecko,
+        ]
+    )
+    try:
+        _wait_until_ready(f"{base_url}/_fake/stats")
+        os.environ.update(
+            {
+                "SCRAPESTORM_BASE_URL": base_url,
+                "OPENAI_BASE_URL": f"{base_url}/v1",
+                "COINGECKO_BASE_URL": f"{base_url}/api/v3",
+                "COLLECTION_MAX_PAGES": str(math.ceil(args.tweets_per_query / args.page_size) + 1),
+                # no budget limit: the benchmark measures throughput, not query scheduling
+                "SEARCH_REQUEST_BUDGET": "1000000",
+                "ARCHIVE_ENABLED": str(args.archive).lower(),
+            }
+        )
+        os.environ.setdefault("SCRAPESTORM_API_KEY", "fake")
+        os.environ.setdefault("OPENAI_API_KEY", "fake")
+
+        report = asyncio.run(run_cycle(start_id))
+        with urllib.request.urlopen(f"{base_url}/_fake/stats", timeout=5) as response:
+            report["upstreams"] = json.load(response)
+        report["settings"] = {
+            "tweets_per_query": args.tweets_per_query,
+            "page_size": args.page_size,
+            "scrapestorm": args.scrapestorm,
+            "openai": args.openai,
+            "coingecko": args.coingecko,
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    main()
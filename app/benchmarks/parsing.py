@@ -0,0 +1,110 @@
+"""Benchmark of the pydantic parse path against the lean one.
+
+The fixture is an NDJSON file of raw search responses, one page per line,
+exactly as returned by ScrapeStorm. Record one from the live API with
+``--record QUERY``, or generate a synthetic one with ``--generate``::
+
+    python -m app.benchmarks.parsing --generate 10000
+    python -m app.benchmarks.parsing
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Callable, List
+
+import orjson
+
+from app.authors import AuthorReputation
+from app.collectors.scrapestorm.fake_data import make_entries, make_page
+from app.parsing import parse_entries
+from app.tweet_analysis import Tweet, TwitterUser
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FIXTURE = "fixtures/scrapestorm_search_10k.ndjson"
+PAGE_SIZE = 20
+
+
+def generate_fixture(path: Path, count: int, seed: int = 0):
+    entries = make_entries(count, seed=seed)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("wb") as f:
+        for i in range(0, count, PAGE_SIZE):
+            f.write(orjson.dumps(make_page(entries[i : i + PAGE_SIZE], f"cursor-{i + PAGE_SIZE}")) + b"\n")
+
+
+async def record_fixture(path: Path, query: str, pages: int):
+    from app.collectors.scrapestorm.api_client import ScrapeStormAPIClient
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    cursor = None
+    async with ScrapeStormAPIClient() as client:
+        with path.open("wb") as f:
+            for _ in range(pages):
+                response = await client.search_tweets_by_query_async(query, "latest", cursor)
+                f.write(orjson.dumps(response) + b"\n")
+                cursor = response["pagination"]["next_cursor"]
+                if not cursor:
+                    break
+
+
+def pydantic_path(pages: List[bytes]) -> int:
+    """The original path: stdlib JSON, pydantic models, spam check on the built objects."""
+    kept = 0
+    for page in pages:
+        for entry in json.loads(page)["data"]["entries"]:
+            tweet = Tweet.from_scrapestorm_tweet(entry)
+            if not tweet.is_spam():
+                kept += 1
+    return kept
+
+
+def lean_path(pages: List[bytes]) -> int:
+    """orjson plus ``parse_entries`` with a cold author cache."""
+    reputation = AuthorReputation(TwitterUser.calculate_account_score, ttl=timedelta(hours=1))
+    return sum(len(parse_entries(orjson.loads(page)["data"]["entries"], reputation)) for page in pages)
+
+
+def measure(name: str, run: Callable[[List[bytes]], int], pages: List[bytes], records: int, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        kept = run(pages)
+        best = min(best, time.perf_counter() - started)
+    logger.info(f"{name}: {records / best:,.0f} records/sec ({best * 1000:.1f} ms, {kept} kept of {records})")
+    return records / best
+
+
+def main():
+    """Compares records/sec of the pydantic and lean parse paths on a fixture."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--fixture", default=DEFAULT_FIXTURE)
+    parser.add_argument("--generate", type=int, metavar="N", help="write a synthetic fixture of N tweets first")
+    parser.add_argument("--record", metavar="QUERY", help="record a fixture from the live API first")
+    parser.add_argument("--pages", type=int, default=500, help="pages to record")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    path = Path(args.fixture)
+    if args.generate:
+        generate_fixture(path, args.generate)
+    elif args.record:
+        asyncio.run(record_fixture(path, args.record, args.pages))
+    if not path.exists():
+        parser.error(f"{path} does not exist; use --generate or --record")
+
+    pages = path.read_bytes().splitlines()
+    records = sum(len(orjson.loads(page)["data"]["entries"]) for page in pages)
+    old = measure("pydantic", pydantic_path, pages, records, args.repeat)
+    new = measure("lean", lean_path, pages, records, args.repeat)
+    logger.info(f"Speed-up: {new / old:.1f}x")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    main()
@@ -0,0 +1,242 @@
+"""Bulk persistence of large row sets.
+
+Large batches are streamed with ``COPY`` into a temporary staging table and
+merged into the target table with a single ``INSERT ... SELECT ... ON
+CONFLICT``. Small batches, and large ones whose ``COPY`` fails, are written
+as chunked multi-row inserts, each in its own savepoint: a chunk that hits a
+transient error is retried, and one the table rejects is split in halves
+until the offending rows are isolated, so one bad row never discards the
+rest.
+"""
+
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Sequence
+
+from sqlalchemy import ARRAY, Table
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import DataError, IntegrityError, OperationalError
+from sqlalchemy.orm import Session
+
+from app.settings import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BulkWriteStats:
+    """Outcome of one bulk write."""
+
+    rows: int = 0
+    written: int = 0
+    copy_batches: int = 0
+    chunks: int = 0
+    retries: int = 0
+    seconds: float = 0.0
+    # rows the table rejected, e.g. for a constraint or a value out of range
+    rejected: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def failed(self) -> int:
+        return len(self.rejected)
+
+    @property
+    def skipped(self) -> int:
+        """Rows that conflicted with existing ones and were left alone."""
+        return self.rows - self.written - self.failed
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.rows} rows ({self.written} written, {self.skipped} skipped, {self.failed} failed) "
+            f"via {self.copy_batches} COPY batches and {self.chunks} chunks, {self.retries} retries, "
+            f"in {self.seconds:.2f}s ({self.rows_per_second:,.0f} rows/sec)"
+        )
+
+
+def _quote(value: str) -> str:
+    return '"' + value.replace('"', '""') + '"'
+
+
+def _array_literal(values: Sequence[Any]) -> str:
+    items = (
+        "NULL" if v is None else '"' + str(v).replace("\\", "\\\\").replace('"', '\\"') + '"'
+        for v in values
+    )
+    return "{" + ",".join(items) + "}"
+
+
+def _csv_field(value: Any, is_array: bool) -> str:
+    # an unquoted empty field is NULL in CSV mode, a quoted one is an empty string
+    if value is None:
+        return ""
+    if is_array:
+        return _quote(_array_literal(value))
+    if isinstance(value, Enum):
+        return _quote(value.name)
+    if isinstance(value, (datetime, date)):
+        return _quote(value.isoformat())
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return _quote(str(value))
+
+
+class _CSVStream:
+    """File-like object that encodes rows as CSV lines while ``COPY`` reads it."""
+
+    def __init__(self, rows: Iterable[Dict[str, Any]], columns: List[str], array_columns: set):
+        self._lines = (
+            (",".join(_csv_field(row.get(c), c in array_columns) for c in columns) + "\n").encode("utf-8")
+            for row in rows
+        )
+        self._buffer = b""
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buffer) < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            self._buffer += line
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+class BulkWriter:
+    """Writes rows into ``table``, skipping (or, with ``overwrite``, updating) rows that conflict on ``conflict_columns``."""
+
+    def __init__(
+        self,
+        table: Table,
+        conflict_columns: Sequence[str],
+        chunk_size: int = settings.bulk_chunk_size,
+        copy_threshold: int = settings.bulk_copy_threshold,
+        copy_batch_size: int = settings.bulk_copy_batch_size,
+        chunk_retries: int = settings.bulk_chunk_retries,
+    ):
+        self.table = table
+        self.conflict_columns = list(conflict_columns)
+        self._conflict_list = ", ".join(self.conflict_columns)
+        self.chunk_size = chunk_size
+        self.copy_threshold = copy_threshold
+        self.copy_batch_size = copy_batch_size
+        self.chunk_retries = chunk_retries
+        self._defaults = {
+            column.key: column.default.arg
+            for column in table.columns
+            if column.default is not None and column.default.is_callable
+        }
+        self._array_columns = {column.key for column in table.columns if isinstance(column.type, ARRAY)}
+
+    def _with_defaults(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        # COPY bypasses client-side defaults such as uuid4 primary keys
+        missing = {key: default(None) for key, default in self._defaults.items() if key not in row}
+        return {**row, **missing} if missing else row
+
+    def write(self, db: Session, rows: Iterable[Dict[str, Any]], overwrite: bool = False) -> BulkWriteStats:
+        """Writes ``rows`` in batches and commits.
+
+        Rows the table rejects are logged and kept in ``stats.rejected``
+        rather than raised; errors that outlast the retries are raised.
+        """
+        stats = BulkWriteStats()
+        started = time.monotonic()
+        update_columns: List[str] | None = None
+        iterator = iter(rows)
+        while batch := [self._with_defaults(row) for row in itertools.islice(iterator, self.copy_batch_size)]:
+            stats.rows += len(batch)
+            if overwrite and update_columns is None:
+                update_columns = [c for c in batch[0] if c not in (*self.conflict_columns, "id", "created_at")]
+            if len(batch) >= self.copy_threshold and self._copy_batch(db, batch, update_columns, stats):
+                continue
+            for start in range(0, len(batch), self.chunk_size):
+                self._write_chunk(db, batch[start : start + self.chunk_size], update_columns, stats)
+        db.commit()
+        stats.seconds = time.monotonic() - started
+        if stats.rows:
+            logger.info(f"Bulk write to {self.table.name}: {stats}")
+        return stats
+
+    def _conflict_clause(self, update_columns: List[str] | None) -> str:
+        if not update_columns:
+            return f"ON CONFLICT ({self._conflict_list}) DO NOTHING"
+        assignments = ", ".join(f"{c} = EXCLUDED.{c}" for c in update_columns)
+        return f"ON CONFLICT ({self._conflict_list}) DO UPDATE SET {assignments}"
+
+    def _copy_batch(
+        self, db: Session, batch: List[Dict[str, Any]], update_columns: List[str] | None, stats: BulkWriteStats
+    ) -> bool:
+        """COPYs a batch into the staging table and merges it; returns False if it has to be chunked instead."""
+        columns = list(batch[0])
+        column_list = ", ".join(columns)
+        staging = f"staging_{self.table.name}"
+        try:
+            with db.begin_nested(), db.connection().connection.driver_connection.cursor() as cursor:
+                cursor.execute(
+                    f"CREATE TEMP TABLE IF NOT EXISTS {staging} "
+                    f"(LIKE {self.table.name} INCLUDING DEFAULTS) ON COMMIT DROP"
+                )
+                cursor.execute(f"TRUNCATE {staging}")
+                cursor.copy_expert(
+                    f"COPY {staging} ({column_list}) FROM STDIN WITH (FORMAT csv)",
+                    _CSVStream(batch, columns, self._array_columns),
+                )
+                # DISTINCT ON: a row may appear twice in one batch, which DO UPDATE rejects
+                cursor.execute(
+                    f"INSERT INTO {self.table.name} ({column_list}) "
+                    f"SELECT DISTINCT ON ({self._conflict_list}) {column_list} FROM {staging} "
+                    f"{self._conflict_clause(update_columns)}"
+                )
+                stats.written += cursor.rowcount
+        except Exception as e:
+            logger.warning(f"COPY of {len(batch)} rows into {self.table.name} failed, writing in chunks: {e}")
+            return False
+        stats.copy_batches += 1
+        return True
+
+    def _insert(self, db: Session, chunk: List[Dict[str, Any]], update_columns: List[str] | None) -> int:
+        stmt = insert(self.table).values(chunk)
+        if update_columns:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=self.conflict_columns,
+                set_={c: stmt.excluded[c] for c in update_columns},
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=self.conflict_columns)
+        with db.begin_nested():
+            return db.execute(stmt).rowcount
+
+    def _write_chunk(
+        self, db: Session, chunk: List[Dict[str, Any]], update_columns: List[str] | None, stats: BulkWriteStats
+    ):
+        """Writes a chunk in a savepoint, retrying transient errors and bisecting the chunk on bad rows."""
+        stats.chunks += 1
+        for attempt in range(self.chunk_retries + 1):
+            try:
+                stats.written += self._insert(db, chunk, update_columns)
+                return
+            except (IntegrityError, DataError) as e:
+                error = e
+                break
+            except OperationalError:
+                if attempt == self.chunk_retries:
+                    raise
+                stats.retries += 1
+                time.sleep(0.5 * 2**attempt)
+
+        if len(chunk) == 1:
+            stats.rejected.append(chunk[0])
+            logger.error(f"Dropped a row that {self.table.name} rejected: {error}")
+            return
+        middle = len(chunk) // 2
+        self._write_chunk(db, chunk[:middle], update_columns, stats)
+        self._write_chunk(db, chunk[middle:], update_columns, stats)
@@ -0,0 +1,180 @@
+"""Incremental tweet collection driven by per-query high-water marks."""
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Iterable, List, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.collectors.scrapestorm.api_client import ScrapeStormAPIClient, SearchResult
+from app.models import CollectionState
+from app.settings import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+def load_collection_states(db: Session, queries: Iterable[str]) -> Dict[str, CollectionState]:
+    """Loads the collection state of each query, creating empty ones for new queries."""
+    queries = list(queries)
+    states = {
+        state.query: state
+        for state in db.query(CollectionState).filter(CollectionState.query.in_(queries)).all()
+    }
+    for query in queries:
+        if query not in states:
+            states[query] = CollectionState(query=query)
+    return states
+
+
+def load_enabled_collection_states(db: Session, defaults: Iterable[str] = ()) -> Dict[str, CollectionState]:
+    """Loads the states of the enabled queries.
+
+    Queries live in ``collection_state`` and are managed at runtime with
+    ``python -m app.query_scheduler``; ``defaults`` only seed an empty table.
+    """
+    if db.query(CollectionState.query).first() is None:
+        return load_collection_states(db, defaults)
+    return {
+        state.query: state
+        for state in db.query(CollectionState).filter(CollectionState.enabled.is_(True)).all()
+    }
+
+
+# columns that record how far a query was collected
+PROGRESS_COLUMNS = ("newest_tweet_id", "newest_tweet_at", "last_cursor", "backfill_until_id")
+
+
+def collection_progress(state: CollectionState) -> Dict[str, Any]:
+    return {column: getattr(state, column) for column in PROGRESS_COLUMNS}
+
+
+def rewind_collection_state(state: CollectionState, progress: Dict[str, Any]):
+    """Puts a query's progress back, so its tweets since then are fetched again by the next run."""
+    for column, value in progress.items():
+        setattr(state, column, value)
+
+
+# columns a collection run changes; ``enabled`` is left to ``python -m app.query_scheduler``
+RUN_COLUMNS = PROGRESS_COLUMNS + (
+    "last_polled_at",
+    "requests_total",
+    "useful_total",
+    "requests_counted",
+    "useful_counted",
+    "yield_rate",
+    "poll_credit",
+)
+
+
+def save_collection_states(db: Session, states: Iterable[CollectionState]):
+    """Persists collection states, so the next run resumes where this one stopped.
+
+    Only the columns a run changes are written, so a query disabled while
+    the run was going stays disabled.
+    """
+    columns = CollectionState.__table__.columns
+    try:
+        for state in states:
+            values = {
+                column: getattr(state, column)
+                for column in RUN_COLUMNS
+                # counters of a query new to this run are left to their defaults
+                if getattr(state, column) is not None or columns[column].nullable
+            }
+            db.execute(
+                insert(CollectionState)
+                .values(query=state.query, **values)
+                .on_conflict_do_update(index_elements=["query"], set_={**values, "updated_at": func.now()})
+            )
+        db.commit()
+    except Exception as e:
+        logger.error(f"Failed to save collection state: {e}")
+        db.rollback()
+
+
+def _advance_high_water_mark(state: CollectionState, entries: List[Dict[str, Any]]):
+    """Moves the state's high-water mark to the newest of ``entries``."""
+    if not entries:
+        return
+    newest = max(entries, key=lambda e: int(e["id"]))
+    if state.newest_tweet_id is None or int(newest["id"]) > state.newest_tweet_id:
+        state.newest_tweet_id = int(newest["id"])
+        state.newest_tweet_at = datetime.fromisoformat(newest["created_at"])
+
+
+async def collect_query(
+    client: ScrapeStormAPIClient,
+    state: CollectionState,
+    max_pages: int = settings.collection_max_pages,
+) -> List[Dict[str, Any]]:
+    """Fetches tweets newer than the query's high-water mark and updates ``state`` in place.
+
+    Fresh tweets are fetched first. If a busy query does not catch up within
+    ``max_pages``, the cursor where paging stopped is stored together with the
+    previous high-water mark, and later runs spend their leftover page budget
+    on filling that gap, so no tweets are skipped.
+    """
+    floor = state.newest_tweet_id
+    head, backfill = SearchResult(), SearchResult()
+    try:
+        await client.search_tweets_since_async(state.query, since_id=floor, max_pages=max_pages, result=head)
+        entries = list(head.entries)
+        budget = max_pages - head.pages
+
+        if head.caught_up:
+            gap_cursor, gap_floor = state.last_cursor, state.backfill_until_id
+        else:
+            # a still-open older gap is merged into the new one by paging down to its floor
+            gap_cursor = head.next_cursor
+            gap_floor = state.backfill_until_id if state.last_cursor else floor
+            logger.info(f"Query '{state.query}' did not catch up in {head.pages} pages, resuming next run.")
+
+        if gap_cursor and budget > 0:
+            await client.search_tweets_since_async(
+                state.query, since_id=gap_floor, cursor=gap_cursor, max_pages=budget, result=backfill
+            )
+            entries.extend(backfill.entries)
+            gap_cursor = None if backfill.caught_up else backfill.next_cursor
+    finally:
+        # pages fetched before a failing one are spent all the same
+        state.requests_total = (state.requests_total or 0) + head.pages + backfill.pages
+
+    _advance_high_water_mark(state, entries)
+    state.last_polled_at = datetime.now(timezone.utc)
+    state.last_cursor = gap_cursor
+    state.backfill_until_id = gap_floor if gap_cursor else None
+    return entries
+
+
+async def stream_new_tweets(
+    client: ScrapeStormAPIClient,
+    states: Dict[str, CollectionState],
+    max_pages: int | Dict[str, int] = settings.collection_max_pages,
+) -> AsyncIterator[Tuple[str, List[Dict[str, Any]] | Exception]]:
+    """Collects every query concurrently, yielding each one as soon as it finishes.
+
+    ``max_pages`` is either one page budget for all queries or a budget per
+    query, as planned by ``QueryScheduler``.
+
+    Yields:
+        Tuples of (query, new raw tweets), or (query, exception) if the query failed
+    """
+    tasks = {
+        asyncio.create_task(
+            collect_query(client, state, max_pages if isinstance(max_pages, int) else max_pages[query])
+        ): query
+        for query, state in states.items()
+    }
+    try:
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield tasks[task], task.exception() or task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
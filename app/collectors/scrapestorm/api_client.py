@@ -1,10 +1,14 @@
 """ScrapeStorm API client to fetch data from Twitter"""
 
+import asyncio
 import logging
-from typing import Dict, Any, Literal
+from dataclasses import dataclass, field
+from typing import Dict, Any, Iterable, List, Literal
 import requests
 import aiohttp
+import orjson
 from tenacity import retry, stop_after_attempt, wait_exponential
+from app.archive import PayloadArchive
 from app.settings import get_settings
 
 settings = get_settings()
@@ -14,16 +18,89 @@ logger = logging.getLogger(__name__)
 TIMEOUT = 60
 
 
+@dataclass
+class SearchResult:
+    """Tweets collected by an incremental search.
+
+    Attributes:
+        entries: Raw tweet entries newer than the requested ``since_id``
+        next_cursor: Cursor of the page after the last one fetched
+        caught_up: Whether paging reached ``since_id`` (or the end of results)
+        pages: Number of pages requested
+    """
+
+    entries: List[Dict[str, Any]] = field(default_factory=list)
+    next_cursor: str | None = None
+    caught_up: bool = False
+    pages: int = 0
+
+
 class ScrapeStormAPIClient:
-    """ScrapeStorm API client"""
+    """ScrapeStorm API client
+
+    The async methods share one pooled ``aiohttp.ClientSession`` (keep-alive,
+    per-host connection limits, DNS cache) that lives as long as the client.
+    Use the client as an async context manager, or call ``close()`` when done.
+    With an ``archive``, every search response is also appended to it.
+    """
 
     def __init__(
         self,
         base_url: str = settings.scrapestorm_base_url,
         token: str = settings.scrapestorm_api_key,
+        connection_limit: int = settings.scrapestorm_connection_limit,
+        connection_limit_per_host: int = settings.scrapestorm_connection_limit_per_host,
+        dns_cache_ttl: int = settings.scrapestorm_dns_cache_ttl,
+        keepalive_timeout: float = settings.scrapestorm_keepalive_timeout,
+        max_concurrency: int = settings.scrapestorm_max_concurrency,
+        archive: PayloadArchive | None = None,
     ):
         self.base_url = base_url
         self.token = token
+        self.connection_limit = connection_limit
+        self.connection_limit_per_host = connection_limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.max_concurrency = max_concurrency
+        self.archive = archive
+        self._session: aiohttp.ClientSession | None = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def __aenter__(self) -> "ScrapeStormAPIClient":
+        await self._get_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.connection_limit,
+                limit_per_host=self.connection_limit_per_host,
+                ttl_dns_cache=self.dns_cache_ttl,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=TIMEOUT),
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """Close the shared session and release pooled connections."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _get_json_async(self, url: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """GET ``url`` over the shared session, bounded by ``max_concurrency``."""
+        session = await self._get_session()
+        async with self._semaphore:
+            async with session.get(url, params=params) as response:
+                response.raise_for_status()
+                return orjson.loads(await response.read())
 
     @retry(
         stop=stop_after_attempt(3),
@@ -90,13 +167,13 @@ class ScrapeStormAPIClient:
             params["cursor"] = cursor
             
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params, timeout=TIMEOUT) as response:
-                    response.raise_for_status()
-                    return await response.json()
+            response = await self._get_json_async(url, params)
         except aiohttp.ClientError as e:
             logger.error(f"Error searching tweets by query: {e}")
             raise
+        if self.archive is not None:
+            self.archive.append(response, query, cursor)
+        return response
     
     async def search_tweets_async(self, query: str, tag: Literal["top", "latest"] = "latest", num_pages: int = 1):
         tweets = []
@@ -107,6 +184,73 @@ class ScrapeStormAPIClient:
             cursor = response["pagination"]["next_cursor"]
         return tweets
 
+    async def search_tweets_since_async(
+        self,
+        query: str,
+        since_id: int | None,
+        tag: Literal["top", "latest"] = "latest",
+        cursor: str | None = None,
+        max_pages: int = 1,
+        result: SearchResult | None = None,
+    ) -> SearchResult:
+        """Page through latest tweets until ``since_id`` is reached.
+
+        Results arrive newest first, so the first page that contains a tweet
+        with ``id <= since_id`` marks the high-water mark: every later page is
+        already collected and paging stops there. Without ``since_id`` only
+        the first page is fetched.
+
+        Args:
+            query: Search query string
+            since_id: Newest tweet id already collected for the query
+            tag: Type of tweets to fetch ('top' or 'latest')
+            cursor: Pagination cursor to start from
+            max_pages: Upper bound on pages requested
+            result: SearchResult to fill in as pages arrive, so the caller still
+                sees the pages spent when a later page raises
+
+        Returns:
+            SearchResult with the unseen entries and pagination progress
+        """
+        if result is None:
+            result = SearchResult()
+        result.next_cursor = cursor
+        if since_id is None:
+            max_pages = min(max_pages, 1)
+
+        while result.pages < max_pages:
+            response = await self.search_tweets_by_query_async(query, tag, result.next_cursor)
+            result.pages += 1
+            page = response["data"]["entries"]
+            result.next_cursor = response["pagination"]["next_cursor"]
+
+            fresh = [e for e in page if since_id is None or int(e["id"]) > since_id]
+            result.entries.extend(fresh)
+
+            if since_id is None or not page or len(fresh) < len(page) or not result.next_cursor:
+                result.caught_up = True
+                break
+
+        return result
+
+    async def search_many_tweets_async(
+        self, queries: Iterable[str], tag: Literal["top", "latest"] = "latest", num_pages: int = 1
+    ) -> Dict[str, List[Dict[str, Any]] | Exception]:
+        """Search several queries concurrently over the shared session.
+
+        Requests are capped at ``max_concurrency`` in flight, so the whole
+        call takes roughly as long as the slowest query rather than the sum.
+
+        Returns:
+            Dict mapping each query to its tweets, or to the exception it raised
+        """
+        queries = list(queries)
+        results = await asyncio.gather(
+            *(self.search_tweets_async(query, tag, num_pages) for query in queries),
+            return_exceptions=True,
+        )
+        return dict(zip(queries, results))
+
 
     @retry(
         stop=stop_after_attempt(3),
@@ -164,10 +308,7 @@ class ScrapeStormAPIClient:
             params["website"] = website
             
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params, timeout=TIMEOUT) as response:
-                    response.raise_for_status()
-                    return await response.json()
+            return await self._get_json_async(url, params)
         except aiohttp.ClientError as e:
             logger.error(f"Error searching Google News: {e}")
             raise
\ No newline at end of file
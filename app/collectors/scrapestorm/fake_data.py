@@ -0,0 +1,73 @@
+"""Synthetic ScrapeStorm search payloads for fixtures and local runs."""
+
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+TEMPLATES = [
+    "${coin} is about to moon 🚀 get in before it's too late #{coin} #memecoin",
+    "Just aped into ${coin}, chart looks insane. Next 100x?",
+    "${coin} dev wallet just dumped, this is a rug. Stay away",
+    "Should I buy ${coin} or wait for the dip? #crypto",
+    "Airdrop live for ${coin} holders, claim here https://t.co/abc{n}",
+    "gm frens, what are you buying today?",
+    "Bitcoin holding 100k like a champ $BTC",
+    "New meme coin ${coin} just launched on Solana, LP locked 🔒",
+    "{coin}/USDT breaking out on the 4h, send it",
+    "This market is wild, can't believe people still buy coins like this",
+]
+COINS = ["PEPE", "BONK", "WIF", "MOG", "BRETT", "POPCAT", "FARTCOIN", "TURBO", "NEIRO", "GIGA", "PNUT", "ZEREBRO"]
+
+
+def make_owner(rng: random.Random, user_id: int, now: datetime) -> Dict[str, Any]:
+    """Returns a raw owner record shaped like ScrapeStorm's."""
+    # roughly a third are fresh, empty accounts of the kind the spam filter drops
+    fresh = rng.random() < 0.35
+    record = {
+        "id_str": str(user_id),
+        "screen_name": f"user{user_id}",
+        "created_at": (now - timedelta(days=rng.randint(1, 60) if fresh else rng.randint(60, 4000))).isoformat(),
+        "verified": rng.random() < 0.02,
+        "is_blue_verified": rng.random() < 0.3,
+        "followers_count": rng.randint(0, 20) if fresh else int(rng.paretovariate(1.0) * 100),
+        "friends_count": rng.randint(0, 2000),
+        "statuses_count": rng.randint(0, 30) if fresh else rng.randint(50, 50_000),
+    }
+    if rng.random() < 0.9:
+        record["profile_image_url"] = f"https://pbs.twimg.com/profile_images/{user_id}.jpg"
+    if not fresh and rng.random() < 0.8:
+        record["profile_banner_url"] = f"https://pbs.twimg.com/profile_banners/{user_id}"
+    return record
+
+
+def make_entry(rng: random.Random, tweet_id: int, owner: Dict[str, Any], created_at: datetime) -> Dict[str, Any]:
+    """Returns a raw search entry shaped like ScrapeStorm's."""
+    text = rng.choice(TEMPLATES).format(coin=rng.choice(COINS), n=rng.randint(0, 999))
+    return {
+        "id": str(tweet_id),
+        "description": text,
+        "owner": owner,
+        "created_at": created_at.isoformat(),
+        "view_count": rng.randint(0, 100_000),
+        "liked_count": rng.randint(0, 2_000),
+        "share_count": rng.randint(0, 100),
+        "comment_count": rng.randint(0, 300),
+        "retweet_count": rng.randint(0, 500),
+        "contents": [{"type": "photo"}] if rng.random() < 0.3 else [],
+    }
+
+
+def make_entries(count: int, seed: int = 0, authors: int | None = None, start_id: int = 1_900_000_000_000_000_000) -> List[Dict[str, Any]]:
+    """Returns ``count`` entries, newest first, written by ``authors`` distinct accounts."""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    owners = [make_owner(rng, 10_000 + i, now) for i in range(authors or max(1, count // 5))]
+    return [
+        make_entry(rng, start_id + count - i, rng.choice(owners), now - timedelta(seconds=i * 3))
+        for i in range(count)
+    ]
+
+
+def make_page(entries: List[Dict[str, Any]], next_cursor: str | None) -> Dict[str, Any]:
+    """Wraps entries in a search response."""
+    return {"data": {"entries": entries}, "pagination": {"next_cursor": next_cursor}}
@@ -1,15 +1,22 @@
-from collections import Counter
-
 from sqlalchemy.orm import Session
-from sqlalchemy import func, case, Float, select
+from sqlalchemy import func, Float, literal_column, select, tuple_
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from . import models
+from .authors import DEFAULT_AUTHOR_SCORE
+from .pagination import Cursor
+from .rollups import window_author_estimates, window_keyword_counts, window_rollups
+from .trending import HeavyHitter, decay
 from datetime import datetime, timedelta, timezone
 from typing import List, Optional
 
 
-def get_tokens_by_score(db: Session, time_range: str, limit: int):
+def get_tokens_by_score(
+    db: Session, time_range: str, limit: int, weighted: bool = False, exact_authors: bool = False
+):
     """
     Get N tokens for the specified time range sorted by sentiment score.
+    With ``weighted``, each tweet counts in proportion to its author's stored account score.
+    Distinct authors are estimated from the author sketches unless ``exact_authors`` is set.
     """
     if time_range == "hour":
         start_time = datetime.now(timezone.utc) - timedelta(hours=1)
@@ -24,26 +31,75 @@ def get_tokens_by_score(db: Session, time_range: str, limit: int):
     else:
         return []
 
-    score = (
-        func.sum(models.CoinTweetAnalysis.weight)
-        * (
-            func.count(func.distinct(models.CoinTweetAnalysis.author)).cast(Float)
-            / func.count(models.CoinTweetAnalysis.id)
+    if weighted:
+        # author scores change over time, so weighted scores are computed from the raw rows
+        weight = models.CoinTweetAnalysis.weight * func.coalesce(models.Author.score, DEFAULT_AUTHOR_SCORE) / 10.0
+        score = (
+            func.sum(weight)
+            * (
+                func.count(func.distinct(models.CoinTweetAnalysis.author)).cast(Float)
+                / func.count(models.CoinTweetAnalysis.id)
+            )
+        ).label("score")
+        return (
+            db.query(models.CoinTweetAnalysis.coin_name, score)
+            .outerjoin(models.Author, models.Author.twitter_user_id == models.CoinTweetAnalysis.author_id)
+            .filter(models.CoinTweetAnalysis.publish_date >= start_time)
+            .group_by(models.CoinTweetAnalysis.coin_name)
+            .order_by(score.desc())
+            .limit(limit)
+            .all()
         )
+
+    rollups = window_rollups(start_time).subquery()
+    authors = _distinct_authors(start_time, None, exact_authors).subquery()
+    score = (
+        func.sum(rollups.c.weight_sum) * (authors.c.authors.cast(Float) / func.sum(rollups.c.mentions))
     ).label("score")
+    return (
+        db.query(rollups.c.coin_name, score)
+        .join(authors, authors.c.coin_name == rollups.c.coin_name)
+        .group_by(rollups.c.coin_name, authors.c.authors)
+        .having(func.sum(rollups.c.mentions) > 0)
+        .order_by(score.desc())
+        .limit(limit)
+        .all()
+    )
 
-    results = (
-        db.query(
+
+def _distinct_authors(start: datetime, end: datetime | None, exact: bool):
+    """Selects (coin_name, authors) for [start, end]: estimated from sketches, or counted from the raw rows."""
+    if not exact:
+        return window_author_estimates(start, end)
+    stmt = (
+        select(
             models.CoinTweetAnalysis.coin_name,
-            score,
+            func.count(func.distinct(models.CoinTweetAnalysis.author)).label("authors"),
         )
-        .filter(models.CoinTweetAnalysis.publish_date >= start_time)
+        .where(models.CoinTweetAnalysis.publish_date >= start)
         .group_by(models.CoinTweetAnalysis.coin_name)
-        .order_by(score.desc())
-        .limit(limit)
-        .all()
     )
-    return results
+    if end is not None:
+        stmt = stmt.where(models.CoinTweetAnalysis.publish_date <= end)
+    return stmt
+
+
+def get_distinct_authors(
+    db: Session,
+    *,
+    start: datetime,
+    end: datetime | None = None,
+    coins: Optional[List[str]] = None,
+    exact: bool = False,
+):
+    """
+    Get the number of distinct authors per coin in [start, end], estimated unless ``exact``.
+    """
+    authors = _distinct_authors(start, end, exact).subquery()
+    stmt = select(authors.c.coin_name, authors.c.authors).order_by(authors.c.authors.desc())
+    if coins:
+        stmt = stmt.where(authors.c.coin_name.in_(coins))
+    return db.execute(stmt).all()
 
 
 def get_token_aggregate_info(db: Session, coin_name: str, time_range: str):
@@ -63,64 +119,40 @@ def get_token_aggregate_info(db: Session, coin_name: str, time_range: str):
     else:
         return None
 
+    # sums and top keywords come back in one round trip
+    keywords = _top_keywords(start_time, 10, coin_name).subquery()
+    top_keywords = (
+        select(
+            func.coalesce(
+                func.json_agg(
+                    aggregate_order_by(
+                        func.json_build_object("keyword", keywords.c.keyword, "count", keywords.c.count),
+                        keywords.c.count.desc(),
+                    )
+                ),
+                literal_column("'[]'::json"),
+            )
+        )
+        .scalar_subquery()
+        .label("top_keywords")
+    )
+    rollups = window_rollups(start_time).subquery()
     results = (
         db.query(
-            func.count(models.CoinTweetAnalysis.id).label("total_mentions"),
-            func.sum(
-                case(
-                    (
-                        models.CoinTweetAnalysis.sentiment
-                        == models.SentimentEnum.positive,
-                        1,
-                    ),
-                    else_=0,
-                )
-            ).label("positive_count"),
-            func.sum(
-                case(
-                    (
-                        models.CoinTweetAnalysis.sentiment
-                        == models.SentimentEnum.negative,
-                        1,
-                    ),
-                    else_=0,
-                )
-            ).label("negative_count"),
-            func.sum(
-                case(
-                    (
-                        models.CoinTweetAnalysis.sentiment
-                        == models.SentimentEnum.neutral,
-                        1,
-                    ),
-                    else_=0,
-                )
-            ).label("neutral_count"),
-            func.sum(models.CoinTweetAnalysis.weight).label("sentiment_score"),
+            func.sum(rollups.c.mentions).label("total_mentions"),
+            func.sum(rollups.c.positive).label("positive_count"),
+            func.sum(rollups.c.negative).label("negative_count"),
+            func.sum(rollups.c.neutral).label("neutral_count"),
+            func.sum(rollups.c.weight_sum).label("sentiment_score"),
+            top_keywords,
         )
-        .filter(models.CoinTweetAnalysis.coin_name == coin_name)
-        .filter(models.CoinTweetAnalysis.publish_date >= start_time)
+        .filter(rollups.c.coin_name == coin_name)
         .first()
     )
 
     if not results or not results.total_mentions:
         return None
 
-    # get top keywords
-    keywords_results = (
-        db.query(models.CoinTweetAnalysis.keywords)
-        .filter(models.CoinTweetAnalysis.coin_name == coin_name)
-        .filter(models.CoinTweetAnalysis.publish_date >= start_time)
-        .all()
-    )
-
-    all_keywords = [keyword for row in keywords_results for keyword in row.keywords]
-    keyword_counts = Counter(all_keywords)
-    top_keywords = [
-        {"keyword": keyword, "count": count}
-        for keyword, count in keyword_counts.most_common(10)
-    ]
-
     positive_count = results.positive_count or 0
     negative_count = results.negative_count or 0
     total_mentions = results.total_mentions or 0
@@ -139,20 +171,74 @@ def get_token_aggregate_info(db: Session, coin_name: str, time_range: str):
         "total_mentions": total_mentions,
         "sentiment_score": sentiment_score,
         "average_sentiment_score": average_sentiment_score,
-        "top_keywords": top_keywords,
+        "top_keywords": results.top_keywords,
     }
 
 
+def _top_keywords(start: datetime, limit: int, coin_name: str | None = None):
+    """Selects the ``limit`` most frequent (keyword, count) pairs since ``start``, of one coin or all of them."""
+    counts = window_keyword_counts(start).subquery()
+    count = func.sum(counts.c.count).label("count")
+    query = select(counts.c.keyword, count).group_by(counts.c.keyword)
+    if coin_name is not None:
+        query = query.where(counts.c.coin_name == coin_name)
+    return query.order_by(count.desc(), counts.c.keyword).limit(limit)
+
+
+def get_top_keywords(db: Session, time_range: str, limit: int = 10, coin_name: str | None = None):
+    """
+    Get the most frequent keywords for the specified time range, across all tokens or for one.
+    """
+    if time_range == "hour":
+        start_time = datetime.now(timezone.utc) - timedelta(hours=1)
+    elif time_range == "3hr":
+        start_time = datetime.now(timezone.utc) - timedelta(hours=3)
+    elif time_range == "6hr":
+        start_time = datetime.now(timezone.utc) - timedelta(hours=6)
+    elif time_range == "12hr":
+        start_time = datetime.now(timezone.utc) - timedelta(hours=12)
+    elif time_range == "day":
+        start_time = datetime.now(timezone.utc) - timedelta(days=1)
+    else:
+        return []
+
+    return db.execute(_top_keywords(start_time, limit, coin_name)).all()
+
+
+def get_trending(db: Session, kind: str, limit: int) -> List[HeavyHitter]:
+    """
+    Get the heaviest items of a trending sketch (coins or keywords) with their scores decayed to now.
+    """
+    sketch = db.get(models.TrendingSketch, kind)
+    if sketch is None:
+        return []
+    factor = decay(sketch.landmark, datetime.now(timezone.utc), timedelta(seconds=sketch.half_life_seconds))
+    rows = db.execute(
+        select(models.TrendingCounter.item, models.TrendingCounter.count, models.TrendingCounter.error)
+        .where(models.TrendingCounter.kind == kind)
+        .order_by(models.TrendingCounter.count.desc())
+        .limit(limit)
+    )
+    return [HeavyHitter(item, count * factor, error * factor) for item, count, error in rows]
+
+
 def get_latest_tweets_by_coin(
-    db: Session, coin_name: str, skip: int = 0, limit: int = 5
+    db: Session, coin_name: str, skip: int = 0, limit: int = 5, after: Cursor | None = None
 ):
     """
     Get the latest N tweets for a given coin.
+    With ``after``, the (publish_date, id) of the last tweet of the previous page, ``skip`` is ignored.
     """
+    query = db.query(models.CoinTweetAnalysis).filter(models.CoinTweetAnalysis.coin_name == coin_name)
+    if after is not None:
+        query = query.filter(
+            # the plain bound lets the planner skip the newer partitions
+            models.CoinTweetAnalysis.publish_date <= after[0],
+            tuple_(models.CoinTweetAnalysis.publish_date, models.CoinTweetAnalysis.id) < after,
+        )
+        skip = 0
     return (
-        db.query(models.CoinTweetAnalysis)
-        .filter(models.CoinTweetAnalysis.coin_name == coin_name)
-        .order_by(models.CoinTweetAnalysis.publish_date.desc())
+        query.order_by(models.CoinTweetAnalysis.publish_date.desc(), models.CoinTweetAnalysis.id.desc())
         .offset(skip)
         .limit(limit)
         .all()
@@ -163,21 +249,20 @@ def get_hourly_sentiment_by_coin(db: Session, coin_name: str):
     """
     Get the average sentiment for a coin for the last 24 hours, grouped by hour.
     """
-    start_time = datetime.now(timezone.utc) - timedelta(days=1)
+    start_hour = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) - timedelta(hours=23)
+    hour = models.CoinSentimentHour
 
     return (
         db.query(
-            func.date_trunc("hour", models.CoinTweetAnalysis.publish_date).label(
-                "hour"
-            ),
-            func.count().label("n_tweets"),
-            func.avg(models.CoinTweetAnalysis.weight).label("avg_sentiment"),
-            func.sum(models.CoinTweetAnalysis.weight).label("sentiment_score"),
+            hour.bucket.label("hour"),
+            hour.mentions.label("n_tweets"),
+            (hour.weight_sum.cast(Float) / hour.mentions).label("avg_sentiment"),
+            hour.weight_sum.label("sentiment_score"),
         )
-        .filter(models.CoinTweetAnalysis.coin_name == coin_name)
-        .filter(models.CoinTweetAnalysis.publish_date >= start_time)
-        .group_by("hour")
-        .order_by("hour")
+        .filter(hour.coin_name == coin_name)
+        .filter(hour.bucket >= start_hour)
+        .filter(hour.mentions > 0)
+        .order_by(hour.bucket)
         .all()
     )
 
@@ -193,6 +278,10 @@ def aggregate_sentiment(
     """
     Aggregate sentiment data for specified coins within a time range, bucketed by time period.
 
+    Minute and hour buckets are read straight from the rollup tables; coarser
+    ones are summed from the hourly rollups. Buckets are in UTC, and the
+    range covers every bucket that starts within [start, end].
+
     Args:
         db: Database session
         coins: Optional list of coin names to filter by
@@ -203,25 +292,26 @@ def aggregate_sentiment(
     Returns:
         List of tuples with (coin_name, bucket, n_tweets, score, avg_score)
     """
+    rollup = models.CoinSentimentMinute if bucket == "minute" else models.CoinSentimentHour
+    bucket_start = (
+        rollup.bucket if bucket in ("minute", "hour") else func.date_trunc(bucket, rollup.bucket, "UTC")
+    ).label("bucket")
     stmt = (
         select(
-            models.CoinTweetAnalysis.coin_name,
-            func.date_trunc(bucket, models.CoinTweetAnalysis.publish_date).label(
-                "bucket"
-            ),
-            func.count().label("n_tweets"),
-            func.sum(models.CoinTweetAnalysis.weight).label("score"),
-            (func.sum(models.CoinTweetAnalysis.weight) / func.count()).label(
-                "avg_score"
-            ),
+            rollup.coin_name,
+            bucket_start,
+            func.sum(rollup.mentions).label("n_tweets"),
+            func.sum(rollup.weight_sum).label("score"),
+            (func.sum(rollup.weight_sum).cast(Float) / func.nullif(func.sum(rollup.mentions), 0)).label("avg_score"),
         )
-        .where(models.CoinTweetAnalysis.publish_date.between(start, end))
-        .group_by(models.CoinTweetAnalysis.coin_name, "bucket")
-        .order_by("bucket")
+        .where(rollup.bucket.between(func.date_trunc(bucket, start, "UTC"), end))
+        .group_by(rollup.coin_name, bucket_start)
+        .having(func.sum(rollup.mentions) > 0)
+        .order_by(bucket_start)
     )
 
     if coins:
-        stmt = stmt.where(models.CoinTweetAnalysis.coin_name.in_(coins))
+        stmt = stmt.where(rollup.coin_name.in_(coins))
 
     return db.execute(stmt).all()
 
@@ -275,9 +365,16 @@ def get_open_trades(db: Session):
 
 
 def get_trades(
-    db: Session, limit: int = 10, skip: int = 0, is_closed: bool | None = None, time_range: str = "day"
+    db: Session,
+    limit: int = 10,
+    skip: int = 0,
+    is_closed: bool | None = None,
+    time_range: str = "day",
+    after: Cursor | None = None,
 ):
-    """Get all trades."""
+    """Get all trades.
+    With ``after``, the (buy_date, id) of the last trade of the previous page, ``skip`` is ignored.
+    """
     query = db.query(models.Trade)
     if is_closed is True:
         # For closed trades, sell_date should not be NULL
@@ -297,6 +394,46 @@ def get_trades(
     elif time_range == "day":
         query = query.filter(models.Trade.buy_date >= datetime.now(timezone.utc) - timedelta(days=1))
     
-    # Sort by buy_date desc
-    query = query.order_by(models.Trade.buy_date.desc())
-    return query.offset(skip).limit(limit).all()
\ No newline at end of file
+    if after is not None:
+        query = query.filter(tuple_(models.Trade.buy_date, models.Trade.id) < after)
+        skip = 0
+
+    # Sort by buy_date desc, id breaks ties so that pages do not overlap
+    query = query.order_by(models.Trade.buy_date.desc(), models.Trade.id.desc())
+    return query.offset(skip).limit(limit).all()
+
+def get_spike_events(db: Session, coin_name: str | None = None, limit: int = 50):
+    """
+    Get the most recent spikes, newest first, with how long detection and trade entry took.
+    """
+    detection_latency = func.extract("epoch", models.SpikeEvent.detected_at - models.SpikeEvent.published_at)
+    entry_latency = func.extract("epoch", models.Trade.buy_date - models.SpikeEvent.detected_at)
+    query = (
+        db.query(
+            models.SpikeEvent,
+            detection_latency.label("detection_latency_seconds"),
+            entry_latency.label("entry_latency_seconds"),
+        )
+        .outerjoin(models.Trade, models.Trade.id == models.SpikeEvent.trade_id)
+    )
+    if coin_name is not None:
+        query = query.filter(models.SpikeEvent.coin_name == coin_name)
+    rows = query.order_by(models.SpikeEvent.detected_at.desc()).limit(limit).all()
+    return [
+        {
+            **{column.name: getattr(event, column.name) for column in models.SpikeEvent.__table__.columns},
+            "detection_latency_seconds": detection,
+            "entry_latency_seconds": entry,
+        }
+        for event, detection, entry in rows
+    ]
+
+
+def get_job_runs(db: Session, job: str | None = None, status: str | None = None, limit: int = 50):
+    """Get the most recent scheduled job runs."""
+    query = db.query(models.JobRun)
+    if job is not None:
+        query = query.filter(models.JobRun.job == job)
+    if status is not None:
+        query = query.filter(models.JobRun.status == status)
+    return query.order_by(models.JobRun.started_at.desc()).limit(limit).all()
@@ -0,0 +1,66 @@
+"""Bounded tweet de-duplication against already processed ids."""
+
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Mapping, Set
+
+from sqlalchemy import String, any_, bindparam, delete, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.orm import Session
+
+from app.models import CoinTweetAnalysis, SeenTweet
+from app.settings import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+def get_existing_tweet_ids(db: Session, candidate_ids: Iterable[str]) -> Set[str]:
+    """Returns which of ``candidate_ids`` were already stored or seen.
+
+    Only the candidates are looked up (``twitter_id = ANY(:ids)`` on both
+    unique indexes), so the cost depends on the batch size, not the table size.
+    """
+    ids = list({str(i) for i in candidate_ids})
+    if not ids:
+        return set()
+
+    ids_param = bindparam("ids", type_=ARRAY(String))
+    stmt = select(CoinTweetAnalysis.twitter_id).where(
+        CoinTweetAnalysis.twitter_id == any_(ids_param)
+    ).union(
+        select(SeenTweet.twitter_id).where(SeenTweet.twitter_id == any_(ids_param))
+    )
+    return set(db.execute(stmt, {"ids": ids}).scalars())
+
+
+def record_seen_tweets(db: Session, twitter_ids: Iterable[str], reason: str, texts: Mapping[str, str] | None = None):
+    """Records tweets that were processed but not stored, so they are not classified again.
+
+    ``texts`` keeps the text of some of them, keyed by tweet id.
+    """
+    texts = texts or {}
+    rows = [{"twitter_id": str(i), "reason": reason, "text": texts.get(str(i))} for i in twitter_ids]
+    if not rows:
+        return
+
+    stmt = insert(SeenTweet).values(rows).on_conflict_do_nothing(index_elements=["twitter_id"])
+    try:
+        db.execute(stmt)
+        db.commit()
+    except Exception as e:
+        logger.error(f"Failed to record seen tweets: {e}")
+        db.rollback()
+
+
+def prune_seen_tweets(db: Session, retention_days: int = settings.seen_tweets_retention_days):
+    """Deletes seen-tweet records older than the retention window."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    try:
+        result = db.execute(delete(SeenTweet).where(SeenTweet.seen_at < cutoff))
+        db.commit()
+        if result.rowcount:
+            logger.info(f"Pruned {result.rowcount} seen tweets older than {retention_days} days.")
+    except Exception as e:
+        logger.error(f"Failed to prune seen tweets: {e}")
+        db.rollback()
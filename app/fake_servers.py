@@ -0,0 +1,281 @@
+"""Local stand-ins for ScrapeStorm, OpenAI and CoinGecko.
+
+One aiohttp app serves all three upstreams, so the collector, the LLM
+classifier and the trading simulation can run end to end without network
+access or API spend. Point the app at it with::
+
+    SCRAPESTORM_BASE_URL=http://127.0.0.1:8900
+    OPENAI_BASE_URL=http://127.0.0.1:8900/v1
+    COINGECKO_BASE_URL=http://127.0.0.1:8900/api/v3
+
+Each upstream has its own latency distribution, error rate and rate limit
+(answered with 429 and ``Retry-After``), e.g.::
+
+    python -m app.fake_servers --openai "distribution=lognormal,latency=0.4,jitter=0.5,rate_limit=50"
+"""
+
+import argparse
+import asyncio
+import logging
+import math
+import random
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, fields
+from typing import Any, Dict, List
+
+from aiohttp import web
+
+from app.collectors.scrapestorm.fake_data import make_entries, make_page
+from app.llm.classification import BatchCoinTweetAnalysis
+from app.llm.fake import FakeStructuredModel
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8900
+# far above real tweet ids, so fake tweets never collide with collected ones
+DEFAULT_START_ID = 5_000_000_000_000_000_000
+
+
+@dataclass
+class UpstreamProfile:
+    """How a fake upstream behaves.
+
+    Attributes:
+        distribution: Latency distribution: fixed, normal or lognormal
+        latency: Mean latency in seconds (the median for lognormal)
+        jitter: Standard deviation for normal, sigma for lognormal
+        error_rate: Share of requests answered with a 500
+        rate_limit: Requests per second allowed before answering 429; 0 disables it
+    """
+
+    distribution: str = "normal"
+    latency: float = 0.1
+    jitter: float = 0.02
+    error_rate: float = 0.0
+    rate_limit: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> "UpstreamProfile":
+        """Parses ``key=value`` pairs separated by commas, e.g. ``latency=0.3,error_rate=0.01``."""
+        types = {f.name: f.type for f in fields(cls)}
+        values: Dict[str, Any] = {}
+        for pair in filter(None, (p.strip() for p in spec.split(","))):
+            key, _, value = pair.partition("=")
+            if key not in types:
+                raise ValueError(f"Unknown upstream profile field: {key}")
+            values[key] = value if types[key] in (str, "str") else float(value)
+        return cls(**values)
+
+    def delay(self, rng: random.Random) -> float:
+        if self.distribution == "fixed":
+            return self.latency
+        if self.distribution == "lognormal":
+            return self.latency * math.exp(rng.gauss(0.0, self.jitter))
+        return max(0.0, rng.gauss(self.latency, self.jitter))
+
+
+class _Upstream:
+    """Applies a profile to requests: rate limit first, then latency, then errors."""
+
+    def __init__(self, name: str, profile: UpstreamProfile, rng: random.Random, stats: Counter):
+        self.name = name
+        self.profile = profile
+        self.rng = rng
+        self.stats = stats
+        self._tokens = profile.rate_limit
+        self._refilled_at = time.monotonic()
+
+    def _take_token(self) -> bool:
+        if not self.profile.rate_limit:
+            return True
+        now = time.monotonic()
+        self._tokens = min(self.profile.rate_limit, self._tokens + (now - self._refilled_at) * self.profile.rate_limit)
+        self._refilled_at = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    async def respond(self, handler) -> web.Response:
+        if not self._take_token():
+            self.stats[f"{self.name} 429"] += 1
+            retry_after = max(1, math.ceil((1 - self._tokens) / self.profile.rate_limit))
+            return web.json_response(
+                {"error": {"message": "Rate limit exceeded", "type": "rate_limit"}},
+                status=429,
+                headers={"Retry-After": str(retry_after)},
+            )
+        await asyncio.sleep(self.profile.delay(self.rng))
+        if self.rng.random() < self.profile.error_rate:
+            self.stats[f"{self.name} 500"] += 1
+            return web.json_response({"error": {"message": "Simulated upstream failure"}}, status=500)
+        self.stats[f"{self.name} 200"] += 1
+        return await handler()
+
+
+class FakeUpstreams:
+    """Builds the aiohttp app serving the three fake upstreams.
+
+    ScrapeStorm search returns a fixed timeline of ``tweets_per_query``
+    tweets per query, newest first, ``page_size`` per page, with tweet ids
+    from ``start_id`` upwards; each new query gets the next id range.
+    """
+
+    def __init__(
+        self,
+        scrapestorm: UpstreamProfile = UpstreamProfile(latency=0.3, jitter=0.1),
+        openai: UpstreamProfile = UpstreamProfile(latency=0.5, jitter=0.1),
+        coingecko: UpstreamProfile = UpstreamProfile(latency=0.1, jitter=0.02),
+        tweets_per_query: int = 200,
+        page_size: int = 20,
+        start_id: int = DEFAULT_START_ID,
+        seed: int = 0,
+    ):
+        self.rng = random.Random(seed)
+        self.stats: Counter = Counter()
+        self.scrapestorm = _Upstream("scrapestorm", scrapestorm, self.rng, self.stats)
+        self.openai = _Upstream("openai", openai, self.rng, self.stats)
+        self.coingecko = _Upstream("coingecko", coingecko, self.rng, self.stats)
+        self.tweets_per_query = tweets_per_query
+        self.page_size = page_size
+        self.start_id = start_id
+        self.seed = seed
+        self._timelines: Dict[str, List[Dict[str, Any]]] = {}
+        self._prices: Dict[str, float] = {}
+        self._model = FakeStructuredModel()
+        self._batch_model = FakeStructuredModel(batch=True)
+
+    def query_id_range(self, index: int) -> range:
+        """Tweet ids of the ``index``-th query's timeline."""
+        first = self.start_id + index * self.tweets_per_query + 1
+        return range(first, first + self.tweets_per_query)
+
+    def _timeline(self, query: str) -> List[Dict[str, Any]]:
+        timeline = self._timelines.get(query)
+        if timeline is None:
+            index = len(self._timelines)
+            timeline = self._timelines[query] = make_entries(
+                self.tweets_per_query,
+                seed=self.seed + index,
+                start_id=self.query_id_range(index).start - 1,
+            )
+        return timeline
+
+    async def search_tweets(self, request: web.Request) -> web.Response:
+        async def handler():
+            timeline = self._timeline(request.query.get("query", ""))
+            offset = int(request.query.get("cursor") or 0)
+            end = offset + self.page_size
+            next_cursor = str(end) if end < len(timeline) else None
+            return web.json_response(make_page(timeline[offset:end], next_cursor))
+
+        return await self.scrapestorm.respond(handler)
+
+    async def chat_completions(self, request: web.Request) -> web.Response:
+        body = await request.json()
+
+        async def handler():
+            prompt = "\n".join(
+                m["content"] if isinstance(m["content"], str) else " ".join(p.get("text", "") for p in m["content"])
+                for m in body["messages"]
+            )
+            if body.get("tools"):
+                schema = body["tools"][0]["function"]["name"]
+            else:
+                schema = body.get("response_format", {}).get("json_schema", {}).get("name", "")
+            model = self._batch_model if schema == BatchCoinTweetAnalysis.__name__ else self._model
+            arguments = model._analyze(prompt).model_dump_json()
+            message: Dict[str, Any] = {"role": "assistant", "content": arguments}
+            if body.get("tools"):
+                message = {
+                    "role": "assistant",
+                    "content": None,
+                    "tool_calls": [
+                        {
+                            "id": f"call_{uuid.uuid4().hex[:24]}",
+                            "type": "function",
+                            "function": {"name": schema, "arguments": arguments},
+                        }
+                    ],
+                }
+            prompt_tokens = len(prompt) // 4
+            completion_tokens = len(arguments) // 4
+            return web.json_response(
+                {
+                    "id": f"chatcmpl-{uuid.uuid4().hex}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "fake"),
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": message,
+                            "finish_reason": "tool_calls" if body.get("tools") else "stop",
+                        }
+                    ],
+                    "usage": {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": completion_tokens,
+                        "total_tokens": prompt_tokens + completion_tokens,
+                    },
+                }
+            )
+
+        return await self.openai.respond(handler)
+
+    async def simple_price(self, request: web.Request) -> web.Response:
+        async def handler():
+            currency = request.query.get("vs_currencies", "usd").split(",")[0]
+            prices = {}
+            for symbol in filter(None, request.query.get("symbols", "").split(",")):
+                # a random walk, so trades open and close like they would on a live market
+                price = self._prices.get(symbol) or 10 ** self.rng.uniform(-6, 1)
+                price = self._prices[symbol] = price * math.exp(self.rng.gauss(0.0, 0.03))
+                prices[symbol] = {currency: price}
+            return web.json_response(prices)
+
+        return await self.coingecko.respond(handler)
+
+    async def fake_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(dict(self.stats))
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/twitter.com/api/v2.1/search_tweets_by_query/", self.search_tweets)
+        app.router.add_post("/v1/chat/completions", self.chat_completions)
+        app.router.add_get("/api/v3/simple/price", self.simple_price)
+        app.router.add_get("/_fake/stats", self.fake_stats)
+        return app
+
+
+def main():
+    """Serves fake ScrapeStorm, OpenAI and CoinGecko APIs."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--scrapestorm", type=UpstreamProfile.parse, default="latency=0.3,jitter=0.1")
+    parser.add_argument("--openai", type=UpstreamProfile.parse, default="latency=0.5,jitter=0.1")
+    parser.add_argument("--coingecko", type=UpstreamProfile.parse, default="latency=0.1,jitter=0.02")
+    parser.add_argument("--tweets-per-query", type=int, default=200)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--start-id", type=int, default=DEFAULT_START_ID)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    upstreams = FakeUpstreams(
+        scrapestorm=args.scrapestorm,
+        openai=args.openai,
+        coingecko=args.coingecko,
+        tweets_per_query=args.tweets_per_query,
+        page_size=args.page_size,
+        start_id=args.start_id,
+        seed=args.seed,
+    )
+    web.run_app(upstreams.create_app(), host=args.host, port=args.port, print=logger.info)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    main()
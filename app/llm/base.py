@@ -0,0 +1,46 @@
+"""Interface shared by the tweet classification backends."""
+
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Dict
+
+from pydantic import BaseModel
+
+
+class TweetClassifier(ABC):
+    """A backend that turns tweet texts into ``CoinTweetAnalysis`` results.
+
+    ``batch_size`` is the number of tweets the backend prefers per
+    ``classify_batch`` call; 1 means it works best one tweet at a time.
+    """
+
+    name: str = "classifier"
+    batch_size: int = 1
+
+    @abstractmethod
+    async def classify_batch(self, tweets: Dict[str, str]) -> Dict[str, BaseModel | BaseException]:
+        """Classify tweets keyed by tweet id, returning exceptions in place of failed results."""
+
+    async def classify(self, tweet: str) -> BaseModel:
+        """Classify a single tweet."""
+        result = (await self.classify_batch({"0": tweet}))["0"]
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    def describe(self) -> str:
+        """One-line summary of the backend's counters for the run log."""
+        return self.name
+
+
+async def classify_in_chunks(
+    classifier: TweetClassifier, tweets: Dict[str, str]
+) -> Dict[str, BaseModel | BaseException]:
+    """Splits ``tweets`` into the classifier's preferred batch size and classifies the chunks concurrently."""
+    items = list(tweets.items())
+    size = max(1, classifier.batch_size)
+    chunks = [dict(items[i : i + size]) for i in range(0, len(items), size)]
+    results: Dict[str, BaseModel | BaseException] = {}
+    for chunk_results in await asyncio.gather(*(classifier.classify_batch(chunk) for chunk in chunks)):
+        results.update(chunk_results)
+    return results
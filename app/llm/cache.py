@@ -0,0 +1,199 @@
+"""Content-addressed cache of tweet classifications."""
+
+import asyncio
+import hashlib
+import logging
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models import ClassificationCacheEntry
+from app.settings import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+URL_RE = re.compile(r"https?://\S+|www\.\S+")
+MENTION_RE = re.compile(r"@\w+")
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Strips URLs, mentions and extra whitespace so copies of a tweet compare equal."""
+    text = URL_RE.sub(" ", text)
+    text = MENTION_RE.sub(" ", text)
+    return WHITESPACE_RE.sub(" ", text).strip().lower()
+
+
+def content_hash(text: str) -> str:
+    """Returns the cache key of a tweet text."""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters of a classification cache."""
+
+    memory_hits: int = 0
+    db_hits: int = 0
+    coalesced: int = 0
+    misses: int = 0
+
+    @property
+    def llm_calls_saved(self) -> int:
+        return self.memory_hits + self.db_hits + self.coalesced
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.llm_calls_saved + self.misses
+        return self.llm_calls_saved / total if total else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.memory_hits} memory hits, {self.db_hits} db hits, "
+            f"{self.coalesced} coalesced, {self.misses} misses "
+            f"({self.llm_calls_saved} LLM calls saved, {self.hit_rate:.0%} hit rate)"
+        )
+
+
+class ClassificationCache:
+    """Two-level cache: an in-process LRU backed by the classification_cache table.
+
+    Values are JSON-compatible dicts keyed by ``content_hash``. Database rows
+    older than ``ttl`` are ignored on lookup and removed by ``evict_expired``.
+    Turning off ``reads`` makes every lookup a miss, e.g. to classify again
+    after a prompt change; turning off ``writes`` keeps new values in memory
+    only.
+    """
+
+    def __init__(
+        self,
+        max_size: int = settings.classification_cache_size,
+        ttl: timedelta = timedelta(hours=settings.classification_cache_ttl_hours),
+        persistent: bool = True,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.persistent = persistent
+        self.reads = True
+        self.writes = True
+        self.stats = CacheStats()
+        self._memory: OrderedDict[str, tuple[datetime, Dict[str, Any]]] = OrderedDict()
+
+    def reset_stats(self):
+        self.stats = CacheStats()
+
+    def _remember(self, key: str, value: Dict[str, Any], created_at: datetime):
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    def _lookup_memory(self, key: str) -> Dict[str, Any] | None:
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        created_at, value = entry
+        if created_at < datetime.now(timezone.utc) - self.ttl:
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return value
+
+    def _load(self, keys: list[str]) -> Dict[str, tuple[datetime, Dict[str, Any]]]:
+        cutoff = datetime.now(timezone.utc) - self.ttl
+        stmt = select(
+            ClassificationCacheEntry.content_hash,
+            ClassificationCacheEntry.created_at,
+            ClassificationCacheEntry.analysis,
+        ).where(
+            ClassificationCacheEntry.content_hash.in_(keys),
+            ClassificationCacheEntry.created_at >= cutoff,
+        )
+        with get_db() as db:
+            return {row.content_hash: (row.created_at, row.analysis) for row in db.execute(stmt)}
+
+    def _store(self, values: Dict[str, Dict[str, Any]]):
+        rows = [{"content_hash": key, "analysis": value} for key, value in values.items()]
+        stmt = insert(ClassificationCacheEntry).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["content_hash"],
+            set_={"analysis": stmt.excluded.analysis, "created_at": stmt.excluded.created_at},
+        )
+        with get_db() as db:
+            try:
+                db.execute(stmt)
+                db.commit()
+            except Exception as e:
+                logger.error(f"Failed to store classification cache entries: {e}")
+                db.rollback()
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Returns the cached values of ``keys`` that are present and fresh."""
+        if not self.reads:
+            self.stats.misses += len(set(keys))
+            return {}
+        found = {}
+        missing = []
+        for key in dict.fromkeys(keys):
+            value = self._lookup_memory(key)
+            if value is not None:
+                found[key] = value
+                self.stats.memory_hits += 1
+            else:
+                missing.append(key)
+
+        if missing and self.persistent:
+            try:
+                loaded = await asyncio.to_thread(self._load, missing)
+            except Exception as e:
+                logger.error(f"Failed to read classification cache: {e}")
+                loaded = {}
+            for key, (created_at, value) in loaded.items():
+                self._remember(key, value, created_at)
+                found[key] = value
+            self.stats.db_hits += len(loaded)
+            missing = [key for key in missing if key not in loaded]
+
+        self.stats.misses += len(missing)
+        return found
+
+    async def get(self, key: str) -> Dict[str, Any] | None:
+        return (await self.get_many([key])).get(key)
+
+    async def put_many(self, values: Dict[str, Dict[str, Any]]):
+        """Stores values in memory and writes them through to the database."""
+        if not values:
+            return
+        now = datetime.now(timezone.utc)
+        for key, value in values.items():
+            self._remember(key, value, now)
+        if self.persistent and self.writes:
+            try:
+                await asyncio.to_thread(self._store, values)
+            except Exception as e:
+                logger.error(f"Failed to write classification cache: {e}")
+
+    async def put(self, key: str, value: Dict[str, Any]):
+        await self.put_many({key: value})
+
+    def evict_expired(self, db: Session):
+        """Deletes database entries older than the TTL."""
+        cutoff = datetime.now(timezone.utc) - self.ttl
+        try:
+            result = db.execute(
+                delete(ClassificationCacheEntry).where(ClassificationCacheEntry.created_at < cutoff)
+            )
+            db.commit()
+            if result.rowcount:
+                logger.info(f"Evicted {result.rowcount} expired classification cache entries.")
+        except Exception as e:
+            logger.error(f"Failed to evict classification cache entries: {e}")
+            db.rollback()
@@ -1,9 +1,24 @@
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass
+
 from langchain_openai import ChatOpenAI
 
-from pydantic import BaseModel, Field
-from typing import Literal
+from pydantic import BaseModel, Field, ValidationError
+from typing import Dict, Iterable, List, Literal
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+from app.llm.base import TweetClassifier
+from app.llm.cache import ClassificationCache, content_hash
+from app.llm.prefilter import PreClassifier
+from app.llm.rate_limit import RateLimiter
+from app.settings import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
 
 class CoinTweetAnalysis(BaseModel):
     """CoinTweetAnalysis model."""
@@ -16,16 +31,27 @@ class CoinTweetAnalysis(BaseModel):
     keywords: list[str] = Field(description="2-3 keywords from the tweet")
 
 
+class BatchCoinTweetAnalysisItem(CoinTweetAnalysis):
+    """CoinTweetAnalysis of one tweet in a batch."""
+
+    tweet_id: str = Field(description="The tweet_id of the analyzed tweet")
+
+
+class BatchCoinTweetAnalysis(BaseModel):
+    """Analyses of a batch of tweets."""
+
+    items: list[BatchCoinTweetAnalysisItem] = Field(description="One analysis per input tweet")
+
+
 model = ChatOpenAI(
-    model="gpt-4.1-mini",
+    model=settings.llm_model,
     temperature=0,
+    base_url=settings.openai_base_url,
 )
 model_with_structured_output = model.with_structured_output(CoinTweetAnalysis)
+model_with_batch_output = model.with_structured_output(BatchCoinTweetAnalysis)
 
-PROMPT = """
-You are a crypto-savvy analyst.  
-Given **one tweet** about crypto, extract structured information and return it **exactly** in the JSON schema shown below.
-
+RULES = """
 # ➊ Identify whether a **specific cryptocurrency** is mentioned  
 • Look only for explicit tickers (`$PEPE`, `PEPE/USDT`, `#PEPE`) **or** well-known coin names (Bitcoin, Solana, XRP, etc.).  
 • Ignore generic words like “shitcoin” when no concrete ticker follows.  
@@ -33,7 +59,8 @@ Given **one tweet** about crypto, extract structured information and return it *
 
 # ➋ Determine the most important coin (`coin_name`)  
 • If several $-tickers appear, choose the one that appears **earliest** in the tweet.  
-• Return only the **uppercase** ticker (strip `$`, `#`, or pair suffixes like `/USDT`).
+• Return only the **uppercase** ticker (strip `$`, `#`, or pair suffixes like `/USDT`).  
+• A `candidate_ticker`, when given, is the earliest non-blue-chip ticker found by exact rules; pick it unless the tweet is about another coin.
 
 # ➌ Classify `is_speculative_coin` (boolean)  
 Set **true** if the selected coin falls in any of these categories:  
@@ -51,7 +78,12 @@ If no coin or the coin is BTC/ETH (or another blue-chip) → `is_speculative_coi
 • Provide **2–3** concise nouns or noun-phrases that describe the coin’s context (e.g., “pump”, “creator rewards”, “airdrop”).  
 • **Do not include** generic trading boiler-plate: vip, tp, signal, invest, join, trading, forex, pumpfun, pump, TP5/TP10, giveaways, “join telegram”, etc.
 
-# ➏ Output  
+"""
+
+PROMPT = """
+You are a crypto-savvy analyst.  
+Given **one tweet** about crypto, extract structured information and return it **exactly** in the JSON schema shown below.
+""" + RULES + """# ➏ Output  
 Return **only** the following JSON object (no extra keys, no commentary; booleans in lowercase):
 
 ```json
@@ -81,7 +113,7 @@ Return **only** the following JSON object (no extra keys, no commentary; boolean
 ```
 
 ---
-
+{hint}
 ### Now analyze this tweet:
 
 ```
@@ -89,12 +121,337 @@ Return **only** the following JSON object (no extra keys, no commentary; boolean
 ```
 """
 
+BATCH_PROMPT = """
+You are a crypto-savvy analyst.  
+Given a **list of tweets** about crypto, analyze **each tweet independently** and return one result per tweet **exactly** in the JSON schema shown below.
+""" + RULES + """# ➏ Output  
+Return **only** the following JSON object with exactly one item per input tweet, copying its `tweet_id` (no extra keys, no commentary; booleans in lowercase):
+
+```json
+{
+  "items": [
+    {
+      "tweet_id": "<tweet_id>",
+      "is_speculative_coin": true | false,
+      "coin_name": "TICKER" | "",
+      "sentiment": "positive" | "negative" | "neutral",
+      "keywords": ["kw1", "kw2", "kw3"]
+    }
+  ]
+}
+```
+
+---
+
+### Now analyze these tweets (one JSON object per line):
+
+```
+{tweets}
+```
+"""
+
+
+# rough prompt size estimate (~4 characters per token) plus the JSON answer
+OUTPUT_TOKENS = 60
+
+
+def estimate_tokens(prompt: str, answers: int = 1) -> int:
+    """Estimate the tokens a classification request consumes."""
+    return len(prompt) // 4 + OUTPUT_TOKENS * answers
+
+
+class BatchSizeTuner:
+    """Adapts the batch size to the measured latency and token cost of batch calls.
+
+    Keeps an exponentially weighted average of latency and tokens per tweet for
+    every batch size tried. With a ``target_latency`` the size is halved when
+    full batches get slower than the target and doubled (up to ``max_size``)
+    while they stay under half of it, since larger batches amortize the shared
+    instructions over more tweets. Once batching is on, the size does not go
+    below 2: single tweets are classified without the batch call, so a size of
+    1 would never be measured again and batching would stay off for good.
+    """
+
+    def __init__(self, initial_size: int, max_size: int, target_latency: float = 0.0, smoothing: float = 0.3):
+        self.batch_size = max(1, initial_size)
+        self.min_size = min(2, self.batch_size)
+        self.max_size = max(self.batch_size, max_size)
+        self.target_latency = target_latency
+        self.smoothing = smoothing
+        self.latency: Dict[int, float] = {}
+        self.tokens_per_tweet: Dict[int, float] = {}
+
+    def _update(self, averages: Dict[int, float], size: int, value: float) -> float:
+        previous = averages.get(size)
+        averages[size] = value if previous is None else previous + self.smoothing * (value - previous)
+        return averages[size]
+
+    def observe(self, size: int, latency: float, tokens: int):
+        """Records one batch call of ``size`` tweets."""
+        latency = self._update(self.latency, size, latency)
+        self._update(self.tokens_per_tweet, size, tokens / size)
+
+        # only full batches say anything about the current size
+        if not self.target_latency or size != self.batch_size:
+            return
+        if latency > self.target_latency and self.batch_size > self.min_size:
+            self.batch_size = max(self.min_size, self.batch_size // 2)
+        elif latency < self.target_latency / 2 and self.batch_size < self.max_size:
+            self.batch_size = min(self.max_size, self.batch_size * 2)
+
+    def __str__(self) -> str:
+        sizes = ", ".join(
+            f"{size}: {self.latency[size]:.2f}s, {self.tokens_per_tweet[size]:.0f} tokens/tweet"
+            for size in sorted(self.latency)
+        )
+        return f"batch size {self.batch_size} ({sizes or 'no measurements'})"
+
+
+@dataclass
+class ClassificationStats:
+    """Throughput counters of a classification engine."""
+
+    completed: int = 0
+    failed: int = 0
+    started_at: float | None = None
+    finished_at: float | None = None
+
+    @property
+    def tweets_per_second(self) -> float:
+        if self.started_at is None or self.finished_at is None:
+            return 0.0
+        elapsed = self.finished_at - self.started_at
+        return self.completed / elapsed if elapsed > 0 else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.completed} classified, {self.failed} failed, "
+            f"{self.tweets_per_second:.2f} tweets/sec"
+        )
+
+
+pre_classifier = PreClassifier()
+
+
+def candidate_ticker(tweet: str) -> str | None:
+    """Returns the ticker the rules found for a tweet, passed to the LLM as a hint."""
+    return pre_classifier.classify(tweet).ticker
+
+
+def render_prompt(tweet: str) -> str:
+    ticker = candidate_ticker(tweet)
+    hint = f"\ncandidate_ticker: `{ticker}`\n" if ticker else ""
+    return PROMPT.replace("{hint}", hint).replace("{tweet}", tweet)
+
+
+def render_batch_line(tweet_id: str, tweet: str) -> str:
+    item = {"tweet_id": tweet_id, "text": tweet}
+    ticker = candidate_ticker(tweet)
+    if ticker:
+        item["candidate_ticker"] = ticker
+    return json.dumps(item, ensure_ascii=False)
+
+
+class ClassificationEngine(TweetClassifier):
+    """Non-blocking LLM tweet classifier.
+
+    At most ``max_concurrency`` requests are in flight at any time (a sliding
+    window: a new request starts as soon as any one finishes), and every
+    request first takes its share of the requests-per-minute and
+    tokens-per-minute budgets. Any model exposing ``ainvoke`` can be used,
+    e.g. ``app.llm.fake.FakeStructuredModel`` for local runs.
+
+    With a ``cache``, tweets whose normalized text was classified before are
+    answered from it, and identical texts classified concurrently share a
+    single model call.
+    """
+
+    def __init__(
+        self,
+        model=None,
+        max_concurrency: int = settings.llm_max_concurrency,
+        requests_per_minute: int = settings.llm_requests_per_minute,
+        tokens_per_minute: int = settings.llm_tokens_per_minute,
+        batch_model=None,
+        batch_size: int = settings.llm_batch_size,
+        max_batch_size: int = settings.llm_max_batch_size,
+        batch_target_latency: float = settings.llm_batch_target_latency,
+        cache: ClassificationCache | None = None,
+    ):
+        self.model = model if model is not None else model_with_structured_output
+        self.batch_model = batch_model if batch_model is not None else model_with_batch_output
+        self.limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self.tuner = BatchSizeTuner(batch_size, max_batch_size, batch_target_latency)
+        self.name = "llm"
+        self.cache = cache
+        self.stats = ClassificationStats()
+        self._window = asyncio.Semaphore(max_concurrency)
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    @property
+    def batch_size(self) -> int:
+        """Current number of tweets per batch call; 1 means batch mode is off."""
+        return self.tuner.batch_size
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=1, max=10),
+    )
+    async def _attempt(self, prompt: str) -> CoinTweetAnalysis:
+        async with self._window:
+            await self.limiter.acquire(estimate_tokens(prompt))
+            return await self.model.ainvoke(prompt)
+
+    def describe(self) -> str:
+        return f"llm: {self.stats}"
+
+    def reset_stats(self):
+        """Start a fresh throughput measurement."""
+        self.stats = ClassificationStats()
+        if self.cache is not None:
+            self.cache.reset_stats()
+
+    async def classify(self, tweet: str) -> CoinTweetAnalysis:
+        """Classify a tweet."""
+        if self.cache is None:
+            return await self._classify_uncached(tweet)
+
+        key = content_hash(tweet)
+        task = self._inflight.get(key)
+        if task is not None:
+            self.cache.stats.coalesced += 1
+            return await asyncio.shield(task)
+
+        cached = await self.cache.get(key)
+        if cached is not None:
+            return CoinTweetAnalysis.model_validate(cached)
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._classify_and_store(key, tweet))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _classify_and_store(self, key: str, tweet: str) -> CoinTweetAnalysis:
+        analysis = await self._classify_uncached(tweet)
+        await self.cache.put(key, analysis.model_dump())
+        return analysis
+
+    async def _classify_uncached(self, tweet: str) -> CoinTweetAnalysis:
+        if self.stats.started_at is None:
+            self.stats.started_at = time.monotonic()
+        try:
+            analysis = await self._attempt(render_prompt(tweet))
+        except Exception:
+            self.stats.failed += 1
+            raise
+        self.stats.completed += 1
+        self.stats.finished_at = time.monotonic()
+        return analysis
+
+    async def classify_many(self, tweets: Iterable[str]) -> List[CoinTweetAnalysis | BaseException]:
+        """Classify tweets concurrently, returning exceptions in place of failed results."""
+        return await asyncio.gather(*(self.classify(t) for t in tweets), return_exceptions=True)
+
+    async def _classify_many_uncached(self, tweets: Iterable[str]) -> List[CoinTweetAnalysis | BaseException]:
+        return await asyncio.gather(*(self._classify_uncached(t) for t in tweets), return_exceptions=True)
+
+    async def _attempt_batch(self, prompt: str, size: int) -> BatchCoinTweetAnalysis:
+        tokens = estimate_tokens(prompt, answers=size)
+        async with self._window:
+            await self.limiter.acquire(tokens)
+            started = time.monotonic()
+            response = await self.batch_model.ainvoke(prompt)
+        self.tuner.observe(size, time.monotonic() - started, tokens)
+        return response
+
+    async def classify_batch(self, tweets: Dict[str, str]) -> Dict[str, CoinTweetAnalysis | BaseException]:
+        """Classify several tweets, keyed by tweet id, with a single model call.
+
+        Every returned item is validated on its own; items that are missing,
+        duplicated, unknown or invalid, or all of them if the whole response
+        is malformed, are classified again one by one. Cached texts are not
+        sent, and texts repeated within the batch are sent once.
+        """
+        if self.cache is None:
+            return await self._classify_batch_uncached(tweets)
+
+        keys = {tid: content_hash(text) for tid, text in tweets.items()}
+        cached = await self.cache.get_many(keys.values())
+
+        results: Dict[str, CoinTweetAnalysis | BaseException] = {}
+        representatives: Dict[str, str] = {}
+        for tid, key in keys.items():
+            if key in cached:
+                results[tid] = CoinTweetAnalysis.model_validate(cached[key])
+            else:
+                representatives.setdefault(key, tid)
+        self.cache.stats.coalesced += len(tweets) - len(results) - len(representatives)
+
+        if representatives:
+            fresh = await self._classify_batch_uncached(
+                {tid: tweets[tid] for tid in representatives.values()}
+            )
+            await self.cache.put_many(
+                {
+                    key: fresh[tid].model_dump()
+                    for key, tid in representatives.items()
+                    if not isinstance(fresh[tid], BaseException)
+                }
+            )
+            for tid, key in keys.items():
+                if tid not in results:
+                    results[tid] = fresh[representatives[key]]
+        return results
+
+    async def _classify_batch_uncached(self, tweets: Dict[str, str]) -> Dict[str, CoinTweetAnalysis | BaseException]:
+        if len(tweets) <= 1:
+            return dict(zip(tweets, await self._classify_many_uncached(tweets.values())))
+
+        if self.stats.started_at is None:
+            self.stats.started_at = time.monotonic()
+
+        lines = "\n".join(render_batch_line(tid, text) for tid, text in tweets.items())
+        results: Dict[str, CoinTweetAnalysis | BaseException] = {}
+        try:
+            response = await self._attempt_batch(BATCH_PROMPT.replace("{tweets}", lines), len(tweets))
+            for item in response.items:
+                if item.tweet_id not in tweets or item.tweet_id in results:
+                    continue
+                try:
+                    results[item.tweet_id] = CoinTweetAnalysis.model_validate(
+                        item.model_dump(exclude={"tweet_id"})
+                    )
+                except ValidationError as e:
+                    logger.warning(f"Invalid batch item for tweet {item.tweet_id}: {e}")
+        except Exception as e:
+            logger.warning(f"Batch classification of {len(tweets)} tweets failed: {e}")
+
+        self.stats.completed += len(results)
+        self.stats.finished_at = time.monotonic()
+
+        missing = [tid for tid in tweets if tid not in results]
+        if missing:
+            logger.info(f"Falling back to single classification for {len(missing)} of {len(tweets)} tweets.")
+            fallback = await self._classify_many_uncached(tweets[tid] for tid in missing)
+            results.update(zip(missing, fallback))
+        return results
+
+
+_engine: ClassificationEngine | None = None
+
+
+def get_engine() -> ClassificationEngine:
+    """Get the shared classification engine."""
+    global _engine
+    if _engine is None:
+        _engine = ClassificationEngine(
+            cache=ClassificationCache() if settings.classification_cache_enabled else None
+        )
+    return _engine
+
 
-@retry(
-    stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=1, min=1, max=10),
-)
 async def classify_tweet(tweet: str) -> CoinTweetAnalysis:
     """Classify a tweet."""
-    analysis = model_with_structured_output.invoke(PROMPT.replace("{tweet}", tweet))
-    return analysis
+    return await get_engine().classify(tweet)
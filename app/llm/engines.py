@@ -0,0 +1,95 @@
+"""Selection of the tweet classification backend."""
+
+import logging
+from pathlib import Path
+from typing import Dict
+
+from app.llm.base import TweetClassifier, classify_in_chunks
+from app.llm.classification import CoinTweetAnalysis, get_engine
+from app.llm.local_model import LocalClassifier
+from app.settings import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class HybridClassifier(TweetClassifier):
+    """Classifies with the local model and escalates low-confidence tweets to the LLM.
+
+    A tweet whose local confidence is below ``threshold`` is sent to the
+    LLM; if the LLM fails for it, the local answer is kept.
+    """
+
+    name = "hybrid"
+
+    def __init__(
+        self,
+        local: LocalClassifier,
+        llm: TweetClassifier,
+        threshold: float = settings.hybrid_confidence_threshold,
+    ):
+        self.local = local
+        self.llm = llm
+        self.threshold = threshold
+        self.batch_size = local.batch_size
+        self.answered_locally = 0
+        self.escalated = 0
+
+    async def classify_batch(self, tweets: Dict[str, str]) -> Dict[str, CoinTweetAnalysis | BaseException]:
+        predictions = await self.local.predict_async(list(tweets.values()))
+        results: Dict[str, CoinTweetAnalysis | BaseException] = {}
+        uncertain: Dict[str, str] = {}
+        for (tid, text), (analysis, confidence) in zip(tweets.items(), predictions):
+            results[tid] = analysis
+            if confidence < self.threshold:
+                uncertain[tid] = text
+
+        self.answered_locally += len(tweets) - len(uncertain)
+        self.escalated += len(uncertain)
+        if uncertain:
+            for tid, analysis in (await classify_in_chunks(self.llm, uncertain)).items():
+                if isinstance(analysis, BaseException):
+                    logger.warning(f"LLM classification failed for tweet {tid}, keeping the local answer: {analysis}")
+                    continue
+                results[tid] = analysis
+        return results
+
+    def describe(self) -> str:
+        total = self.answered_locally + self.escalated
+        share = self.escalated / total if total else 0.0
+        return (
+            f"hybrid: {self.answered_locally} answered locally, "
+            f"{self.escalated} escalated ({share:.0%}); {self.llm.describe()}"
+        )
+
+
+_classifier: TweetClassifier | None = None
+
+
+def get_classifier() -> TweetClassifier:
+    """Get the classifier selected by ``settings.classifier_backend``.
+
+    The local and hybrid backends fall back to the LLM when no trained
+    model exists at ``settings.local_model_path``.
+    """
+    global _classifier
+    if _classifier is not None:
+        return _classifier
+
+    backend = settings.classifier_backend
+    if backend not in ("llm", "local", "hybrid"):
+        raise ValueError(f"Unknown classifier backend: {backend}")
+    if backend != "llm" and not Path(settings.local_model_path).exists():
+        logger.warning(
+            f"No local model at {settings.local_model_path}, using the LLM classifier. "
+            f"Train one with `python -m app.llm.local_model`."
+        )
+        backend = "llm"
+
+    if backend == "llm":
+        _classifier = get_engine()
+    elif backend == "local":
+        _classifier = LocalClassifier.load(settings.local_model_path)
+    else:
+        _classifier = HybridClassifier(LocalClassifier.load(settings.local_model_path), get_engine())
+    return _classifier
@@ -0,0 +1,78 @@
+"""Local stand-in for the structured-output chat model."""
+
+import asyncio
+import json
+import random
+
+from app.llm.classification import BatchCoinTweetAnalysis, BatchCoinTweetAnalysisItem, CoinTweetAnalysis
+from app.llm.prefilter import PreClassifier
+
+pre_classifier = PreClassifier()
+
+
+class FakeStructuredModel:
+    """Answers classification prompts locally after a simulated latency.
+
+    Latency is drawn from a normal distribution (``latency`` ± ``jitter``
+    seconds) and ``error_rate`` of the calls raise, so the classification
+    engine can be exercised and benchmarked without network access. With
+    ``batch=True`` it answers batch prompts instead; ``per_tweet_latency``
+    is then added for every tweet in the batch.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.5,
+        jitter: float = 0.1,
+        error_rate: float = 0.0,
+        batch: bool = False,
+        per_tweet_latency: float = 0.02,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.batch = batch
+        self.per_tweet_latency = per_tweet_latency
+        self.calls = 0
+
+    @staticmethod
+    def _tweet_block(prompt: str) -> str:
+        return prompt.rsplit("```", 2)[-2] if prompt.count("```") >= 2 else prompt
+
+    @staticmethod
+    def _analyze_text(tweet: str) -> CoinTweetAnalysis:
+        tickers = pre_classifier.extract_tickers(tweet)
+        coin_name = tickers[0] if tickers else ""
+        return CoinTweetAnalysis(
+            is_speculative_coin=bool(coin_name) and coin_name not in pre_classifier.blue_chips,
+            coin_name=coin_name,
+            sentiment="neutral",
+            keywords=[],
+        )
+
+    def _analyze(self, prompt: str) -> CoinTweetAnalysis | BatchCoinTweetAnalysis:
+        block = self._tweet_block(prompt)
+        if not self.batch:
+            return self._analyze_text(block)
+        tweets = [json.loads(line) for line in block.splitlines() if line.strip()]
+        return BatchCoinTweetAnalysis(
+            items=[
+                BatchCoinTweetAnalysisItem(
+                    tweet_id=tweet["tweet_id"], **self._analyze_text(tweet["text"]).model_dump()
+                )
+                for tweet in tweets
+            ]
+        )
+
+    async def ainvoke(self, prompt: str) -> CoinTweetAnalysis | BatchCoinTweetAnalysis:
+        self.calls += 1
+        latency = random.gauss(self.latency, self.jitter)
+        if self.batch:
+            latency += self.per_tweet_latency * self._tweet_block(prompt).count("tweet_id")
+        await asyncio.sleep(max(0.0, latency))
+        if random.random() < self.error_rate:
+            raise RuntimeError("Simulated model failure")
+        return self._analyze(prompt)
+
+    def invoke(self, prompt: str) -> CoinTweetAnalysis | BatchCoinTweetAnalysis:
+        return self._analyze(prompt)
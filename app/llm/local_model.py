@@ -0,0 +1,350 @@
+"""Local CPU classifier trained on the stored classifications.
+
+Speculative-coin tweets come from coin_tweet_analysis, and tweets classified
+as not speculative from seen_tweets, which keeps their text. Whether a tweet
+is about a speculative coin comes from a logistic regression, and its
+sentiment from a multinomial one, both over hashed word unigrams and bigrams.
+The coin is the earliest non-blue-chip ticker found by the pre-classifier,
+and keywords are picked from the keyword vocabulary of the training labels.
+Train it with::
+
+    python -m app.llm.local_model --limit 200000
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import re
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.llm.base import TweetClassifier
+from app.llm.cache import normalize_text
+from app.llm.classification import CoinTweetAnalysis
+from app.llm.prefilter import Decision, PreClassifier
+from app.settings import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+SENTIMENTS = ("negative", "neutral", "positive")
+TOKEN_RE = re.compile(r"[$#]?\w+", re.UNICODE)
+KEYWORD_VOCABULARY_SIZE = 5_000
+
+# (text, is_speculative_coin, sentiment, coin_name, keywords); non-speculative examples have no sentiment
+Example = Tuple[str, bool, str | None, str, Sequence[str]]
+
+
+def _tokens(text: str) -> List[str]:
+    tokens = TOKEN_RE.findall(normalize_text(text))
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def hash_features(text: str, n_features: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the hashed feature indices of a text and their +1/-1 signs."""
+    hashes = np.fromiter(
+        (zlib.crc32(token.encode("utf-8")) for token in _tokens(text)), dtype=np.uint32
+    )
+    indices = (hashes % n_features).astype(np.int64)
+    signs = np.where(hashes >> 31, 1.0, -1.0)
+    return indices, signs
+
+
+def _stack(features: Sequence[Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Concatenates per-text features into (row, index, sign) arrays for a whole batch."""
+    if not features:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0)
+    rows = np.concatenate([np.full(len(idx), i, dtype=np.int64) for i, (idx, _) in enumerate(features)])
+    indices = np.concatenate([idx for idx, _ in features])
+    signs = np.concatenate([sign for _, sign in features])
+    return rows, indices, signs
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+def _sigmoid(logits: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-logits))
+
+
+class LocalClassifier(TweetClassifier):
+    """Hashed-feature linear classifier that scores whole batches at once."""
+
+    name = "local"
+
+    def __init__(
+        self,
+        weights: np.ndarray,
+        bias: np.ndarray,
+        speculative_weights: np.ndarray,
+        speculative_bias: float,
+        coin_counts: Dict[str, int],
+        keyword_counts: Dict[str, int],
+        batch_size: int = settings.local_model_batch_size,
+    ):
+        self.weights = weights
+        self.bias = bias
+        self.speculative_weights = speculative_weights
+        self.speculative_bias = speculative_bias
+        self.n_features = weights.shape[1]
+        self.coin_counts = coin_counts
+        self.keyword_counts = keyword_counts
+        self.batch_size = batch_size
+        self.pre_classifier = PreClassifier()
+        self.classified = 0
+
+    def _logits(self, features: Sequence[Tuple[np.ndarray, np.ndarray]]) -> np.ndarray:
+        rows, indices, signs = _stack(features)
+        n = len(features)
+        logits = np.stack(
+            [
+                np.bincount(rows, weights=self.weights[c, indices] * signs, minlength=n)
+                for c in range(len(SENTIMENTS))
+            ],
+            axis=1,
+        )
+        return logits + self.bias
+
+    def _speculative_logits(self, features: Sequence[Tuple[np.ndarray, np.ndarray]]) -> np.ndarray:
+        rows, indices, signs = _stack(features)
+        return (
+            np.bincount(rows, weights=self.speculative_weights[indices] * signs, minlength=len(features))
+            + self.speculative_bias
+        )
+
+    def _keywords(self, text: str, coin_name: str) -> List[str]:
+        found = {token for token in _tokens(text) if token in self.keyword_counts}
+        found.discard(coin_name.lower())
+        return sorted(found, key=lambda kw: -self.keyword_counts[kw])[:3]
+
+    def predict(self, texts: Sequence[str]) -> List[Tuple[CoinTweetAnalysis, float]]:
+        """Classifies ``texts`` and returns each analysis with a confidence in [0, 1]."""
+        features = [hash_features(t, self.n_features) for t in texts]
+        probabilities = _softmax(self._logits(features))
+        speculative = _sigmoid(self._speculative_logits(features))
+        predictions = []
+        for text, probs, p_speculative in zip(texts, probabilities, speculative):
+            pre = self.pre_classifier.classify(text)
+            if not pre.needs_llm:
+                # the rules alone decide tweets without a speculative coin
+                coin_name = pre.tickers[0] if pre.decision is Decision.blue_chip else ""
+                analysis = CoinTweetAnalysis(
+                    is_speculative_coin=False, coin_name=coin_name, sentiment="neutral", keywords=[]
+                )
+                predictions.append((analysis, 1.0))
+                continue
+
+            sentiment = SENTIMENTS[int(probs.argmax())]
+            if p_speculative < 0.5:
+                analysis = CoinTweetAnalysis(
+                    is_speculative_coin=False, coin_name=pre.ticker, sentiment=sentiment, keywords=[]
+                )
+                predictions.append((analysis, 1.0 - float(p_speculative)))
+                continue
+
+            # both the coin decision and the sentiment have to be right
+            confidence = float(p_speculative) * float(probs.max())
+            if pre.ticker not in self.coin_counts:
+                confidence *= 0.5
+            analysis = CoinTweetAnalysis(
+                is_speculative_coin=True,
+                coin_name=pre.ticker,
+                sentiment=sentiment,
+                keywords=self._keywords(text, pre.ticker),
+            )
+            predictions.append((analysis, confidence))
+        self.classified += len(predictions)
+        return predictions
+
+    async def predict_async(self, texts: Sequence[str]) -> List[Tuple[CoinTweetAnalysis, float]]:
+        return await asyncio.to_thread(self.predict, texts)
+
+    async def classify_batch(self, tweets: Dict[str, str]) -> Dict[str, CoinTweetAnalysis | BaseException]:
+        predictions = await self.predict_async(list(tweets.values()))
+        return {tid: analysis for tid, (analysis, _) in zip(tweets, predictions)}
+
+    def describe(self) -> str:
+        return f"local: {self.classified} classified"
+
+    @classmethod
+    def train(
+        cls,
+        examples: Iterable[Example],
+        n_features: int = settings.local_model_features,
+        epochs: int = 5,
+        learning_rate: float = 0.05,
+        l2: float = 1e-6,
+        batch_size: int = 512,
+        holdout: float = 0.1,
+        seed: int = 0,
+    ) -> "LocalClassifier":
+        """Fits both models with mini-batch SGD and builds the coin and keyword vocabularies.
+
+        Needs speculative and non-speculative examples; the sentiment model
+        only learns from the speculative ones.
+        """
+        features, speculative, labels = [], [], []
+        coin_counts: Counter = Counter()
+        keyword_counts: Counter = Counter()
+        for text, is_speculative, sentiment, coin_name, keywords in examples:
+            features.append(hash_features(text, n_features))
+            speculative.append(float(is_speculative))
+            if not is_speculative:
+                labels.append(-1)
+                continue
+            labels.append(SENTIMENTS.index(sentiment))
+            coin_counts[coin_name.upper()] += 1
+            keyword_counts.update(kw.lower() for kw in keywords)
+        n_speculative = int(sum(speculative))
+        if not n_speculative or n_speculative == len(features):
+            raise ValueError(
+                f"Need speculative and non-speculative examples, got {n_speculative} and {len(features) - n_speculative}"
+            )
+
+        rng = np.random.default_rng(seed)
+        order = rng.permutation(len(features))
+        n_holdout = int(len(order) * holdout)
+        test, train = order[:n_holdout], order[n_holdout:]
+        speculative, labels = np.asarray(speculative), np.asarray(labels)
+
+        model = cls(
+            np.zeros((len(SENTIMENTS), n_features)),
+            np.zeros(len(SENTIMENTS)),
+            np.zeros(n_features),
+            0.0,
+            dict(coin_counts),
+            dict(keyword_counts.most_common(KEYWORD_VOCABULARY_SIZE)),
+        )
+        for epoch in range(epochs):
+            rng.shuffle(train)
+            for start in range(0, len(train), batch_size):
+                batch = train[start : start + batch_size]
+                batch_features = [features[i] for i in batch]
+                rows, indices, signs = _stack(batch_features)
+
+                errors = speculative[batch] - _sigmoid(model._speculative_logits(batch_features))
+                model.speculative_weights *= 1 - learning_rate * l2
+                np.add.at(model.speculative_weights, indices, learning_rate * errors[rows] * signs)
+                model.speculative_bias += learning_rate * errors.mean()
+
+                batch_labels = labels[batch]
+                mask = batch_labels >= 0
+                if not mask.any():
+                    continue
+                targets = np.zeros((len(batch), len(SENTIMENTS)))
+                targets[mask, batch_labels[mask]] = 1.0
+                # non-speculative rows have no sentiment label and add nothing
+                errors = (targets - _softmax(model._logits(batch_features))) * mask[:, None]
+                model.weights *= 1 - learning_rate * l2
+                for c in range(len(SENTIMENTS)):
+                    np.add.at(model.weights[c], indices, learning_rate * errors[rows, c] * signs)
+                model.bias += learning_rate * errors.sum(axis=0) / mask.sum()
+
+        if len(test):
+            test_features = [features[i] for i in test]
+            predicted = model._speculative_logits(test_features) >= 0
+            logger.info(
+                f"Speculative-coin accuracy on {len(test)} held-out labels: "
+                f"{(predicted == speculative[test].astype(bool)).mean():.3f}"
+            )
+            labelled = labels[test] >= 0
+            if labelled.any():
+                predicted = model._logits(test_features).argmax(axis=1)
+                logger.info(
+                    f"Sentiment accuracy on {int(labelled.sum())} held-out labels: "
+                    f"{(predicted[labelled] == labels[test][labelled]).mean():.3f}"
+                )
+        return model
+
+    def save(self, path: str | Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(
+            path,
+            weights=self.weights,
+            bias=self.bias,
+            speculative_weights=self.speculative_weights,
+            speculative_bias=np.array(self.speculative_bias),
+            vocabulary=np.array(json.dumps({"coins": self.coin_counts, "keywords": self.keyword_counts})),
+        )
+
+    @classmethod
+    def load(cls, path: str | Path) -> "LocalClassifier":
+        with np.load(path) as data:
+            if "speculative_weights" not in data.files:
+                raise ValueError(
+                    f"The local model at {path} cannot tell non-speculative tweets apart; "
+                    f"retrain it with `python -m app.llm.local_model`"
+                )
+            vocabulary = json.loads(str(data["vocabulary"]))
+            return cls(
+                data["weights"],
+                data["bias"],
+                data["speculative_weights"],
+                float(data["speculative_bias"]),
+                vocabulary["coins"],
+                vocabulary["keywords"],
+            )
+
+
+def load_training_examples(db: Session, limit: int | None = None) -> Iterator[Example]:
+    """Streams the newest stored analyses and non-speculative tweets, up to ``limit`` of each, as training examples."""
+    from app.models import CoinTweetAnalysis as DBCoinTweetAnalysis, SeenTweet
+
+    query = (
+        db.query(
+            DBCoinTweetAnalysis.text,
+            DBCoinTweetAnalysis.sentiment,
+            DBCoinTweetAnalysis.coin_name,
+            DBCoinTweetAnalysis.keywords,
+        )
+        .order_by(DBCoinTweetAnalysis.publish_date.desc())
+        .limit(limit)
+        .yield_per(5_000)
+    )
+    for row in query:
+        yield row.text, True, row.sentiment.value, row.coin_name, row.keywords
+
+    negatives = (
+        db.query(SeenTweet.text)
+        .filter(SeenTweet.reason == "non_speculative", SeenTweet.text.isnot(None))
+        .order_by(SeenTweet.seen_at.desc())
+        .limit(limit)
+        .yield_per(5_000)
+    )
+    for row in negatives:
+        yield row.text, False, None, "", ()
+
+
+def main():
+    """Trains the local classifier from coin_tweet_analysis and seen_tweets and saves it."""
+    from app.database import get_db
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--limit", type=int, default=None, help="use only the newest N labels of each kind")
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--features", type=int, default=settings.local_model_features)
+    parser.add_argument("--output", default=settings.local_model_path)
+    args = parser.parse_args()
+
+    with get_db() as db:
+        model = LocalClassifier.train(
+            load_training_examples(db, args.limit), n_features=args.features, epochs=args.epochs
+        )
+    model.save(args.output)
+    logger.info(f"Saved local classifier to {args.output}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    main()
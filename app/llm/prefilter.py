@@ -0,0 +1,168 @@
+"""Deterministic pre-classification that keeps coin-less tweets away from the LLM."""
+
+import re
+from dataclasses import dataclass
+from enum import Enum
+from typing import Dict, Iterable, List
+
+BLUE_CHIPS = {"BTC", "ETH"}
+
+# well-known coin names mapped to their tickers; matched case-insensitively
+KNOWN_COINS: Dict[str, str] = {
+    "bitcoin": "BTC",
+    "ethereum": "ETH",
+    "solana": "SOL",
+    "ripple": "XRP",
+    "xrp": "XRP",
+    "cardano": "ADA",
+    "dogecoin": "DOGE",
+    "doge": "DOGE",
+    "shiba inu": "SHIB",
+    "shib": "SHIB",
+    "pepe": "PEPE",
+    "floki": "FLOKI",
+    "bonk": "BONK",
+    "dogwifhat": "WIF",
+    "polkadot": "DOT",
+    "avalanche": "AVAX",
+    "chainlink": "LINK",
+    "litecoin": "LTC",
+    "polygon": "POL",
+    "tron": "TRX",
+    "toncoin": "TON",
+    "sui": "SUI",
+    "aptos": "APT",
+    "arbitrum": "ARB",
+    "injective": "INJ",
+    "fartcoin": "FARTCOIN",
+    "brett": "BRETT",
+    "popcat": "POPCAT",
+    "mog": "MOG",
+    "wif": "WIF",
+    "sol": "SOL",
+    "jupiter": "JUP",
+    "jup": "JUP",
+    "pengu": "PENGU",
+    "kaspa": "KAS",
+    "inj": "INJ",
+    "arb": "ARB",
+    "aave": "AAVE",
+    "ethena": "ENA",
+    "pendle": "PENDLE",
+    "jasmy": "JASMY",
+    "fantom": "FTM",
+    "notcoin": "NOT",
+    "bome": "BOME",
+    "pnut": "PNUT",
+    "neiro": "NEIRO",
+    "ponke": "PONKE",
+    "turbo": "TURBO",
+    "spx6900": "SPX",
+    "virtuals": "VIRTUAL",
+    "ai16z": "AI16Z",
+    "moodeng": "MOODENG",
+    "fwog": "FWOG",
+    "hyperliquid": "HYPE",
+    "ondo": "ONDO",
+    "zerebro": "ZEREBRO",
+    "giga": "GIGA",
+    "mew": "MEW",
+    "michi": "MICHI",
+    "chillguy": "CHILLGUY",
+}
+
+CASHTAG_RE = re.compile(r"\$([A-Za-z][A-Za-z0-9]{1,9})\b")
+# hashtags only count when written like a ticker, so #memecoin or #crypto do not
+HASHTAG_TICKER_RE = re.compile(r"#([A-Z][A-Z0-9]{1,9})\b")
+PAIR_RE = re.compile(r"\b([A-Z][A-Z0-9]{1,9})/(?:USDT|USDC|USD|BTC|ETH|SOL)\b")
+
+# hashtags written like tickers that name no coin
+NON_COIN_HASHTAGS = {
+    "AIRDROP", "ALTCOINS", "ALTSEASON", "BULLRUN", "CRYPTO", "DEFI", "DYOR",
+    "GEM", "HODL", "MEMECOIN", "MEMECOINS", "NFA", "NFT", "WAGMI", "WEB3",
+}
+# tokens that may name a coin the rules do not know; tweets with one go to the LLM
+CANDIDATE_RES = (
+    re.compile(r"#(\w+)"),
+    # a capitalized or uppercase word inside a sentence, e.g. "aped into Moodeng"
+    re.compile(r"(?<=[\w,] )([A-Z][A-Za-z0-9]{1,14})\b"),
+    # prices and moves: "to 5$", "$0.002", "100x", "up 30%"
+    re.compile(r"(\d\$|\$\d|\b\d+x\b|\b(?:up|down) \d+(?:\.\d+)?%)", re.IGNORECASE),
+    # words used about one token: "pnut holders", "neiro dev", "arb unlock"
+    re.compile(r"\b(holders|devs?|mcap|market cap|unlock|listing|ath|chart|ca|contract)\b", re.IGNORECASE),
+    # contract addresses, EVM and Solana
+    re.compile(r"\b(0x[0-9a-fA-F]{40}|[1-9A-HJ-NP-Za-km-z]{32,44})\b"),
+)
+
+
+class Decision(str, Enum):
+    """Outcome of pre-classification."""
+
+    no_coin = "no_coin"
+    blue_chip = "blue_chip"
+    llm = "llm"
+
+
+@dataclass
+class PreClassification:
+    """Pre-classification of one tweet.
+
+    Attributes:
+        decision: Whether the tweet is dropped (no_coin, blue_chip) or sent to the LLM
+        ticker: Earliest non-blue-chip ticker found, if any
+        tickers: Every ticker found, in order of appearance
+    """
+
+    decision: Decision
+    ticker: str | None = None
+    tickers: tuple[str, ...] = ()
+
+    @property
+    def needs_llm(self) -> bool:
+        return self.decision is Decision.llm
+
+
+class PreClassifier:
+    """Finds coin mentions with compiled regexes and a coin-name dictionary.
+
+    Tweets that only mention blue chips, and tweets without any ticker,
+    known coin name or other token that could name a coin, can never be
+    speculative-coin tweets, so they are decided here; everything else is
+    left to the LLM.
+    """
+
+    def __init__(self, known_coins: Dict[str, str] = KNOWN_COINS, blue_chips: Iterable[str] = BLUE_CHIPS):
+        self.known_coins = {name.lower(): ticker for name, ticker in known_coins.items()}
+        self.blue_chips = set(blue_chips)
+        names = sorted(self.known_coins, key=len, reverse=True)
+        self._names_re = re.compile(
+            r"\b(" + "|".join(re.escape(name) for name in names) + r")\b", re.IGNORECASE
+        )
+
+    def extract_tickers(self, text: str) -> List[str]:
+        """Returns the uppercase tickers mentioned in ``text``, earliest first."""
+        found = []
+        for regex in (CASHTAG_RE, HASHTAG_TICKER_RE, PAIR_RE):
+            found.extend((m.start(), m.group(1).upper()) for m in regex.finditer(text))
+        found.extend(
+            (m.start(), self.known_coins[m.group(1).lower()]) for m in self._names_re.finditer(text)
+        )
+        return list(dict.fromkeys(ticker for _, ticker in sorted(found)))
+
+    @staticmethod
+    def has_candidate(text: str) -> bool:
+        """Whether ``text`` has a token that could name a coin the rules do not know."""
+        for regex in CANDIDATE_RES:
+            if any(m.group(1).upper() not in NON_COIN_HASHTAGS for m in regex.finditer(text)):
+                return True
+        return False
+
+    def classify(self, text: str) -> PreClassification:
+        tickers = self.extract_tickers(text)
+        if not tickers:
+            return PreClassification(Decision.llm if self.has_candidate(text) else Decision.no_coin)
+        candidates = [ticker for ticker in tickers if ticker not in self.blue_chips]
+        if not candidates:
+            return PreClassification(Decision.blue_chip, tickers=tuple(tickers))
+        return PreClassification(Decision.llm, ticker=candidates[0], tickers=tuple(tickers))
+
@@ -0,0 +1,47 @@
+"""Token-bucket rate limiting for LLM requests."""
+
+import asyncio
+import time
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at ``rate`` tokens per second.
+
+    ``acquire(n)`` waits until ``n`` tokens are available. Requests larger
+    than the bucket are clamped to its capacity so they can still proceed.
+    """
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self, amount: float = 1):
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                await asyncio.sleep((amount - self._tokens) / self.rate)
+
+
+class RateLimiter:
+    """Enforces requests-per-minute and tokens-per-minute budgets together."""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute / 60)
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60)
+
+    async def acquire(self, tokens: int):
+        """Waits for one request slot and ``tokens`` tokens."""
+        await self.requests.acquire(1)
+        await self.tokens.acquire(tokens)
@@ -1,8 +1,8 @@
 import uuid
 import enum
-from sqlalchemy import Column, String, DateTime, Text, Enum, Index, case, Float
-from sqlalchemy.dialects.postgresql import UUID as PGUUID, ARRAY
-from sqlalchemy.sql import func
+from sqlalchemy import Column, String, DateTime, Text, Enum, Index, case, Float, BigInteger, Integer, SmallInteger, Boolean, text
+from sqlalchemy.dialects.postgresql import UUID as PGUUID, ARRAY, JSONB
+from sqlalchemy.sql import func, true
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy import and_
 from app.database import Base
@@ -22,24 +22,34 @@ class CoinTweetAnalysis(Base):
 
     id = Column(PGUUID(as_uuid=True), primary_key=True, index=True, default=uuid.uuid4)
     
-    twitter_id = Column(String(255), nullable=False, index=True, unique=True)
+    # unique together with publish_date, see the partitioning below
+    twitter_id = Column(String(255), nullable=False)
 
     # frequently‑filtered columns
     coin_name = Column(String(255), nullable=False, index=True)
-    publish_date = Column(DateTime(timezone=True), nullable=False, index=True)
+    # partition key, so it is part of the primary key and of every unique index
+    publish_date = Column(DateTime(timezone=True), primary_key=True, nullable=False, index=True)
 
     # model outputs
     sentiment = Column(Enum(SentimentEnum, name="sentiment_enum"), nullable=False, index=True)
     keywords = Column(ARRAY(String), nullable=False)  # list[str]
     text = Column(Text, nullable=False)
     author = Column(String(255), nullable=True)
+    author_id = Column(String(255), nullable=True, index=True)
+
+    # number of near-duplicate tweets that shared this tweet's classification
+    cluster_size = Column(Integer, nullable=False, server_default="1")
 
     # audit metadata
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
-    # composite index optimised for (coin_name, publish_date) look‑ups
+    # composite index optimised for (coin_name, publish_date) look‑ups, id included
+    # for the keyset pagination of a coin's tweets;
+    # the table is range-partitioned by day, see app/partitions.py
     __table_args__ = (
-        Index("ix_coin_date", "coin_name", "publish_date"),
+        Index("ix_coin_date_id", "coin_name", "publish_date", "id"),
+        Index("ix_coin_tweet_analysis_twitter_id", "twitter_id", "publish_date", unique=True),
+        {"postgresql_partition_by": "RANGE (publish_date)"},
     )
 
     @hybrid_property
@@ -107,6 +117,113 @@ class CoinTweetAnalysis(Base):
         )
 
 
+class _CoinSentimentRollup:
+    """Per-coin sentiment counts of one time bucket, kept in step with coin_tweet_analysis by triggers."""
+
+    coin_name = Column(String(255), primary_key=True)
+    # start of the bucket, truncated in UTC
+    bucket = Column(DateTime(timezone=True), primary_key=True)
+
+    mentions = Column(Integer, nullable=False, server_default="0")
+    positive = Column(Integer, nullable=False, server_default="0")
+    negative = Column(Integer, nullable=False, server_default="0")
+    neutral = Column(Integer, nullable=False, server_default="0")
+    # sum of CoinTweetAnalysis.weight: positive - negative
+    weight_sum = Column(Integer, nullable=False, server_default="0")
+
+
+class CoinSentimentMinute(_CoinSentimentRollup, Base):
+    __tablename__ = "coin_sentiment_minute"
+    __table_args__ = (Index("ix_coin_sentiment_minute_bucket", "bucket"),)
+
+
+class CoinSentimentHour(_CoinSentimentRollup, Base):
+    __tablename__ = "coin_sentiment_hour"
+    __table_args__ = (Index("ix_coin_sentiment_hour_bucket", "bucket"),)
+
+
+class _CoinAuthorSketch:
+    """One HyperLogLog register of a coin's authors in one time bucket; absent registers are zero."""
+
+    coin_name = Column(String(255), primary_key=True)
+    bucket = Column(DateTime(timezone=True), primary_key=True)
+    register = Column(SmallInteger, primary_key=True)
+    # position of the first set bit of the author hashes mapped to this register
+    rho = Column(SmallInteger, nullable=False)
+
+
+class CoinAuthorSketchMinute(_CoinAuthorSketch, Base):
+    __tablename__ = "coin_author_sketch_minute"
+
+
+class CoinAuthorSketchHour(_CoinAuthorSketch, Base):
+    __tablename__ = "coin_author_sketch_hour"
+
+
+class CoinKeywordHour(Base):
+    """Per-coin keyword counts of one hour, kept in step with coin_tweet_analysis by triggers."""
+    __tablename__ = "coin_keyword_hour"
+
+    coin_name = Column(String(255), primary_key=True)
+    bucket = Column(DateTime(timezone=True), primary_key=True)
+    keyword = Column(Text, primary_key=True)
+    count = Column(Integer, nullable=False)
+
+    __table_args__ = (Index("ix_coin_keyword_hour_bucket", "bucket"),)
+
+
+class TrendingSketch(Base):
+    """Shared time-decayed heavy-hitter summary of one kind of item, e.g. coins or keywords."""
+    __tablename__ = "trending_sketches"
+
+    kind = Column(String(32), primary_key=True)
+    # counters are stored relative to the landmark: a score at time t is count * 2^-((t - landmark) / half_life)
+    landmark = Column(DateTime(timezone=True), nullable=False)
+    half_life_seconds = Column(Float, nullable=False)
+    # largest count trimmed off so far; an item missing from the counters had at most this much
+    floor = Column(Float, nullable=False, default=0.0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+
+class TrendingCounter(Base):
+    """One Space-Saving counter of a trending sketch."""
+    __tablename__ = "trending_counters"
+
+    kind = Column(String(32), primary_key=True)
+    item = Column(Text, primary_key=True)
+    count = Column(Float, nullable=False)
+    # how far ``count`` may be off, from counters taken over or trimmed off
+    error = Column(Float, nullable=False)
+
+    __table_args__ = (Index("ix_trending_counters_kind_count", "kind", "count"),)
+
+
+class SpikeEvent(Base):
+    """A burst of mentions of a coin, detected as the tweets were stored."""
+    __tablename__ = "spike_events"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    coin_name = Column(String(255), nullable=False, index=True)
+    # start of the bucket the mentions were counted in
+    bucket = Column(DateTime(timezone=True), nullable=False)
+    mentions = Column(Integer, nullable=False)
+    mention_z = Column(Float, nullable=False)
+    # mean sentiment of the bucket, in [-1, 1]
+    sentiment = Column(Float, nullable=False)
+    sentiment_z = Column(Float, nullable=False)
+
+    # publish date of the tweet that crossed the threshold
+    published_at = Column(DateTime(timezone=True), nullable=False)
+    detected_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    consumed_at = Column(DateTime(timezone=True), nullable=True)
+    # trade opened on the spike, if any
+    trade_id = Column(PGUUID(as_uuid=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_spike_events_pending", "id", postgresql_where=text("consumed_at IS NULL")),
+    )
+
+
 class Trade(Base):
     """Stores a trade."""
     __tablename__ = "trades"
@@ -149,6 +266,8 @@ class Trade(Base):
     
     __table_args__ = (
         Index("ix_trade_coin_date", "coin_name", "buy_date"),
+        # keyset pagination of the trades, newest first
+        Index("ix_trades_buy_date_id", "buy_date", "id"),
     )
     
     def __repr__(self) -> str:  # pragma: no cover – convenience only
@@ -157,3 +276,152 @@ class Trade(Base):
             f"buy_price='{self.buy_price}' sell_price='{self.sell_price}' "
             f"buy_date='{self.buy_date:%Y-%m-%d}' sell_date='{self.sell_date:%Y-%m-%d}'>"
         )
+
+
+class CollectionState(Base):
+    """Stores incremental collection progress for a single search query."""
+    __tablename__ = "collection_state"
+
+    query = Column(Text, primary_key=True)
+
+    # high-water mark: newest tweet already collected for this query
+    newest_tweet_id = Column(BigInteger, nullable=True)
+    newest_tweet_at = Column(DateTime(timezone=True), nullable=True)
+
+    # unfinished backfill: resume from last_cursor until backfill_until_id is reached
+    last_cursor = Column(Text, nullable=True)
+    backfill_until_id = Column(BigInteger, nullable=True)
+
+    # disabled queries keep their progress but are not polled
+    enabled = Column(Boolean, nullable=False, default=True, server_default=true())
+
+    # polling budget: EWMA of useful tweets per request and accumulated page credit
+    yield_rate = Column(Float, nullable=True)
+    poll_credit = Column(Float, nullable=False, default=0.0, server_default="0")
+    requests_total = Column(BigInteger, nullable=False, default=0, server_default="0")
+    useful_total = Column(BigInteger, nullable=False, default=0, server_default="0")
+    # share of the totals already folded into yield_rate
+    requests_counted = Column(BigInteger, nullable=False, default=0, server_default="0")
+    useful_counted = Column(BigInteger, nullable=False, default=0, server_default="0")
+    last_polled_at = Column(DateTime(timezone=True), nullable=True)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self) -> str:  # pragma: no cover – convenience only
+        return (
+            f"<CollectionState query='{self.query}' enabled={self.enabled} yield_rate={self.yield_rate} "
+            f"newest_tweet_id={self.newest_tweet_id} "
+            f"last_cursor={'set' if self.last_cursor else None}>"
+        )
+
+
+class JobRun(Base):
+    """Stores the outcome of one scheduled job run."""
+    __tablename__ = "job_runs"
+
+    id = Column(PGUUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    job = Column(String(64), nullable=False)
+    scheduled_at = Column(DateTime(timezone=True), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=False)
+    duration_seconds = Column(Float, nullable=False)
+    status = Column(String(16), nullable=False)  # success, failed or timeout
+    error = Column(Text, nullable=True)
+    # ticks skipped because the previous run was still going
+    skipped_ticks = Column(Integer, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (Index("ix_job_runs_job_started_at", "job", "started_at"),)
+
+
+class WorkItem(Base):
+    """Stores a unit of ingestion work, claimed by workers with ``FOR UPDATE SKIP LOCKED``."""
+    __tablename__ = "work_items"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    kind = Column(String(32), nullable=False)
+    payload = Column(JSONB, nullable=False)
+    # lower runs first, so queued classification drains before more fetching
+    priority = Column(Integer, nullable=False, default=0, server_default="0")
+    # at most one pending or running item per key
+    dedup_key = Column(Text, nullable=True)
+
+    status = Column(String(16), nullable=False, default="pending", server_default="pending")
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    available_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    locked_by = Column(String(255), nullable=True)
+    locked_until = Column(DateTime(timezone=True), nullable=True)
+    error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_work_items_claim", "status", "priority", "id"),
+        Index(
+            "ux_work_items_dedup_key",
+            "dedup_key",
+            unique=True,
+            postgresql_where=text("status IN ('pending', 'running')"),
+        ),
+    )
+
+
+class ScheduledJob(Base):
+    """Stores the last tick a singleton job was claimed for, so it runs once per tick across replicas."""
+    __tablename__ = "scheduled_jobs"
+
+    job = Column(String(64), primary_key=True)
+    last_tick_at = Column(DateTime(timezone=True), nullable=False)
+    claimed_by = Column(String(255), nullable=True)
+
+
+class SeenTweet(Base):
+    """Stores ids of tweets that were processed but not kept in coin_tweet_analysis."""
+    __tablename__ = "seen_tweets"
+
+    twitter_id = Column(String(255), primary_key=True)
+    reason = Column(String(32), nullable=False)
+    seen_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    # text of non-speculative tweets, the negative examples of the local classifier
+    text = Column(Text, nullable=True)
+
+    def __repr__(self) -> str:  # pragma: no cover – convenience only
+        return f"<SeenTweet twitter_id='{self.twitter_id}' reason='{self.reason}'>"
+
+
+class ClassificationCacheEntry(Base):
+    """Caches an LLM classification by the hash of the normalized tweet text."""
+    __tablename__ = "classification_cache"
+
+    content_hash = Column(String(64), primary_key=True)
+    analysis = Column(JSONB, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+
+    def __repr__(self) -> str:  # pragma: no cover – convenience only
+        return f"<ClassificationCacheEntry content_hash='{self.content_hash}'>"
+
+
+class Author(Base):
+    """Stores the latest profile stats and account score of a tweet author."""
+    __tablename__ = "authors"
+
+    twitter_user_id = Column(String(255), primary_key=True)
+    screen_name = Column(String(255), nullable=True, index=True)
+
+    # profile stats the score is computed from
+    account_created_at = Column(DateTime(timezone=True), nullable=False)
+    is_verified = Column(Boolean, nullable=False)
+    is_blue_verified = Column(Boolean, nullable=False)
+    followers_count = Column(Integer, nullable=False)
+    friends_count = Column(Integer, nullable=False)
+    statuses_count = Column(Integer, nullable=False)
+    has_photo = Column(Boolean, nullable=False)
+    has_banner = Column(Boolean, nullable=False)
+
+    # account score in [0, 10]; below 4 the author is treated as a spammer
+    score = Column(Float, nullable=False)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    def __repr__(self) -> str:  # pragma: no cover – convenience only
+        return f"<Author twitter_user_id='{self.twitter_user_id}' screen_name='{self.screen_name}' score={self.score}>"
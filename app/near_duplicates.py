@@ -0,0 +1,131 @@
+"""SimHash near-duplicate detection for short texts.
+
+Bot copies of a tweet mostly differ in what surrounds it: emoji, hashtags,
+links and punctuation tacked on at either end. Fingerprints are therefore
+taken over the words of the tweet only, with those runs stripped from both
+ends, and a ticker-like hashtag that only appears in them separates its
+tweet into its own group, so "to the moon #PEPE" is never merged with
+"to the moon #BONK".
+"""
+
+import hashlib
+import re
+from collections import deque
+from typing import Any, Deque, Dict, List, Tuple
+
+from app.llm.cache import normalize_text
+from app.llm.prefilter import CASHTAG_RE, HASHTAG_TICKER_RE, NON_COIN_HASHTAGS
+from app.settings import get_settings
+
+settings = get_settings()
+
+FINGERPRINT_BITS = 64
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+# leading and trailing runs of hashtags, emoji, punctuation and whitespace
+EDGE_RE = re.compile(r"^(?:#\w+|[^\w\s]|\s)+|(?:#\w+|[^\w\s]|\s)+$", re.UNICODE)
+
+
+def _token_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def shingle_words(text: str) -> List[str]:
+    """Returns the words of the normalized text, without the hashtags, emoji and punctuation around it."""
+    return WORD_RE.findall(EDGE_RE.sub("", normalize_text(text)))
+
+
+def simhash(text: str) -> int:
+    """Returns the 64-bit SimHash of the words of a text.
+
+    Features are word unigrams and bigrams, so copies that only differ in
+    emoji, links, punctuation or hashtags at either end get the same
+    fingerprint, and a changed word moves it a few bits.
+    """
+    tokens = shingle_words(text)
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    if not features:
+        return 0
+
+    weights = [0] * FINGERPRINT_BITS
+    for feature in features:
+        h = _token_hash(feature)
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def cashtag_group(text: str) -> str:
+    """Returns the sorted cashtags of a text, with the ticker-like hashtags that are not among its words.
+
+    Texts are only compared within the same group, so a shill template
+    reused for different coins is never collapsed into one cluster.
+    """
+    tags = {tag.upper() for tag in CASHTAG_RE.findall(text)}
+    words = set(shingle_words(text))
+    tags.update(
+        tag for tag in HASHTAG_TICKER_RE.findall(text) if tag not in NON_COIN_HASHTAGS and tag.lower() not in words
+    )
+    return ",".join(sorted(tags))
+
+
+class NearDuplicateIndex:
+    """Finds fingerprints within ``max_distance`` bits among the last ``window`` entries.
+
+    The fingerprint is split into ``max_distance + 1`` bands; two fingerprints
+    that differ in at most ``max_distance`` bits share at least one band
+    exactly, so only entries in matching band buckets need to be compared.
+    """
+
+    def __init__(
+        self,
+        max_distance: int = settings.near_duplicate_max_distance,
+        window: int = settings.near_duplicate_window,
+    ):
+        self.max_distance = max_distance
+        self.window = window
+        self._bands = max_distance + 1
+        self._band_bits = -(-FINGERPRINT_BITS // self._bands)
+        self._buckets: Dict[Tuple[str, int, int], List[Tuple[int, Any]]] = {}
+        self._entries: Deque[Tuple[str, int, Any]] = deque()
+
+    def _band_keys(self, fingerprint: int, group: str):
+        mask = (1 << self._band_bits) - 1
+        for band in range(self._bands):
+            yield group, band, fingerprint >> (band * self._band_bits) & mask
+
+    def find(self, fingerprint: int, group: str = "") -> Any | None:
+        """Returns the value of the closest entry within ``max_distance``, if any."""
+        best = None
+        best_distance = self.max_distance + 1
+        for key in self._band_keys(fingerprint, group):
+            for other, value in self._buckets.get(key, ()):
+                distance = hamming_distance(fingerprint, other)
+                if distance < best_distance:
+                    best, best_distance = value, distance
+        return best
+
+    def add(self, fingerprint: int, value: Any, group: str = ""):
+        for key in self._band_keys(fingerprint, group):
+            self._buckets.setdefault(key, []).append((fingerprint, value))
+        self._entries.append((group, fingerprint, value))
+        while len(self._entries) > self.window:
+            self._evict(*self._entries.popleft())
+
+    def _evict(self, group: str, fingerprint: int, value: Any):
+        for key in self._band_keys(fingerprint, group):
+            bucket = self._buckets.get(key)
+            if not bucket:
+                continue
+            for i, (other, other_value) in enumerate(bucket):
+                if other == fingerprint and other_value is value:
+                    del bucket[i]
+                    break
+            if not bucket:
+                del self._buckets[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
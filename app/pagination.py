@@ -0,0 +1,31 @@
+"""Opaque cursors for keyset pagination.
+
+A cursor holds the sort key of the last row of a page, ``(date, id)``; the
+next page is read from the index right after it, so a deep page costs as
+much as the first and rows stored in between do not shift the pages.
+Clients only pass it back, as the ``cursor`` query parameter.
+"""
+
+import base64
+import uuid
+from datetime import datetime
+from typing import Tuple
+
+import orjson
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+Cursor = Tuple[datetime, uuid.UUID]
+
+
+def encode_cursor(at: datetime, row_id: uuid.UUID) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps([at.isoformat(), str(row_id)])).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    """Returns the sort key held by a cursor; raises ``ValueError`` if it is malformed."""
+    try:
+        at, row_id = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(at), uuid.UUID(row_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
@@ -0,0 +1,195 @@
+"""Daily range partitions of coin_tweet_analysis.
+
+Every UTC day of tweets lives in its own partition
+(``coin_tweet_analysis_p20261018``), so queries on the last hours only
+touch the newest partitions and each index stays the size of one day.
+``ensure`` creates the partitions of the coming days ahead of time; a
+tweet whose day has no partition is rejected by the insert. ``archive``
+detaches the partitions past the retention window, exports each to a
+compressed CSV file and drops it. Detaching deletes nothing as far as the
+triggers are concerned, so the rollups, author sketches and keyword
+counts keep the archived days.
+
+Both run with the maintenance job; by hand::
+
+    python -m app.partitions list
+    python -m app.partitions ensure --days 14
+    python -m app.partitions archive --retention-days 30
+
+An exported day is restored by creating its partition again and loading
+the file with ``COPY coin_tweet_analysis FROM STDIN WITH (FORMAT csv, HEADER)``.
+"""
+
+import argparse
+import logging
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from pathlib import Path
+from typing import List
+
+import zstandard
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.settings import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+PARENT = "coin_tweet_analysis"
+NAME_RE = re.compile(rf"^{PARENT}_p(\d{{8}})$")
+ARCHIVE_EXTENSION = ".csv.zst"
+
+
+@dataclass
+class Partition:
+    name: str
+    day: date
+    # False for a partition detached by an archive run that did not finish
+    attached: bool
+
+
+def partition_name(day: date) -> str:
+    return f"{PARENT}_p{day:%Y%m%d}"
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time(), timezone.utc)
+
+
+def _today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def list_partitions(db: Session) -> List[Partition]:
+    """Returns the day partitions, attached or not, oldest first."""
+    rows = db.execute(
+        text(
+            """
+            SELECT c.relname, i.inhrelid IS NOT NULL AS attached
+            FROM pg_class c
+            LEFT JOIN pg_inherits i ON i.inhrelid = c.oid AND i.inhparent = CAST(:parent AS regclass)
+            WHERE c.relkind = 'r' AND c.relnamespace = CAST(current_schema() AS regnamespace)
+              AND c.relname ~ :pattern
+            """
+        ),
+        {"parent": PARENT, "pattern": NAME_RE.pattern},
+    )
+    partitions = [
+        Partition(name, datetime.strptime(NAME_RE.match(name).group(1), "%Y%m%d").date(), attached)
+        for name, attached in rows
+    ]
+    return sorted(partitions, key=lambda partition: partition.day)
+
+
+def ensure_partitions(db: Session, first: date, last: date) -> List[str]:
+    """Creates the missing partitions of the days ``first`` to ``last`` and commits; returns the new ones."""
+    existing = {partition.day for partition in list_partitions(db)}
+    created = []
+    day = first
+    while day <= last:
+        if day not in existing:
+            name = partition_name(day)
+            try:
+                # creating a partition locks the whole table; give up rather than stall the inserts
+                db.execute(text("SET LOCAL lock_timeout = '5s'"))
+                db.execute(
+                    text(
+                        f"CREATE TABLE {name} PARTITION OF {PARENT} FOR VALUES "
+                        f"FROM ('{_day_start(day).isoformat()}') TO ('{_day_start(day + timedelta(days=1)).isoformat()}')"
+                    )
+                )
+                db.commit()
+            except Exception as e:
+                logger.error(f"Failed to create partition {name}: {e}")
+                db.rollback()
+                break
+            created.append(name)
+        day += timedelta(days=1)
+    if created:
+        logger.info(f"Created partitions {', '.join(created)}.")
+    return created
+
+
+def export_partition(db: Session, name: str, directory: Path) -> Path:
+    """Writes a partition to ``<directory>/<name>.csv.zst``; the file only appears once it is complete."""
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{name}{ARCHIVE_EXTENSION}"
+    partial = path.with_name(path.name + ".partial")
+    with db.connection().connection.driver_connection.cursor() as cursor, partial.open("wb") as file:
+        with zstandard.ZstdCompressor().stream_writer(file, closefd=False) as writer:
+            cursor.copy_expert(f"COPY {name} TO STDOUT WITH (FORMAT csv, HEADER)", writer)
+    partial.replace(path)
+    return path
+
+
+def archive_partitions(
+    db: Session,
+    retention_days: int = settings.partition_retention_days,
+    directory: str | Path = settings.partition_archive_dir,
+) -> List[Path]:
+    """Detaches, exports and drops the partitions older than ``retention_days``; returns the written files.
+
+    Each step commits, so a run that fails half-way is finished by the next
+    one: a detached partition is found again and exported once more.
+    """
+    if retention_days <= 0:
+        return []
+    cutoff = _today() - timedelta(days=retention_days)
+    written = []
+    for partition in list_partitions(db):
+        if partition.day >= cutoff:
+            break
+        try:
+            if partition.attached:
+                db.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {partition.name}"))
+                db.commit()
+            path = export_partition(db, partition.name, Path(directory))
+            db.execute(text(f"DROP TABLE {partition.name}"))
+            db.commit()
+        except Exception as e:
+            logger.error(f"Failed to archive partition {partition.name}: {e}")
+            db.rollback()
+            break
+        written.append(path)
+        logger.info(f"Archived partition {partition.name} to {path}.")
+    return written
+
+
+def maintain_partitions(db: Session):
+    """Creates the coming days' partitions and archives the expired ones."""
+    today = _today()
+    # yesterday too, in case maintenance did not run for a while
+    ensure_partitions(db, today - timedelta(days=1), today + timedelta(days=settings.partition_premake_days))
+    archive_partitions(db)
+
+
+def main():
+    """Manages the daily partitions of coin_tweet_analysis."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="list the partitions")
+    ensure = subparsers.add_parser("ensure", help="create the partitions of today and the coming days")
+    ensure.add_argument("--days", type=int, default=settings.partition_premake_days)
+    archive = subparsers.add_parser("archive", help="export and drop the partitions past the retention window")
+    archive.add_argument("--retention-days", type=int, default=settings.partition_retention_days)
+    archive.add_argument("--dir", default=settings.partition_archive_dir)
+    args = parser.parse_args()
+
+    with get_db() as db:
+        if args.command == "list":
+            for partition in list_partitions(db):
+                print(f"{partition.name}  {partition.day}  {'attached' if partition.attached else 'detached'}")
+        elif args.command == "ensure":
+            today = _today()
+            ensure_partitions(db, today, today + timedelta(days=args.days))
+        elif args.command == "archive":
+            for path in archive_partitions(db, args.retention_days, args.dir):
+                print(path)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    main()
@@ -0,0 +1,219 @@
+"""Asyncio stage pipeline with bounded queues between stages."""
+
+import asyncio
+import inspect
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, Awaitable, Callable, Iterable, List
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+@dataclass
+class StageStats:
+    """Counters collected for a single pipeline stage."""
+
+    name: str
+    workers: int
+    received: int = 0
+    emitted: int = 0
+    errors: int = 0
+    busy_seconds: float = 0.0
+    first_emit_at: float | None = None
+    # duration of every handler call; a batch stage records one per batch
+    latencies: List[float] = field(default_factory=list, repr=False)
+
+    def latency_percentile(self, q: float) -> float:
+        """Returns the ``q`` quantile (0-1) of the handler call durations."""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def summary(self, started_at: float) -> str:
+        first = (
+            f", first output after {self.first_emit_at - started_at:.2f}s"
+            if self.first_emit_at is not None
+            else ""
+        )
+        return (
+            f"{self.name} x{self.workers}: in={self.received} out={self.emitted} "
+            f"errors={self.errors} busy={self.busy_seconds:.2f}s{first}"
+        )
+
+
+@dataclass
+class _Stage:
+    name: str
+    handler: Callable[[Any], Any]
+    workers: int = 1
+    batch_size: int | Callable[[], int] | None = None
+    flush_interval: float | None = None
+    stats: StageStats = field(init=False)
+
+    def __post_init__(self):
+        self.stats = StageStats(name=self.name, workers=self.workers)
+
+
+async def _call(handler: Callable[[Any], Any], arg: Any) -> Any:
+    result = handler(arg)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+class Pipeline:
+    """Chain of stages connected by bounded queues.
+
+    Each stage runs its own pool of workers. A full queue blocks the stage
+    that feeds it (backpressure), so memory stays bounded by the queue sizes
+    no matter how many items the source produces, and one slow item only
+    occupies one worker instead of stalling a whole batch.
+
+    Item stages map one item to one output; returning ``None`` drops it.
+    Batch stages receive lists of up to ``batch_size`` items, flushed early
+    after ``flush_interval`` seconds, and return an iterable of outputs.
+    ``batch_size`` may be a callable, read before every batch, so a stage can
+    follow a size that is tuned while the pipeline runs.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._stages: List[_Stage] = []
+
+    def add_stage(
+        self, name: str, handler: Callable[[Any], Any | Awaitable[Any]], workers: int = 1
+    ) -> "Pipeline":
+        self._stages.append(_Stage(name=name, handler=handler, workers=workers))
+        return self
+
+    def add_batch_stage(
+        self,
+        name: str,
+        handler: Callable[[List[Any]], Iterable[Any] | Awaitable[Iterable[Any]]],
+        batch_size: int | Callable[[], int],
+        flush_interval: float = 1.0,
+        workers: int = 1,
+    ) -> "Pipeline":
+        self._stages.append(
+            _Stage(
+                name=name,
+                handler=handler,
+                workers=workers,
+                batch_size=batch_size,
+                flush_interval=flush_interval,
+            )
+        )
+        return self
+
+    @property
+    def stats(self) -> List[StageStats]:
+        return [stage.stats for stage in self._stages]
+
+    async def run(self, source: AsyncIterable[Any]) -> List[StageStats]:
+        """Feeds ``source`` through every stage and waits for the pipeline to drain."""
+        started_at = time.monotonic()
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in range(len(self._stages) + 1)]
+
+        runners = [
+            asyncio.create_task(self._run_stage(stage, queues[i], queues[i + 1]))
+            for i, stage in enumerate(self._stages)
+        ]
+        sink = asyncio.create_task(self._drain(queues[-1]))
+
+        feeder = asyncio.create_task(self._feed(source, queues[0]))
+        try:
+            await asyncio.gather(feeder, *runners, sink)
+        finally:
+            for task in (feeder, *runners, sink):
+                task.cancel()
+
+        for stage in self._stages:
+            logger.info(f"Pipeline stage {stage.stats.summary(started_at)}")
+        logger.info(f"Pipeline finished in {time.monotonic() - started_at:.2f}s")
+        return self.stats
+
+    async def _run_stage(self, stage: _Stage, inbox: asyncio.Queue, outbox: asyncio.Queue):
+        worker = self._batch_worker if stage.batch_size else self._item_worker
+        workers = [worker(stage, inbox, outbox) for _ in range(stage.workers)]
+        await asyncio.gather(*workers)
+        await outbox.put(_DONE)
+
+    async def _emit(self, stage: _Stage, outbox: asyncio.Queue, item: Any):
+        if stage.stats.first_emit_at is None:
+            stage.stats.first_emit_at = time.monotonic()
+        stage.stats.emitted += 1
+        await outbox.put(item)
+
+    async def _item_worker(self, stage: _Stage, inbox: asyncio.Queue, outbox: asyncio.Queue):
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                # let sibling workers see the end of the stream too
+                await inbox.put(_DONE)
+                return
+            stage.stats.received += 1
+            started = time.monotonic()
+            try:
+                result = await _call(stage.handler, item)
+            except Exception as e:
+                stage.stats.errors += 1
+                logger.error(f"Pipeline stage '{stage.name}' failed: {e}")
+                continue
+            finally:
+                elapsed = time.monotonic() - started
+                stage.stats.busy_seconds += elapsed
+                stage.stats.latencies.append(elapsed)
+            if result is not None:
+                await self._emit(stage, outbox, result)
+
+    async def _batch_worker(self, stage: _Stage, inbox: asyncio.Queue, outbox: asyncio.Queue):
+        done = False
+        while not done:
+            batch = []
+            deadline = None
+            batch_size = stage.batch_size() if callable(stage.batch_size) else stage.batch_size
+            while len(batch) < batch_size:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    item = await asyncio.wait_for(inbox.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _DONE:
+                    await inbox.put(_DONE)
+                    done = True
+                    break
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + stage.flush_interval
+            if not batch:
+                continue
+
+            stage.stats.received += len(batch)
+            started = time.monotonic()
+            try:
+                results = await _call(stage.handler, batch)
+            except Exception as e:
+                stage.stats.errors += 1
+                logger.error(f"Pipeline stage '{stage.name}' failed on {len(batch)} items: {e}")
+                continue
+            finally:
+                elapsed = time.monotonic() - started
+                stage.stats.busy_seconds += elapsed
+                stage.stats.latencies.append(elapsed)
+            for result in results or ():
+                await self._emit(stage, outbox, result)
+
+    @staticmethod
+    async def _feed(source: AsyncIterable[Any], queue: asyncio.Queue):
+        async for item in source:
+            await queue.put(item)
+        await queue.put(_DONE)
+
+    @staticmethod
+    async def _drain(queue: asyncio.Queue):
+        while await queue.get() is not _DONE:
+            pass
@@ -0,0 +1,193 @@
+"""Yield-adaptive sharing of the ScrapeStorm search budget between queries.
+
+Each query's yield is an EWMA of the useful (new, non-spam, speculative)
+tweets it brought per search request. Every run adds ``budget`` page
+credits, split between the enabled queries: ``exploration`` of it evenly,
+the rest in proportion to yield. A query is polled for as many pages as it
+has whole credits, so busy queries page deeper every run while dead ones
+save up and are polled every few runs. Queries without a yield yet are
+assumed to be as good as the best one, so new keywords are tried at once.
+
+Queries are managed at runtime and picked up by the next run::
+
+    python -m app.query_scheduler list
+    python -m app.query_scheduler add '"pump.fun" lang:en min_faves:5'
+    python -m app.query_scheduler disable '"pump.fun" lang:en min_faves:5'
+"""
+
+import argparse
+import logging
+import math
+import threading
+from collections import Counter
+from typing import Dict, Iterable
+
+from app.database import get_db
+from app.models import CollectionState
+from app.settings import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class QueryYields:
+    """Attributes the useful tweets of a run to the query that found them first."""
+
+    def __init__(self):
+        self._sources: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.useful: Counter = Counter()
+        # queries some of whose tweets were not classified or not stored
+        self.failed: set = set()
+
+    def add_source(self, tweet_id: str, query: str):
+        with self._lock:
+            self._sources.setdefault(str(tweet_id), query)
+
+    def count_useful(self, tweet_ids: Iterable[str]):
+        with self._lock:
+            for tweet_id in tweet_ids:
+                query = self._sources.pop(str(tweet_id), None)
+                if query is not None:
+                    self.useful[query] += 1
+
+    def fail(self, tweet_ids: Iterable[str]):
+        """Marks the queries of tweets that could not be classified or stored."""
+        with self._lock:
+            for tweet_id in tweet_ids:
+                query = self._sources.pop(str(tweet_id), None)
+                if query is not None:
+                    self.failed.add(query)
+
+    def forget(self, tweet_ids: Iterable[str]):
+        """Drops the sources of tweets that are done, so a long-lived worker does not grow."""
+        with self._lock:
+            for tweet_id in tweet_ids:
+                self._sources.pop(str(tweet_id), None)
+
+    def drain(self) -> Counter:
+        """Returns the useful tweets counted so far and starts counting afresh."""
+        with self._lock:
+            useful, self.useful = self.useful, Counter()
+        return useful
+
+
+class QueryScheduler:
+    """Plans how many search pages each query gets and learns from the results."""
+
+    def __init__(
+        self,
+        budget: int = settings.search_request_budget,
+        max_pages: int = settings.collection_max_pages,
+        exploration: float = settings.search_exploration_share,
+        smoothing: float = settings.search_yield_smoothing,
+    ):
+        self.budget = budget
+        self.max_pages = max_pages
+        self.exploration = exploration
+        self.smoothing = smoothing
+
+    def shares(self, states: Dict[str, CollectionState]) -> Dict[str, float]:
+        """Returns each query's share of the budget; the shares add up to 1."""
+        if not states:
+            return {}
+        known = [s.yield_rate for s in states.values() if s.yield_rate is not None]
+        optimistic = max(known, default=1.0)
+        # a small floor keeps all-dead queries from dividing by zero
+        rates = {q: max(s.yield_rate if s.yield_rate is not None else optimistic, 1e-3) for q, s in states.items()}
+        total = sum(rates.values())
+        even = self.exploration / len(states)
+        return {q: even + (1 - self.exploration) * rate / total for q, rate in rates.items()}
+
+    def plan(self, states: Dict[str, CollectionState]) -> Dict[str, int]:
+        """Adds this run's credits and returns the pages per query, leaving out queries not due."""
+        plan = {}
+        for query, share in self.shares(states).items():
+            state = states[query]
+            # capped, so a long-idle query cannot burst far past max_pages
+            state.poll_credit = min(self.max_pages, (state.poll_credit or 0.0) + self.budget * share)
+            pages = min(self.max_pages, math.floor(state.poll_credit))
+            if pages:
+                plan[query] = pages
+        logger.info(
+            f"Polling {len(plan)} of {len(states)} queries with {sum(plan.values())} pages: "
+            + ", ".join(f"'{q}': {p}" for q, p in plan.items())
+        )
+        return plan
+
+    def update_yields(self, states: Dict[str, CollectionState]):
+        """Folds the requests and useful tweets counted since the last update into each query's yield.
+
+        The requests are also charged to the query's credit. Works from the
+        running totals, so it does not matter which process fetched or
+        classified the tweets.
+        """
+        for query, state in states.items():
+            requests = (state.requests_total or 0) - (state.requests_counted or 0)
+            if requests <= 0:
+                continue
+            useful = (state.useful_total or 0) - (state.useful_counted or 0)
+            rate = useful / requests
+            state.poll_credit = max(0.0, (state.poll_credit or 0.0) - requests)
+            state.yield_rate = (
+                rate if state.yield_rate is None else self.smoothing * rate + (1 - self.smoothing) * state.yield_rate
+            )
+            state.requests_counted = state.requests_total
+            state.useful_counted = state.useful_total
+            logger.info(
+                f"Query '{query}': {useful} useful tweets from {requests} requests, yield now {state.yield_rate:.2f}"
+            )
+
+    def record(self, states: Dict[str, CollectionState], yields: QueryYields):
+        """Adds a run's useful tweets to the queries' totals and updates their yields."""
+        for query, useful in yields.drain().items():
+            if query in states:
+                states[query].useful_total = (states[query].useful_total or 0) + useful
+        self.update_yields(states)
+
+
+def _list_queries():
+    with get_db() as db:
+        states = db.query(CollectionState).order_by(CollectionState.enabled.desc(), CollectionState.query).all()
+        enabled = {s.query: s for s in states if s.enabled}
+        shares = QueryScheduler().shares(enabled)
+        for state in states:
+            yield_rate = "-" if state.yield_rate is None else f"{state.yield_rate:.2f}"
+            share = f"{shares[state.query]:.0%}" if state.query in shares else "off"
+            print(
+                f"{share:>4}  yield {yield_rate:>6}  {state.useful_total or 0:>7} useful / "
+                f"{state.requests_total or 0:>6} requests  {state.query}"
+            )
+
+
+def _set_enabled(query: str, enabled: bool, create: bool = False):
+    with get_db() as db:
+        state = db.get(CollectionState, query)
+        if state is None:
+            if not create:
+                raise SystemExit(f"Unknown query: {query}")
+            state = CollectionState(query=query)
+            db.add(state)
+        state.enabled = enabled
+        db.commit()
+    logger.info(f"Query '{query}' {'enabled' if enabled else 'disabled'}.")
+
+
+def main():
+    """Manages the search queries polled by the tweet analysis."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="show queries with their yield and budget share")
+    for command in ("add", "enable", "disable"):
+        commands.add_parser(command).add_argument("query")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        _list_queries()
+    else:
+        _set_enabled(args.query, enabled=args.command != "disable", create=args.command == "add")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    main()
@@ -0,0 +1,104 @@
+"""Replays archived ScrapeStorm responses through the ingestion pipeline.
+
+No request is sent to ScrapeStorm, and collection state is left untouched.
+Use ``CLASSIFIER_BACKEND=local`` to keep the whole run off the network::
+
+    python -m app.replay --since 2026-10-01 --reclassify
+    python -m app.replay --dry-run
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import AsyncIterator
+
+from app.archive import PayloadArchive
+from app.database import get_db
+from app.llm.classification import get_engine
+from app.settings import get_settings
+from app.tweet_analysis import author_reputation, build_pipeline, log_run_summary, reset_run_stats
+
+settings = get_settings()
+
+
+async def archived_entries(archive: PayloadArchive, since: datetime | None, until: datetime | None) -> AsyncIterator[dict]:
+    """Streams the raw tweets of archived responses, skipping ids already yielded."""
+    yielded_ids = set()
+    for record in archive.read(since, until):
+        for entry in record["response"]["data"]["entries"]:
+            if entry["id"] in yielded_ids:
+                continue
+            yielded_ids.add(entry["id"])
+            yield entry
+        # reading is synchronous; let the pipeline stages run between pages
+        await asyncio.sleep(0)
+    logging.info(f"Replayed {len(yielded_ids)} archived tweets.")
+
+
+def _timestamp(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+async def replay(
+    since: datetime | None = None,
+    until: datetime | None = None,
+    archive_dir: str = settings.archive_dir,
+    reclassify: bool = False,
+    dry_run: bool = False,
+):
+    """Runs the archived tweets fetched in [since, until] through the pipeline.
+
+    By default only tweets that were never stored are processed. With
+    ``reclassify`` every tweet is classified again, past the classification
+    cache, and stored analyses are replaced; with ``dry_run`` nothing is
+    written, not even to the cache.
+    """
+    archive = PayloadArchive(archive_dir)
+    with get_db() as db:
+        author_reputation.warm(db)
+
+    reset_run_stats()
+    cache = get_engine().cache
+    if cache is not None:
+        cache.reads, cache.writes = not reclassify, not dry_run
+    started = time.monotonic()
+    pipeline = build_pipeline(
+        skip_existing=not reclassify,
+        persist=not dry_run,
+        overwrite=reclassify,
+        persist_batch_size=settings.replay_persist_batch_size,
+    )
+    try:
+        stats = await pipeline.run(archived_entries(archive, since, until))
+    finally:
+        if cache is not None:
+            cache.reads, cache.writes = True, True
+    elapsed = time.monotonic() - started
+    received = stats[0].received if stats else 0
+    logging.info(f"Replay: {received} tweets in {elapsed:.2f}s ({received / elapsed if elapsed else 0:,.0f} tweets/sec)")
+    log_run_summary()
+
+    if not dry_run:
+        with get_db() as db:
+            author_reputation.flush(db)
+
+
+def main():
+    """Replays archived ScrapeStorm responses through the ingestion pipeline."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--since", type=_timestamp, help="ISO timestamp, UTC unless given")
+    parser.add_argument("--until", type=_timestamp, help="ISO timestamp, UTC unless given")
+    parser.add_argument("--archive-dir", default=settings.archive_dir)
+    parser.add_argument(
+        "--reclassify", action="store_true", help="classify stored tweets again and replace their analyses"
+    )
+    parser.add_argument("--dry-run", action="store_true", help="run every stage but persist nothing")
+    args = parser.parse_args()
+    asyncio.run(replay(args.since, args.until, args.archive_dir, args.reclassify, args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""Per-coin sentiment rollups and author sketches by minute and by hour.
+
+``coin_sentiment_minute`` and ``coin_sentiment_hour`` are kept in step with
+``coin_tweet_analysis`` by statement-level triggers, so every insert,
+overwrite or delete updates them in its own transaction. Reads aggregate a
+handful of buckets instead of every tweet of the window.
+
+Distinct authors do not add up across buckets, so each bucket also keeps a
+HyperLogLog sketch of its authors (``coin_author_sketch_*``, one row per
+non-zero register). Sketches of any window merge by taking the largest
+register values, which gives distinct-author counts within about 3%.
+
+Keyword counts are kept per hour only (``coin_keyword_hour``); the partial
+hours at the edges of a window are counted from the raw rows, which the
+``(coin_name, publish_date)`` index keeps cheap.
+
+``backfill`` rebuilds all of them from the raw rows, e.g. after restoring a dump::
+
+    python -m app.rollups --since 2026-10-01
+"""
+
+import argparse
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import Float, Select, case, func, literal_column, select, text, union_all
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models import (
+    CoinAuthorSketchHour,
+    CoinAuthorSketchMinute,
+    CoinKeywordHour,
+    CoinSentimentHour,
+    CoinSentimentMinute,
+    CoinTweetAnalysis,
+)
+
+logger = logging.getLogger(__name__)
+
+ROLLUPS = {"minute": CoinSentimentMinute, "hour": CoinSentimentHour}
+SKETCHES = {"minute": CoinAuthorSketchMinute, "hour": CoinAuthorSketchHour}
+
+# must match author_hll_register() in the database
+HLL_REGISTERS = 2**10
+HLL_ALPHA = 0.7213 / (1 + 1.079 / HLL_REGISTERS)
+
+
+def _floor(at: datetime, unit: str) -> datetime:
+    at = at.astimezone(timezone.utc)
+    return at.replace(second=0, microsecond=0) if unit == "minute" else at.replace(minute=0, second=0, microsecond=0)
+
+
+def _window_select(minute, hour, columns, start: datetime, end: datetime | None) -> Select:
+    """Selects ``columns`` of the minute and hour buckets covering [start, end] to the minute.
+
+    Minute buckets cover the partial hours at the edges of the window and
+    hour buckets the full hours in between, so a day takes about 24 + 120
+    buckets per coin.
+    """
+    end = end or datetime.now(timezone.utc)
+    head_end = _floor(start, "hour") + timedelta(hours=1)
+    tail_start = _floor(end, "hour")
+    if head_end > tail_start:
+        # the window lies within one or two partial hours
+        return select(*columns(minute)).where(minute.bucket >= _floor(start, "minute"), minute.bucket <= end)
+    minutes = select(*columns(minute)).where(
+        ((minute.bucket >= _floor(start, "minute")) & (minute.bucket < head_end))
+        | ((minute.bucket >= tail_start) & (minute.bucket <= end))
+    )
+    hours = select(*columns(hour)).where(hour.bucket >= head_end, hour.bucket < tail_start)
+    return union_all(minutes, hours)
+
+
+def window_rollups(start: datetime, end: datetime | None = None) -> Select:
+    """Selects the sentiment rollup rows covering [start, end]."""
+    return _window_select(
+        CoinSentimentMinute,
+        CoinSentimentHour,
+        lambda table: (
+            table.coin_name,
+            table.bucket,
+            table.mentions,
+            table.positive,
+            table.negative,
+            table.neutral,
+            table.weight_sum,
+        ),
+        start,
+        end,
+    )
+
+
+def window_keyword_counts(start: datetime, end: datetime | None = None) -> Select:
+    """Selects (coin_name, keyword, count) rows covering [start, end]; sum ``count`` per keyword."""
+    end = end or datetime.now(timezone.utc)
+    head_end = _floor(start, "hour") + timedelta(hours=1)
+    tail_start = _floor(end, "hour")
+
+    def raw(condition) -> Select:
+        return select(
+            CoinTweetAnalysis.coin_name,
+            func.unnest(CoinTweetAnalysis.keywords).label("keyword"),
+            literal_column("1").label("count"),
+        ).where(condition)
+
+    if head_end > tail_start:
+        # the window lies within one or two partial hours
+        return raw(CoinTweetAnalysis.publish_date.between(start, end))
+    edges = raw(
+        ((CoinTweetAnalysis.publish_date >= start) & (CoinTweetAnalysis.publish_date < head_end))
+        | ((CoinTweetAnalysis.publish_date >= tail_start) & (CoinTweetAnalysis.publish_date <= end))
+    )
+    hours = select(CoinKeywordHour.coin_name, CoinKeywordHour.keyword, CoinKeywordHour.count).where(
+        CoinKeywordHour.bucket >= head_end, CoinKeywordHour.bucket < tail_start
+    )
+    return union_all(edges, hours)
+
+
+def window_author_estimates(start: datetime, end: datetime | None = None) -> Select:
+    """Selects (coin_name, authors), the estimated distinct authors of each coin in [start, end]."""
+    registers = _window_select(
+        CoinAuthorSketchMinute,
+        CoinAuthorSketchHour,
+        lambda table: (table.coin_name, table.register, table.rho),
+        start,
+        end,
+    ).subquery()
+    merged = (
+        select(registers.c.coin_name, registers.c.register, func.max(registers.c.rho).label("rho"))
+        .group_by(registers.c.coin_name, registers.c.register)
+        .subquery()
+    )
+    zeros = HLL_REGISTERS - func.count()
+    # zero registers add 2^0 each to the harmonic sum
+    raw = HLL_ALPHA * HLL_REGISTERS**2 / (func.sum(func.power(2.0, -merged.c.rho)) + zeros)
+    estimate = case(
+        # small-range correction: linear counting while registers are still empty
+        ((raw <= 2.5 * HLL_REGISTERS) & (zeros > 0), HLL_REGISTERS * func.ln(HLL_REGISTERS / zeros.cast(Float))),
+        else_=raw,
+    )
+    return select(merged.c.coin_name, func.round(estimate).label("authors")).group_by(merged.c.coin_name)
+
+
+def backfill(db: Session, since: datetime | None = None, until: datetime | None = None):
+    """Rebuilds the rollups, author sketches and keyword counts of [since, until] from coin_tweet_analysis and commits.
+
+    Writes to coin_tweet_analysis are blocked meanwhile, so no trigger
+    update falls between the delete and the rebuild. ``since`` defaults to
+    the oldest stored tweet, so the days already archived keep their rollups.
+    """
+    db.execute(text("LOCK TABLE coin_tweet_analysis IN SHARE MODE"))
+    if since is None:
+        since = db.execute(select(func.min(CoinTweetAnalysis.publish_date))).scalar()
+        if since is None:
+            db.commit()
+            return
+    for unit, table in ROLLUPS.items():
+        conditions, params = [], {"unit": unit}
+        if since is not None:
+            conditions.append("publish_date >= :since")
+            params["since"] = _floor(since, unit)
+        if until is not None:
+            conditions.append("publish_date < :until")
+            params["until"] = _floor(until, unit) + (timedelta(minutes=1) if unit == "minute" else timedelta(hours=1))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        bucket_where = where.replace("publish_date", "bucket")
+
+        deleted = db.execute(text(f"DELETE FROM {table.__tablename__} {bucket_where}"), params).rowcount
+        inserted = db.execute(
+            text(
+                f"""
+                INSERT INTO {table.__tablename__} (coin_name, bucket, mentions, positive, negative, neutral, weight_sum)
+                SELECT coin_name,
+                       date_trunc(:unit, publish_date, 'UTC'),
+                       count(*),
+                       count(*) FILTER (WHERE sentiment = 'positive'),
+                       count(*) FILTER (WHERE sentiment = 'negative'),
+                       count(*) FILTER (WHERE sentiment = 'neutral'),
+                       count(*) FILTER (WHERE sentiment = 'positive') - count(*) FILTER (WHERE sentiment = 'negative')
+                FROM coin_tweet_analysis
+                {where}
+                GROUP BY 1, 2
+                """
+            ),
+            params,
+        ).rowcount
+        logger.info(f"Rebuilt {table.__tablename__}: {deleted} buckets replaced by {inserted}.")
+
+        sketch = SKETCHES[unit].__tablename__
+        db.execute(text(f"DELETE FROM {sketch} {bucket_where}"), params)
+        registers = db.execute(
+            text(
+                f"""
+                INSERT INTO {sketch} (coin_name, bucket, register, rho)
+                SELECT coin_name, date_trunc(:unit, publish_date, 'UTC'), r.register, max(r.rho)
+                FROM coin_tweet_analysis, LATERAL author_hll_register(author) AS r
+                {where + " AND" if where else "WHERE"} author IS NOT NULL
+                GROUP BY 1, 2, 3
+                """
+            ),
+            params,
+        ).rowcount
+        logger.info(f"Rebuilt {sketch}: {registers} registers.")
+
+    conditions, params = [], {}
+    if since is not None:
+        conditions.append("publish_date >= :since")
+        params["since"] = _floor(since, "hour")
+    if until is not None:
+        conditions.append("publish_date < :until")
+        params["until"] = _floor(until, "hour") + timedelta(hours=1)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    db.execute(text(f"DELETE FROM coin_keyword_hour {where.replace('publish_date', 'bucket')}"), params)
+    keywords = db.execute(
+        text(
+            f"""
+            INSERT INTO coin_keyword_hour (coin_name, bucket, keyword, count)
+            SELECT coin_name, date_trunc('hour', publish_date, 'UTC'), keyword, count(*)
+            FROM coin_tweet_analysis, unnest(keywords) AS keyword
+            {where}
+            GROUP BY 1, 2, 3
+            """
+        ),
+        params,
+    ).rowcount
+    logger.info(f"Rebuilt coin_keyword_hour: {keywords} keyword counts.")
+    db.commit()
+
+
+def _timestamp(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def main():
+    """Rebuilds the per-coin rollups, author sketches and keyword counts from the stored tweet analyses."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--since", type=_timestamp, help="ISO timestamp, UTC unless given; default: oldest stored tweet")
+    parser.add_argument("--until", type=_timestamp, help="ISO timestamp, UTC unless given; default: all")
+    args = parser.parse_args()
+    with get_db() as db:
+        backfill(db, args.since, args.until)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    main()
@@ -1,24 +1,77 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from typing import List
 from datetime import datetime, timedelta, timezone
-from . import crud, schemas
+from . import crud, schemas, trending
+from .pagination import NEXT_CURSOR_HEADER, Cursor, decode_cursor, encode_cursor
 from .database import get_session
 
 router = APIRouter()
 
+
+def _decode_cursor(cursor: str | None) -> Cursor | None:
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("/tokens/top", response_model=List[schemas.TokenScore])
 def get_top_tokens(
     limit: int = Query(10, ge=1, le=100),
     time_range: str = Query("day", regex="^(hour|3hr|6hr|12hr|day)$"),
+    weighted: bool = Query(False, description="Weight tweets by their author's account score"),
+    exact_authors: bool = Query(False, description="Count distinct authors exactly instead of estimating them"),
     db: Session = Depends(get_session),
 ):
     """
     Get top N tokens by sentiment score for the specified time range (hour, 3hr, 6hr, 12hr, day).
     """
-    tokens = crud.get_tokens_by_score(db, time_range=time_range, limit=limit)
+    tokens = crud.get_tokens_by_score(
+        db, time_range=time_range, limit=limit, weighted=weighted, exact_authors=exact_authors
+    )
     return tokens
 
+@router.get("/tokens/authors", response_model=List[schemas.AuthorCount])
+def get_distinct_authors(
+    start: datetime = Query(..., description="Window start, ISO timestamp"),
+    end: datetime | None = Query(None, description="Window end, ISO timestamp; default: now"),
+    coins: List[str] | None = Query(None),
+    exact: bool = Query(False, description="Count exactly instead of estimating from the author sketches"),
+    db: Session = Depends(get_session),
+):
+    """
+    Get the number of distinct authors per token in an arbitrary time window.
+    """
+    return crud.get_distinct_authors(db, start=start, end=end, coins=coins, exact=exact)
+
+@router.get("/keywords/top", response_model=List[schemas.KeywordCount])
+def get_top_keywords(
+    limit: int = Query(10, ge=1, le=100),
+    time_range: str = Query("day", regex="^(hour|3hr|6hr|12hr|day)$"),
+    coin_name: str | None = Query(None, description="Only count keywords of this token"),
+    db: Session = Depends(get_session),
+):
+    """
+    Get the most frequent keywords for the specified time range (hour, 3hr, 6hr, 12hr, day), across all tokens.
+    """
+    return crud.get_top_keywords(db, time_range=time_range, limit=limit, coin_name=coin_name)
+
+@router.get("/trending", response_model=schemas.Trending)
+def get_trending(
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_session),
+):
+    """
+    Get the currently trending tokens and keywords, scored by time-decayed mentions.
+    """
+    return {
+        "coins": crud.get_trending(db, kind=trending.COIN, limit=limit),
+        "keywords": crud.get_trending(db, kind=trending.KEYWORD, limit=limit),
+    }
+
 @router.get("/tokens/{coin_name}/info", response_model=schemas.TokenAggregateInfo)
 def get_token_info(
     coin_name: str,
@@ -36,16 +89,21 @@ def get_token_info(
 @router.get("/tokens/{coin_name}/tweets", response_model=List[schemas.Tweet])
 def get_latest_tweets(
     coin_name: str,
+    response: Response,
     skip: int = 0,
     limit: int = 5,
+    cursor: str | None = Query(None, description="X-Next-Cursor header of the previous page; replaces skip"),
     db: Session = Depends(get_session),
 ):
     """
     Get the most recent tweets for a given token, with pagination support.
+    A full page comes with an X-Next-Cursor header to fetch the next one.
     """
     tweets = crud.get_latest_tweets_by_coin(
-        db, coin_name=coin_name, skip=skip, limit=limit
+        db, coin_name=coin_name, skip=skip, limit=limit, after=_decode_cursor(cursor)
     )
+    if tweets and len(tweets) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(tweets[-1].publish_date, tweets[-1].id)
     return tweets
 
 @router.get("/tokens/{coin_name}/sentiment/hourly", response_model=List[schemas.HourlySentiment])
@@ -89,13 +147,44 @@ def get_hourly_sentiment(
 
 @router.get("/trades", response_model=List[schemas.Trade])
 def get_trades(
+    response: Response,
     is_closed: bool | None = Query(None),
     time_range: str = Query("day", regex="^(hour|3hr|6hr|12hr|day)$"),
     limit: int = Query(10, ge=1, le=100),
     skip: int = Query(0, ge=0),
+    cursor: str | None = Query(None, description="X-Next-Cursor header of the previous page; replaces skip"),
     db: Session = Depends(get_session),
 ):
     """
     Get all trades.
+    A full page comes with an X-Next-Cursor header to fetch the next one.
+    """
+    trades = crud.get_trades(
+        db, limit=limit, skip=skip, is_closed=is_closed, time_range=time_range, after=_decode_cursor(cursor)
+    )
+    if len(trades) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(trades[-1].buy_date, trades[-1].id)
+    return trades
+
+@router.get("/spikes", response_model=List[schemas.SpikeEvent])
+def get_spike_events(
+    coin_name: str | None = Query(None),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_session),
+):
+    """
+    Get the most recent mention spikes, newest first, with their detection and trade entry latencies.
+    """
+    return crud.get_spike_events(db, coin_name=coin_name, limit=limit)
+
+@router.get("/jobs/runs", response_model=List[schemas.JobRun])
+def get_job_runs(
+    job: str | None = Query(None),
+    status: str | None = Query(None, regex="^(success|failed|timeout)$"),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_session),
+):
+    """
+    Get the most recent scheduled job runs, newest first.
     """
-    return crud.get_trades(db, limit=limit, skip=skip, is_closed=is_closed, time_range=time_range)
+    return crud.get_job_runs(db, job=job, status=status, limit=limit)
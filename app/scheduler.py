@@ -1,26 +1,193 @@
+"""Runs the periodic jobs, each on its own fixed-rate schedule.
+
+Ticks are aligned to the wall clock (multiples of the interval), not to the
+end of the previous run, so run time never adds drift. A run that outlasts
+its interval skips the ticks it overlapped instead of queueing them, and a
+run that outlasts its deadline is cancelled. Every run is recorded in
+``job_runs``.
+
+Singleton jobs may be scheduled by any number of replicas: each tick is
+claimed in ``scheduled_jobs`` by exactly one of them, which then runs the
+job under an advisory lock, so a slow run on one replica never overlaps
+the next tick on another.
+"""
+
 import asyncio
 import logging
+import math
+import os
+import socket
 import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List
 
+from app.database import get_db
+from app.models import JobRun
+from app.settings import get_settings
+from app.work_queue import AdvisoryLock, claim_tick
+from app.trading_simulation import follow_spikes, main as run_trading_simulation
 from app.tweet_analysis import main as run_tweet_analysis
-from app.trading_simulation import main as run_trading_simulation
+
+settings = get_settings()
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-async def main_loop():
-    """Runs the tweet analysis script in a loop every 10 minutes."""
-    while True:
-        logging.info("Scheduler: Starting tweet analysis run...")
+
+@dataclass
+class Job:
+    """A coroutine function run every ``interval`` seconds, cancelled after ``deadline`` seconds.
+
+    A ``singleton`` job runs once per tick across all replicas.
+    """
+
+    name: str
+    func: Callable[[], Awaitable[Any]]
+    interval: float
+    deadline: float | None = None
+    singleton: bool = False
+
+
+def record_job_run(run: JobRun):
+    """Saves a job run; a database outage must not stop the scheduler."""
+    try:
+        with get_db() as db:
+            db.add(run)
+            db.commit()
+    except Exception as e:
+        logging.error(f"Scheduler: could not record run of '{run.job}': {e}")
+
+
+class Scheduler:
+    """Runs registered jobs concurrently, each on its own fixed-rate schedule."""
+
+    def __init__(self, replica_id: str | None = None):
+        self.jobs: Dict[str, Job] = {}
+        self.replica_id = replica_id or f"{socket.gethostname()}:{os.getpid()}"
+
+    def add_job(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[Any]],
+        interval: float,
+        deadline: float | None = None,
+        singleton: bool = False,
+    ):
+        if name in self.jobs:
+            raise ValueError(f"Job '{name}' is already registered")
+        self.jobs[name] = Job(name, func, interval, deadline, singleton)
+
+    async def run_job(self, job: Job, scheduled_at: datetime, skipped_ticks: int = 0) -> JobRun | None:
+        """Runs ``job`` once within its deadline and records the outcome.
+
+        Returns None if the job is a singleton and this replica did not get the tick.
+        """
+        if not job.singleton:
+            return await self._run_and_record(job, scheduled_at, skipped_ticks)
         try:
-            await run_tweet_analysis()
-            await run_trading_simulation()
-            logging.info("Scheduler: Tweet analysis run finished successfully.")
+            claimed = await asyncio.to_thread(self._claim_tick, job, scheduled_at)
         except Exception as e:
-            logging.error(f"Scheduler: An error occurred during tweet analysis: {e}")
-        
-        logging.info("Scheduler: Waiting for 10 minutes before the next run...")
-        await asyncio.sleep(600)  # 600 seconds = 10 minutes
+            logging.error(f"Scheduler: could not claim '{job.name}' tick {scheduled_at}: {e}")
+            return None
+        if not claimed:
+            return None
+        lock = AdvisoryLock(f"job:{job.name}")
+        if not await asyncio.to_thread(lock.acquire):
+            logging.warning(f"Scheduler: '{job.name}' is still running on another replica, skipping this tick")
+            return None
+        try:
+            return await self._run_and_record(job, scheduled_at, skipped_ticks)
+        finally:
+            await asyncio.to_thread(lock.release)
+
+    def _claim_tick(self, job: Job, scheduled_at: datetime) -> bool:
+        with get_db() as db:
+            return claim_tick(db, job.name, scheduled_at, self.replica_id)
+
+    async def _run_and_record(self, job: Job, scheduled_at: datetime, skipped_ticks: int) -> JobRun:
+        started_at = datetime.now(timezone.utc)
+        started = time.monotonic()
+        status, error = "success", None
+        logging.info(f"Scheduler: starting '{job.name}'")
+        try:
+            await asyncio.wait_for(job.func(), timeout=job.deadline)
+        except asyncio.TimeoutError:
+            status, error = "timeout", f"Cancelled after the {job.deadline}s deadline"
+        except Exception as e:
+            status, error = "failed", f"{type(e).__name__}: {e}"
+        duration = time.monotonic() - started
+
+        if status == "success":
+            logging.info(f"Scheduler: '{job.name}' finished in {duration:.1f}s")
+        else:
+            logging.error(f"Scheduler: '{job.name}' {status} after {duration:.1f}s: {error}")
+        run = JobRun(
+            job=job.name,
+            scheduled_at=scheduled_at,
+            started_at=started_at,
+            finished_at=started_at + timedelta(seconds=duration),
+            duration_seconds=duration,
+            status=status,
+            error=error,
+            skipped_ticks=skipped_ticks,
+        )
+        await asyncio.to_thread(record_job_run, run)
+        return run
+
+    async def _run_forever(self, job: Job):
+        loop = asyncio.get_running_loop()
+        # tick 0 is the current wall-clock period, so replicas agree on tick times
+        epoch_ts = math.floor(time.time() / job.interval) * job.interval
+        epoch, epoch_at = loop.time() - (time.time() - epoch_ts), datetime.fromtimestamp(epoch_ts, timezone.utc)
+        tick, skipped = 0, 0
+        while True:
+            await asyncio.sleep(max(0.0, epoch + tick * job.interval - loop.time()))
+            await self.run_job(job, epoch_at + timedelta(seconds=tick * job.interval), skipped)
+            # the next tick that has not started yet; ticks overlapped by this run are skipped
+            next_tick = max(tick + 1, math.floor((loop.time() - epoch) / job.interval) + 1)
+            skipped = next_tick - tick - 1
+            if skipped:
+                logging.warning(f"Scheduler: '{job.name}' overran its interval, skipping {skipped} ticks")
+            tick = next_tick
+
+    async def run_forever(self):
+        """Runs every job until cancelled."""
+        logging.info(
+            "Scheduler: running "
+            + ", ".join(f"'{job.name}' every {job.interval:g}s" for job in self.jobs.values())
+        )
+        tasks: List[asyncio.Task] = [asyncio.create_task(self._run_forever(job)) for job in self.jobs.values()]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+def build_scheduler() -> Scheduler:
+    scheduler = Scheduler()
+    scheduler.add_job(
+        "ingest",
+        run_tweet_analysis,
+        settings.scheduler_ingest_interval,
+        settings.scheduler_ingest_deadline,
+        singleton=True,
+    )
+    scheduler.add_job(
+        "trading",
+        run_trading_simulation,
+        settings.scheduler_trading_interval,
+        settings.scheduler_trading_deadline,
+        singleton=True,
+    )
+    return scheduler
+
+
+async def run():
+    # trades are opened as spikes are announced, between the trading ticks
+    await asyncio.gather(build_scheduler().run_forever(), follow_spikes())
+
 
 if __name__ == "__main__":
     logging.info("Scheduler service started.")
-    asyncio.run(main_loop())
+    asyncio.run(run())
@@ -67,4 +67,51 @@ class Trade(BaseModel):
     profit_percent: Optional[float]
 
     model_config = ConfigDict(from_attributes=True)
-    
\ No newline at end of file
+
+
+class JobRun(BaseModel):
+    job: str
+    scheduled_at: datetime
+    started_at: datetime
+    duration_seconds: float
+    status: str
+    error: str | None
+    skipped_ticks: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class TrendingItem(BaseModel):
+    item: str
+    score: float
+    error: float
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class Trending(BaseModel):
+    coins: List[TrendingItem]
+    keywords: List[TrendingItem]
+
+
+class SpikeEvent(BaseModel):
+    id: int
+    coin_name: str
+    bucket: datetime
+    mentions: int
+    mention_z: float
+    sentiment: float
+    sentiment_z: float
+    published_at: datetime
+    detected_at: datetime
+    consumed_at: Optional[datetime] = None
+    trade_id: Optional[uuid.UUID] = None
+    detection_latency_seconds: float
+    entry_latency_seconds: Optional[float] = None
+
+
+class AuthorCount(BaseModel):
+    coin_name: str
+    authors: int
+
+    model_config = ConfigDict(from_attributes=True)
@@ -8,7 +8,105 @@ class Settings(BaseSettings):
 
     scrapestorm_api_key: str
     scrapestorm_base_url: str
+    scrapestorm_connection_limit: int = 100
+    scrapestorm_connection_limit_per_host: int = 10
+    scrapestorm_dns_cache_ttl: int = 300
+    scrapestorm_keepalive_timeout: float = 30.0
+    scrapestorm_max_concurrency: int = 8
+    collection_max_pages: int = 5
+    search_request_budget: int = 20  # search requests per run, shared by the enabled queries
+    search_exploration_share: float = 0.2
+    search_yield_smoothing: float = 0.3
+    seen_tweets_retention_days: int = 7
+
+    pipeline_queue_size: int = 100
+    pipeline_parse_workers: int = 1
+    pipeline_parse_batch_size: int = 100
+    parse_strict: bool = False
+    pipeline_filter_workers: int = 1
+    pipeline_classify_workers: int = 10
+    pipeline_dedup_batch_size: int = 100
+    pipeline_persist_batch_size: int = 20
+    # replays write through the bulk COPY path, see bulk_copy_threshold
+    replay_persist_batch_size: int = 5_000
+    pipeline_flush_interval: float = 2.0
     openai_api_key: str
+    openai_base_url: str | None = None
+    llm_model: str = "gpt-4.1-mini"
+    llm_max_concurrency: int = 10
+    llm_requests_per_minute: int = 500
+    llm_tokens_per_minute: int = 200_000
+    llm_batch_size: int = 1
+    llm_max_batch_size: int = 20
+    llm_batch_target_latency: float = 0.0
+
+    classification_cache_enabled: bool = True
+    classification_cache_size: int = 10_000
+    classification_cache_ttl_hours: int = 24
+
+    # the no-coin drop still misses coins the rules do not know, so it is opt-in
+    prefilter_enabled: bool = False
+
+    near_duplicate_enabled: bool = True
+    near_duplicate_max_distance: int = 2
+    near_duplicate_window: int = 5_000
+
+    classifier_backend: str = "llm"  # llm, local or hybrid
+    local_model_path: str = "models/local_classifier.npz"
+    local_model_features: int = 2**18
+    local_model_batch_size: int = 256
+    hybrid_confidence_threshold: float = 0.75
+
+    author_cache_size: int = 50_000
+    author_cache_ttl_minutes: int = 60
+
+    archive_enabled: bool = True
+    archive_dir: str = "archive"
+    archive_compression: str = "zstd"  # zstd or gzip
+
+    # coin_tweet_analysis keeps this many days; older partitions are exported and dropped (0 keeps all)
+    partition_retention_days: int = 30
+    partition_premake_days: int = 7
+    partition_archive_dir: str = "archive/partitions"
+
+    bulk_chunk_size: int = 1_000
+    # rows per write from which COPY beats chunked inserts; live runs stay below it
+    bulk_copy_threshold: int = 1_000
+    bulk_copy_batch_size: int = 50_000
+    bulk_chunk_retries: int = 2
+
+    scheduler_ingest_interval: float = 120.0
+    scheduler_ingest_deadline: float = 300.0
+    # the worker's singleton jobs; plan_ingest only enqueues, the fetching runs in the work queue
+    scheduler_plan_ingest_deadline: float = 60.0
+    scheduler_trading_interval: float = 60.0
+    scheduler_trading_deadline: float = 55.0
+    scheduler_maintenance_interval: float = 600.0
+    scheduler_maintenance_deadline: float = 300.0
+
+    worker_concurrency: int = 4
+    worker_poll_interval: float = 1.0
+    work_lease_seconds: float = 600.0
+    work_max_attempts: int = 5
+    work_classify_chunk_size: int = 200
+    work_retention_hours: int = 24
+
+    trending_capacity: int = 1000
+    trending_half_life_minutes: float = 60.0
+    trending_checkpoint_interval: float = 15.0
+
+    spike_bucket_seconds: float = 60.0
+    spike_baseline_minutes: float = 60.0
+    spike_z_threshold: float = 3.0
+    spike_min_mentions: int = 5
+    spike_cooldown_minutes: float = 30.0
+    spike_max_coins: int = 10000
+    # tweets older than this raise no spikes, and spikes on older tweets are not traded on
+    spike_max_age_seconds: float = 300.0
+    spike_poll_interval: float = 30.0
+    spike_retention_days: int = 7
+
+    coingecko_base_url: str = "https://api.coingecko.com/api/v3"
     
     postgres_user: str
     postgres_password: str
@@ -0,0 +1,339 @@
+"""Incremental detection of mention spikes, published through Postgres.
+
+``SpikeDetector`` keeps, per coin, the mentions and mean sentiment of the
+open time bucket and an exponentially weighted mean and variance of both
+over past buckets. After every stored batch, the buckets of its coins are
+read back from ``coin_sentiment_minute`` and checked against that baseline
+right away, so a spike is raised by the batch that crosses the threshold,
+not when its bucket closes. Only coins mentioned within ``max_age`` are
+checked, and only their newest bucket, so tweets from a replay or a gap
+backfill never make old news look new.
+
+Spikes are stored in ``spike_events`` and announced with ``NOTIFY`` on
+commit; the trading simulation ``LISTEN``s and claims them from the table,
+which also keeps the detection and entry times for latency measurements.
+
+The rollup triggers count the tweets of every worker replica, so each
+replica detects on all of a coin's mentions, not on the share it stored
+itself. The thresholds are absolute (``min_mentions`` and
+``MIN_MENTION_STD``) and Poisson noise lets z grow with the square root
+of the count, so counting a share would lose spikes altogether. A coin
+going from 1 to 12 mentions a bucket, split over three replicas, never
+reaches 5 on any of them. Replicas that see the same spike publish it
+once: ``publish_spikes`` skips a coin that already spiked within the
+cooldown, under a per-coin advisory lock.
+"""
+
+import asyncio
+import logging
+import math
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.database import engine
+from app.models import CoinSentimentMinute, SpikeEvent
+from app.settings import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+SPIKE_CHANNEL = "coin_spikes"
+# deviations below these are noise: a quiet coin must not spike on a handful of tweets
+MIN_MENTION_STD = 1.0
+MIN_SENTIMENT_STD = 0.1
+
+
+@dataclass
+class CoinActivity:
+    """Open bucket and baseline of one coin."""
+
+    bucket: datetime
+    mentions: int = 0
+    sentiment_sum: float = 0.0
+    mention_mean: float = 0.0
+    mention_var: float = 0.0
+    sentiment_mean: float = 0.0
+    sentiment_var: float = 0.0
+    spiked_at: datetime | None = None
+
+
+def _fold(mean: float, var: float, value: float, alpha: float) -> tuple[float, float]:
+    """Adds ``value`` to an exponentially weighted mean and variance."""
+    diff = value - mean
+    increment = alpha * diff
+    return mean + increment, (1 - alpha) * (var + diff * increment)
+
+
+class SpikeDetector:
+    """Raises a spike when a coin's mentions in the open bucket are ``threshold`` deviations above its baseline."""
+
+    def __init__(
+        self,
+        bucket: timedelta = timedelta(seconds=settings.spike_bucket_seconds),
+        baseline: timedelta = timedelta(minutes=settings.spike_baseline_minutes),
+        threshold: float = settings.spike_z_threshold,
+        min_mentions: int = settings.spike_min_mentions,
+        cooldown: timedelta = timedelta(minutes=settings.spike_cooldown_minutes),
+        max_coins: int = settings.spike_max_coins,
+        max_age: timedelta = timedelta(seconds=settings.spike_max_age_seconds),
+    ):
+        self.bucket = bucket
+        self.alpha = min(1.0, bucket / baseline)
+        self.threshold = threshold
+        self.min_mentions = min_mentions
+        self.cooldown = cooldown
+        self.max_coins = max_coins
+        self.max_age = max_age
+        # past this many empty buckets the baseline has decayed to nothing anyway
+        self.max_gap = math.ceil(5 / self.alpha)
+        self.baseline = baseline
+        self._coins: OrderedDict[str, CoinActivity] = OrderedDict()
+        self._lock = threading.Lock()
+        self._warmed = False
+
+    def _floor(self, at: datetime) -> datetime:
+        seconds = self.bucket.total_seconds()
+        return datetime.fromtimestamp(at.timestamp() // seconds * seconds, timezone.utc)
+
+    def _close_bucket(self, state: CoinActivity, bucket: datetime):
+        """Folds the open bucket and the empty ones up to ``bucket`` into the baseline."""
+        mentions = [state.mentions] + [0] * min((bucket - state.bucket) // self.bucket - 1, self.max_gap)
+        for count in mentions:
+            state.mention_mean, state.mention_var = _fold(state.mention_mean, state.mention_var, count, self.alpha)
+        if state.mentions:
+            state.sentiment_mean, state.sentiment_var = _fold(
+                state.sentiment_mean, state.sentiment_var, state.sentiment_sum / state.mentions, self.alpha
+            )
+        state.bucket, state.mentions, state.sentiment_sum = bucket, 0, 0.0
+
+    def _count(self, coin_name: str, bucket: datetime, mentions: int, sentiment_sum: float) -> CoinActivity:
+        state = self._coins.get(coin_name)
+        if state is None:
+            state = self._coins[coin_name] = CoinActivity(bucket)
+            while len(self._coins) > self.max_coins:
+                self._coins.popitem(last=False)
+        elif bucket > state.bucket:
+            self._close_bucket(state, bucket)
+        self._coins.move_to_end(coin_name)
+        state.mentions += mentions
+        state.sentiment_sum += sentiment_sum
+        return state
+
+    def warm(self, db: Session):
+        """Replays the minute rollups of the last few baselines once, so a restart does not flag every busy coin."""
+        if self._warmed:
+            return
+        since = datetime.now(timezone.utc) - 3 * self.baseline
+        stmt = (
+            select(
+                CoinSentimentMinute.coin_name,
+                CoinSentimentMinute.bucket,
+                CoinSentimentMinute.mentions,
+                CoinSentimentMinute.weight_sum,
+            )
+            .where(CoinSentimentMinute.bucket >= since)
+            .order_by(CoinSentimentMinute.bucket)
+        )
+        try:
+            rows = db.execute(stmt).all()
+        except Exception as e:
+            logger.error(f"Failed to load spike baselines: {e}")
+            db.rollback()
+            return
+        with self._lock:
+            for row in rows:
+                # weight_sum is positive minus negative mentions, the sum of the sentiment values
+                self._count(row.coin_name, self._floor(row.bucket), row.mentions, row.weight_sum)
+        self._warmed = True
+        logger.info(f"Loaded spike baselines of {len({row.coin_name for row in rows})} coins.")
+
+    def _set(self, coin_name: str, bucket: datetime, mentions: int, sentiment_sum: float):
+        """Replaces the counts of ``bucket`` with the rollup's; buckets already in the baseline are left alone."""
+        state = self._coins.get(coin_name)
+        if state is not None and bucket < state.bucket:
+            return
+        state = self._count(coin_name, bucket, 0, 0.0)
+        state.mentions, state.sentiment_sum = mentions, sentiment_sum
+
+    def refresh(self, db: Session, latest: Dict[str, datetime]) -> List[SpikeEvent]:
+        """Reads the buckets of the coins just stored from the minute rollup and returns their spikes.
+
+        ``latest`` maps each coin to the publish date of its newest stored
+        mention; coins whose newest mention is older than ``max_age`` are
+        not checked.
+        """
+        now = datetime.now(timezone.utc)
+        latest = {
+            coin_name: at if at.tzinfo is not None else at.replace(tzinfo=timezone.utc)
+            for coin_name, at in latest.items()
+        }
+        latest = {coin_name: at for coin_name, at in latest.items() if at >= now - self.max_age}
+        if not latest:
+            return []
+        # buckets this replica has not seen yet, back to the warm-up horizon for new coins
+        horizon = now - 3 * self.baseline
+        with self._lock:
+            since = min(
+                max(self._coins[c].bucket, horizon) if c in self._coins else horizon for c in latest
+            )
+        stmt = (
+            select(
+                CoinSentimentMinute.coin_name,
+                CoinSentimentMinute.bucket,
+                CoinSentimentMinute.mentions,
+                CoinSentimentMinute.weight_sum,
+            )
+            .where(CoinSentimentMinute.coin_name.in_(latest), CoinSentimentMinute.bucket >= since)
+            .order_by(CoinSentimentMinute.bucket)
+        )
+        try:
+            rows = db.execute(stmt).all()
+        except Exception as e:
+            logger.error(f"Failed to read the mentions of {len(latest)} coins: {e}")
+            db.rollback()
+            return []
+
+        # minute rows add up to buckets of any whole number of minutes
+        buckets: Dict[tuple, List[float]] = {}
+        for row in rows:
+            counts = buckets.setdefault((row.coin_name, self._floor(row.bucket)), [0, 0.0])
+            counts[0] += row.mentions
+            counts[1] += row.weight_sum
+        spikes = []
+        with self._lock:
+            for (coin_name, bucket), (mentions, sentiment_sum) in buckets.items():
+                self._set(coin_name, bucket, mentions, sentiment_sum)
+            for coin_name, at in latest.items():
+                state = self._coins.get(coin_name)
+                if state is None or state.bucket < self._floor(at):
+                    continue
+                spike = self._check(coin_name, state, at)
+                if spike is not None:
+                    spikes.append(spike)
+        return spikes
+
+    def _check(self, coin_name: str, state: CoinActivity, at: datetime) -> SpikeEvent | None:
+        if state.mentions < self.min_mentions:
+            return None
+        mention_z = (state.mentions - state.mention_mean) / max(math.sqrt(state.mention_var), MIN_MENTION_STD)
+        if mention_z < self.threshold:
+            return None
+        if state.spiked_at is not None and at - state.spiked_at < self.cooldown:
+            return None
+        state.spiked_at = at
+        sentiment = state.sentiment_sum / state.mentions
+        return SpikeEvent(
+            coin_name=coin_name,
+            bucket=state.bucket,
+            mentions=state.mentions,
+            mention_z=mention_z,
+            sentiment=sentiment,
+            sentiment_z=(sentiment - state.sentiment_mean) / max(math.sqrt(state.sentiment_var), MIN_SENTIMENT_STD),
+            published_at=at,
+            detected_at=datetime.now(timezone.utc),
+        )
+
+
+def publish_spikes(
+    db: Session,
+    events: List[SpikeEvent],
+    cooldown: timedelta = timedelta(minutes=settings.spike_cooldown_minutes),
+):
+    """Stores spikes and notifies the subscribers on commit; does not commit.
+
+    A coin that already spiked within ``cooldown``, e.g. on another replica,
+    is skipped. The per-coin advisory lock is held until the caller commits.
+    """
+    fresh = []
+    # locks are taken in coin order, so two replicas never wait on each other
+    for event in sorted(events, key=lambda event: event.coin_name):
+        db.execute(select(func.pg_advisory_xact_lock(func.hashtext(f"spike:{event.coin_name}"))))
+        recent = db.execute(
+            select(SpikeEvent.id)
+            .where(SpikeEvent.coin_name == event.coin_name, SpikeEvent.detected_at >= event.detected_at - cooldown)
+            .limit(1)
+        ).first()
+        if recent is None:
+            fresh.append(event)
+    if not fresh:
+        return
+    db.add_all(fresh)
+    db.execute(select(func.pg_notify(SPIKE_CHANNEL, "")))
+    for event in fresh:
+        logger.info(
+            f"Spike: {event.coin_name} with {event.mentions} mentions (z={event.mention_z:.1f}), "
+            f"sentiment {event.sentiment:+.2f} (z={event.sentiment_z:.1f})"
+        )
+
+
+def claim_spikes(db: Session) -> List[SpikeEvent]:
+    """Locks the spikes not consumed yet and marks them consumed; the caller commits.
+
+    Other subscribers skip the locked rows, so each spike is handled once.
+    """
+    events = db.execute(
+        select(SpikeEvent)
+        .where(SpikeEvent.consumed_at.is_(None))
+        .order_by(SpikeEvent.id)
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+    now = datetime.now(timezone.utc)
+    for event in events:
+        event.consumed_at = now
+    return events
+
+
+def prune_spike_events(db: Session, retention_days: int = settings.spike_retention_days):
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    result = db.execute(delete(SpikeEvent).where(SpikeEvent.detected_at < cutoff))
+    db.commit()
+    if result.rowcount:
+        logger.info(f"Pruned {result.rowcount} spike events.")
+
+
+class SpikeSubscription:
+    """Listens for spike notifications on a dedicated connection, without blocking the event loop."""
+
+    def __init__(self, channel: str = SPIKE_CHANNEL):
+        self.channel = channel
+        self._connection = None
+        self._notified = asyncio.Event()
+
+    async def __aenter__(self) -> "SpikeSubscription":
+        self._connection = await asyncio.to_thread(engine.raw_connection)
+        driver = self._connection.driver_connection
+        driver.autocommit = True
+        with driver.cursor() as cursor:
+            cursor.execute(f"LISTEN {self.channel}")
+        asyncio.get_running_loop().add_reader(driver.fileno(), self._on_readable)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        driver = self._connection.driver_connection
+        asyncio.get_running_loop().remove_reader(driver.fileno())
+        # a pooled connection must not keep listening
+        self._connection.invalidate()
+        self._connection.close()
+        self._connection = None
+
+    def _on_readable(self):
+        driver = self._connection.driver_connection
+        driver.poll()
+        if driver.notifies:
+            driver.notifies.clear()
+            self._notified.set()
+
+    async def wait(self, timeout: float) -> bool:
+        """Waits until a spike is announced or ``timeout`` passes; returns whether one was."""
+        try:
+            await asyncio.wait_for(self._notified.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self._notified.clear()
+        return True
@@ -386,8 +386,8 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     };
 
-    // Function to load tweets with pagination support
-    async function loadTweets(coinName, skip = 0, append = false) {
+    // Function to load tweets with pagination support; cursor is the X-Next-Cursor of the previous page
+    async function loadTweets(coinName, cursor = null, append = false) {
         const limit = 5;
         try {
             // Show loading state on the load more button if appending
@@ -400,13 +400,15 @@ document.addEventListener('DOMContentLoaded', () => {
                 showLoading(latestTweetsList);
             }
             
-            const response = await fetch(`${API_BASE_URL}/tokens/${coinName}/tweets?skip=${skip}&limit=${limit}`);
+            const cursorParam = cursor ? `&cursor=${encodeURIComponent(cursor)}` : '';
+            const response = await fetch(`${API_BASE_URL}/tokens/${coinName}/tweets?limit=${limit}${cursorParam}`);
             
             if (!response.ok) {
                 throw new Error(`Failed to fetch tweets: ${response.status}`);
             }
             
             const tweets = await response.json();
+            const nextCursor = response.headers.get('X-Next-Cursor');
             
             // If we're appending and got no tweets, handle the end of the list
             if (append && (!tweets || tweets.length === 0)) {
@@ -422,7 +424,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 }
             } else {
                 // Otherwise render as normal
-                renderLatestTweets(tweets, append, coinName, skip);
+                renderLatestTweets(tweets, append, coinName, nextCursor);
             }
             
             // Return the tweets for other uses
@@ -502,7 +504,7 @@ document.addEventListener('DOMContentLoaded', () => {
             ]);
             
             // Load tweets separately using the new loadTweets function
-            await loadTweets(coinName, 0); // This will handle rendering the tweets
+            await loadTweets(coinName); // This will handle rendering the tweets
             
             console.log('Data received:', { 
                 info: 'Token info received', 
@@ -723,7 +725,7 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     };
 
-    const renderLatestTweets = (tweets, append = false, coinName = null, currentSkip = 0) => {
+    const renderLatestTweets = (tweets, append = false, coinName = null, nextCursor = null) => {
         // Find the tweets content container
         const tweetsContent = latestTweetsList.querySelector('.tweets-content');
         
@@ -753,14 +755,14 @@ document.addEventListener('DOMContentLoaded', () => {
         loadMoreButton.disabled = false;
         loadMoreButton.textContent = 'Load More Tweets';
         
-        // Show or hide the load more button based on whether we got a full page of results
-        if (tweets.length < 5) {
+        // Show or hide the load more button based on whether the API returned a cursor to a next page
+        if (!nextCursor) {
             loadMoreButton.style.display = 'none'; // Hide if no more tweets to load
         } else {
             loadMoreButton.style.display = 'block';
             // Set up the click handler for the load more button
             if (coinName) {
-                loadMoreButton.onclick = () => loadTweets(coinName, currentSkip + 5, true);
+                loadMoreButton.onclick = () => loadTweets(coinName, nextCursor, true);
             }
         }
         
@@ -12,6 +12,9 @@ document.addEventListener('DOMContentLoaded', () => {
     
     let openDealsPage = 0;
     let closedDealsPage = 0;
+    // X-Next-Cursor of the last page fetched, null when there are no more deals
+    let openDealsCursor = null;
+    let closedDealsCursor = null;
 
     const formatPrice = (price) => {
         if (price === null || price === undefined) return 'N/A';
@@ -77,6 +80,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
     const fetchDeals = async (isClosed) => {
         const page = isClosed ? closedDealsPage : openDealsPage;
+        const cursor = isClosed ? closedDealsCursor : openDealsCursor;
         const listElement = isClosed ? closedDealsList : openDealsList;
         const buttonElement = isClosed ? showMoreClosedBtn : showMoreOpenBtn;
         
@@ -85,13 +89,20 @@ document.addEventListener('DOMContentLoaded', () => {
         }
 
         try {
-            const response = await fetch(`${API_BASE_URL}/trades?is_closed=${isClosed}&limit=${DEAL_LIMIT}&skip=${page * DEAL_LIMIT}`);
+            const cursorParam = page > 0 && cursor ? `&cursor=${encodeURIComponent(cursor)}` : '';
+            const response = await fetch(`${API_BASE_URL}/trades?is_closed=${isClosed}&limit=${DEAL_LIMIT}${cursorParam}`);
             if (!response.ok) throw new Error('Failed to fetch deals');
             const deals = await response.json();
+            const nextCursor = response.headers.get('X-Next-Cursor');
+            if (isClosed) {
+                closedDealsCursor = nextCursor;
+            } else {
+                openDealsCursor = nextCursor;
+            }
             
             renderDeals(listElement, deals, isClosed);
 
-            if (deals.length < DEAL_LIMIT) {
+            if (!nextCursor) {
                 buttonElement.style.display = 'none';
             } else {
                 buttonElement.style.display = 'block';
@@ -1,13 +1,20 @@
 from datetime import datetime, timedelta, timezone
-from app.crud import get_tokens_by_score, get_open_trades
+from app.crud import get_open_trades
 from app.database import get_db
 from app.models import Trade
+from app.settings import get_settings
+from app.spikes import SpikeSubscription, claim_spikes
+from sqlalchemy import text
+from sqlalchemy.orm import Session
 import time
 import logging
+import threading
 import requests
 from typing import List
 import asyncio
 
+settings = get_settings()
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
@@ -18,7 +25,7 @@ def get_token_prices(tokens: List[str], vs_currency: str = "usd") -> dict:
     """
     Fetch prices for a list of tokens from CoinGecko API. Handles batches of up to 50 tokens.
     """
-    BASE_URL = "https://api.coingecko.com/api/v3/simple/price"
+    BASE_URL = f"{settings.coingecko_base_url}/simple/price"
     BATCH_SIZE = 50
     all_prices = {}
 
@@ -38,7 +45,8 @@ def get_token_prices(tokens: List[str], vs_currency: str = "usd") -> dict:
             logging.error(f"Error fetching batch {i // BATCH_SIZE + 1}: {e}")
 
         # To respect API rate limits (optional, adjust as needed)
-        time.sleep(1)  # sleep for 1 second between requests
+        if i + BATCH_SIZE < len(tokens):
+            time.sleep(1)  # sleep for 1 second between requests
 
     all_prices = {
         t.lower(): price_dict[vs_currency]
@@ -48,51 +56,45 @@ def get_token_prices(tokens: List[str], vs_currency: str = "usd") -> dict:
     return all_prices
 
 
-async def main():
+# held by the step's worker thread, which keeps going if the awaiting job is cancelled
+_step_lock = threading.Lock()
+
+
+def lock_trades(db: Session):
+    """Serializes opening trades across processes until the transaction ends, so no coin is bought twice."""
+    db.execute(text("SELECT pg_advisory_xact_lock(hashtext('trades'))"))
+
+
+def run_trading_step():
     """
-    Main function for the trading simulation.
+    Runs one step of the trading simulation: closes due trades.
+    Trades are opened on mention spikes instead, see ``enter_spikes``.
     """
+    if not _step_lock.acquire(blocking=False):
+        logging.warning("Previous trading step is still running, skipping this one.")
+        return
     logging.info("Starting trading simulation...")
     try:
         with get_db() as db:
-            tokens = get_tokens_by_score(db, time_range="hour", limit=10)
-            logging.info(f"Found {len(tokens)} tokens with score")
-            
-            # take with score >= 2
-            tokens = [t for t in tokens if t.score >= 1]
-            logging.info(f"Found {len(tokens)} tokens with score >= 2")
-
+            lock_trades(db)
             monitored_tokens = get_open_trades(db)
             logging.info(f"Found {len(monitored_tokens)} monitored tokens")
 
-            monitored_token_names = [t.coin_name.lower() for t in monitored_tokens]
-            new_tokens = [
-                t for t in tokens if t.coin_name.lower() not in monitored_token_names
-            ]
-            logging.info(f"Found {len(new_tokens)} new tokens")
-
-            all_token_names = monitored_token_names + [
-                t.coin_name.lower() for t in new_tokens
-            ]
-
-            if len(all_token_names) == 0:
-                logging.info("No tokens to analyze. Exiting.")
+            if len(monitored_tokens) == 0:
+                logging.info("No open trades. Exiting.")
                 return
 
-            all_token_prices_dict = get_token_prices(all_token_names)
+            all_token_prices_dict = get_token_prices([t.coin_name.lower() for t in monitored_tokens])
 
             if len(all_token_prices_dict) == 0:
                 logging.info("No tokens with price. Exiting.")
                 return
 
-            new_tokens = [
-                t for t in new_tokens if t.coin_name.lower() in all_token_prices_dict
-            ]
-            logging.info(f"Found {len(new_tokens)} new tokens with price")
-
             to_close_trades = []
             for t in monitored_tokens:
-                token_price = all_token_prices_dict[t.coin_name.lower()]
+                token_price = all_token_prices_dict.get(t.coin_name.lower())
+                if token_price is None:
+                    continue
                 if t.buy_date < datetime.now(timezone.utc) - timedelta(hours=1):
                     # if price is growing, close the trade
                     if token_price > t.buy_price:
@@ -111,24 +113,76 @@ async def main():
                 t.sell_price = all_token_prices_dict[t.coin_name.lower()]
                 db.add(t)
 
-            logging.info(f"Found {len(new_tokens)} new tokens to open")
-
-            for t in new_tokens:
-                trade = Trade(
-                    coin_name=t.coin_name.lower(),
-                    buy_price=all_token_prices_dict[t.coin_name.lower()],
-                    buy_date=datetime.now(timezone.utc),
-                )
-                db.add(trade)
-
             logging.info("Committing changes to the database...")
             db.commit()
     except Exception as e:
         logging.error(f"Error during trading simulation: {e}")
         db.rollback()
     finally:
+        _step_lock.release()
         logging.info("Trading simulation finished.")
 
 
+def enter_spikes():
+    """
+    Opens trades on the spikes announced since the last call, skipping stale, bearish and already held coins.
+    """
+    with get_db() as db:
+        lock_trades(db)
+        spikes = claim_spikes(db)
+        if not spikes:
+            db.commit()
+            return
+        now = datetime.now(timezone.utc)
+        max_age = timedelta(seconds=settings.spike_max_age_seconds)
+        held = {t.coin_name.lower() for t in get_open_trades(db)}
+        candidates = {}
+        for spike in spikes:
+            coin = spike.coin_name.lower()
+            # detection is always recent, the tweets behind it may not be
+            if spike.published_at < now - max_age or spike.sentiment <= 0 or coin in held:
+                continue
+            candidates.setdefault(coin, spike)
+
+        prices = get_token_prices(list(candidates)) if candidates else {}
+        for coin, spike in candidates.items():
+            if coin not in prices:
+                continue
+            trade = Trade(coin_name=coin, buy_price=prices[coin], buy_date=datetime.now(timezone.utc))
+            db.add(trade)
+            db.flush()
+            spike.trade_id = trade.id
+            logging.info(
+                f"Bought {coin} on a spike: detected {(spike.detected_at - spike.published_at).total_seconds():.1f}s "
+                f"after the tweet, entered {(trade.buy_date - spike.detected_at).total_seconds():.1f}s after detection"
+            )
+        db.commit()
+        logging.info(f"Handled {len(spikes)} spikes, {len(candidates)} tradeable.")
+
+
+async def follow_spikes():
+    """
+    Enters trades as spikes are announced; also checks every ``spike_poll_interval`` in case a notification was missed.
+    """
+    while True:
+        try:
+            async with SpikeSubscription() as subscription:
+                while True:
+                    await asyncio.to_thread(enter_spikes)
+                    await subscription.wait(settings.spike_poll_interval)
+        except Exception as e:
+            logging.error(f"Error following spikes: {e}")
+            await asyncio.sleep(settings.spike_poll_interval)
+
+
+async def main():
+    """
+    Main function for the trading simulation: closes due trades and enters the spikes not followed yet.
+    The blocking steps run off the event loop.
+    """
+    await asyncio.to_thread(run_trading_step)
+    await asyncio.to_thread(enter_spikes)
+
+
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,234 @@
+"""Streaming heavy hitters: time-decayed trending coins and keywords.
+
+Every stored analysis feeds its coin and keywords into a Space-Saving
+summary per kind, which keeps at most ``capacity`` counters and so tracks
+the heaviest items of an unbounded stream in fixed memory. Counts decay
+exponentially with ``half_life``, using forward decay: an observation at
+time t adds 2^((t - landmark) / half_life), so nothing has to be decayed
+as time passes, and the score of an item at time t is its count times
+2^-((t - landmark) / half_life). Decay keeps the order of the counters, so
+the smallest one is still the one to evict.
+
+Each process only keeps what it observed since its last checkpoint. A
+checkpoint adds it to the shared counters in ``trending_counters`` under a
+row lock on the kind's ``trending_sketches`` row, so replicas add up and a
+restart loses at most one checkpoint interval. Reading the top K is one
+index scan of K rows.
+"""
+
+import heapq
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models import TrendingCounter, TrendingSketch
+from app.settings import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+COIN = "coin"
+KEYWORD = "keyword"
+KINDS = (COIN, KEYWORD)
+
+# counts grow by 2x per half-life past the landmark, so it is moved before they get too large
+RESCALE_AFTER_HALF_LIVES = 64
+
+
+@dataclass
+class HeavyHitter:
+    item: str
+    score: float
+    error: float
+
+
+def decay(since: datetime, until: datetime, half_life: timedelta) -> float:
+    """Returns the factor a count loses from ``since`` to ``until``."""
+    return 2.0 ** -((until - since) / half_life)
+
+
+class SpaceSaving:
+    """Time-decayed Space-Saving summary of at most ``capacity`` counters.
+
+    An item that is not tracked takes over the smallest counter, so its
+    count may be overestimated by that counter's value, which is kept as its
+    error. Items heavier than 1/capacity of the decayed total are never lost.
+    """
+
+    def __init__(self, capacity: int, half_life: timedelta, landmark: datetime | None = None):
+        self.capacity = capacity
+        self.half_life = half_life
+        self.landmark = landmark or datetime.now(timezone.utc)
+        self.counters: Dict[str, List[float]] = {}
+        # min-heap of (count, item); entries go stale when their item's count grows
+        self._heap: List[Tuple[float, str]] = []
+
+    def __len__(self) -> int:
+        return len(self.counters)
+
+    def add(self, item: str, at: datetime | None = None, weight: float = 1.0):
+        """Counts ``weight`` observations of ``item`` made at ``at``, by default now."""
+        at = at or datetime.now(timezone.utc)
+        if (at - self.landmark) / self.half_life > RESCALE_AFTER_HALF_LIVES:
+            self._rescale(at)
+        self._increment(item, weight / decay(self.landmark, at, self.half_life), 0.0)
+
+    def merge(self, other: "SpaceSaving"):
+        """Adds the counters of another summary to this one."""
+        if (other.landmark - self.landmark) / self.half_life > RESCALE_AFTER_HALF_LIVES:
+            self._rescale(other.landmark)
+        scale = 1.0 / decay(self.landmark, other.landmark, self.half_life)
+        for item, (count, error) in other.counters.items():
+            self._increment(item, count * scale, error * scale)
+
+    def top(self, k: int, at: datetime | None = None) -> List[HeavyHitter]:
+        """Returns the ``k`` heaviest items with their scores decayed to ``at``, by default now."""
+        factor = decay(self.landmark, at or datetime.now(timezone.utc), self.half_life)
+        heaviest = heapq.nlargest(k, self.counters.items(), key=lambda entry: entry[1][0])
+        return [HeavyHitter(item, count * factor, error * factor) for item, (count, error) in heaviest]
+
+    def _increment(self, item: str, count: float, error: float):
+        counter = self.counters.get(item)
+        if counter is None:
+            floor = self._evict() if len(self.counters) >= self.capacity else 0.0
+            counter = self.counters[item] = [floor, floor]
+        counter[0] += count
+        counter[1] += error
+        heapq.heappush(self._heap, (counter[0], item))
+        if len(self._heap) > 4 * self.capacity:
+            self._rebuild_heap()
+
+    def _evict(self) -> float:
+        """Drops the smallest counter and returns its count."""
+        while True:
+            count, item = heapq.heappop(self._heap)
+            counter = self.counters.get(item)
+            if counter is not None and counter[0] == count:
+                del self.counters[item]
+                return count
+
+    def _rebuild_heap(self):
+        self._heap = [(count, item) for item, (count, _) in self.counters.items()]
+        heapq.heapify(self._heap)
+
+    def _rescale(self, landmark: datetime):
+        factor = decay(self.landmark, landmark, self.half_life)
+        for counter in self.counters.values():
+            counter[0] *= factor
+            counter[1] *= factor
+        self.landmark = landmark
+        self._rebuild_heap()
+
+
+def _merge_into_db(db: Session, kind: str, summary: SpaceSaving, capacity: int):
+    """Adds a summary to the shared counters of ``kind`` without committing."""
+    now = datetime.now(timezone.utc)
+    db.execute(
+        insert(TrendingSketch)
+        .values(kind=kind, landmark=now, half_life_seconds=summary.half_life.total_seconds(), floor=0.0)
+        .on_conflict_do_nothing(index_elements=["kind"])
+    )
+    # checkpoints of other replicas wait here until this one commits
+    sketch = db.execute(select(TrendingSketch).where(TrendingSketch.kind == kind).with_for_update()).scalar_one()
+    half_life = timedelta(seconds=sketch.half_life_seconds)
+    if (now - sketch.landmark) / half_life > RESCALE_AFTER_HALF_LIVES:
+        factor = decay(sketch.landmark, now, half_life)
+        db.execute(
+            update(TrendingCounter)
+            .where(TrendingCounter.kind == kind)
+            .values(count=TrendingCounter.count * factor, error=TrendingCounter.error * factor)
+        )
+        sketch.floor *= factor
+        sketch.landmark = now
+
+    scale = 1.0 / decay(sketch.landmark, summary.landmark, half_life)
+    rows = [
+        # an item new to the shared counters may have been trimmed off before, with up to ``floor``
+        {"kind": kind, "item": item, "count": count * scale, "error": error * scale + sketch.floor}
+        for item, (count, error) in summary.counters.items()
+    ]
+    stmt = insert(TrendingCounter).values(rows)
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["kind", "item"],
+            set_={
+                "count": TrendingCounter.count + stmt.excluded.count,
+                "error": TrendingCounter.error + stmt.excluded.error - sketch.floor,
+            },
+        )
+    )
+
+    overflow = (
+        select(TrendingCounter.item)
+        .where(TrendingCounter.kind == kind)
+        .order_by(TrendingCounter.count.desc())
+        .offset(capacity)
+    )
+    trimmed = db.execute(
+        delete(TrendingCounter)
+        .where(TrendingCounter.kind == kind, TrendingCounter.item.in_(overflow.scalar_subquery()))
+        .returning(TrendingCounter.count)
+    ).scalars().all()
+    sketch.floor = max([sketch.floor, *trimmed])
+    sketch.updated_at = now
+
+
+class TrendingTracker:
+    """Collects the coins and keywords of stored analyses and checkpoints them to the shared sketches."""
+
+    def __init__(
+        self,
+        capacity: int = settings.trending_capacity,
+        half_life: timedelta = timedelta(minutes=settings.trending_half_life_minutes),
+    ):
+        self.capacity = capacity
+        self.half_life = half_life
+        self._lock = threading.Lock()
+        self._pending = self._empty()
+
+    def _empty(self) -> Dict[str, SpaceSaving]:
+        return {kind: SpaceSaving(self.capacity, self.half_life) for kind in KINDS}
+
+    def observe(self, coin_name: str, keywords: Iterable[str], at: datetime | None = None):
+        """Counts one mention of a coin and its keywords, published at ``at``."""
+        now = datetime.now(timezone.utc)
+        if at is None:
+            at = now
+        elif at.tzinfo is None:
+            at = at.replace(tzinfo=timezone.utc)
+        # a clock running ahead must not make a tweet outweigh the ones published since
+        at = min(at, now)
+        with self._lock:
+            self._pending[COIN].add(coin_name, at)
+            for keyword in set(keywords):
+                self._pending[KEYWORD].add(keyword, at)
+
+    def checkpoint(self, db: Session):
+        """Adds what was observed since the last checkpoint to the shared sketches."""
+        with self._lock:
+            pending, self._pending = self._pending, self._empty()
+        if not any(pending.values()):
+            return
+        try:
+            for kind, summary in pending.items():
+                if summary:
+                    _merge_into_db(db, kind, summary, self.capacity)
+            db.commit()
+        except Exception as e:
+            logger.error(f"Failed to checkpoint trending sketches: {e}")
+            db.rollback()
+            # kept for the next checkpoint
+            with self._lock:
+                for kind, summary in pending.items():
+                    self._pending[kind].merge(summary)
+            return
+        logger.info(
+            "Checkpointed trending sketches: " + ", ".join(f"{len(s)} {kind}s" for kind, s in pending.items())
+        )
+
@@ -1,16 +1,38 @@
 import asyncio
 import logging
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import List, Set
+from typing import AsyncIterator, Dict, Iterable, List
 
 from pydantic import BaseModel
-from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
+from app.archive import PayloadArchive
+from app.authors import AuthorReputation
+from app.bulk import BulkWriter
+from app.collection import (
+    collection_progress,
+    load_enabled_collection_states,
+    rewind_collection_state,
+    save_collection_states,
+    stream_new_tweets,
+)
 from app.collectors.scrapestorm.api_client import ScrapeStormAPIClient
 from app.database import get_db as get_session
-from app.llm.classification import classify_tweet
-from app.models import CoinTweetAnalysis as DBCoinTweetAnalysis, SentimentEnum
+from app.dedup import get_existing_tweet_ids, prune_seen_tweets, record_seen_tweets
+from app.llm.classification import CoinTweetAnalysis, get_engine
+from app.llm.engines import get_classifier
+from app.llm.prefilter import Decision, PreClassifier
+from app.models import CoinTweetAnalysis as DBCoinTweetAnalysis, CollectionState, SentimentEnum
+from app.near_duplicates import NearDuplicateIndex, cashtag_group, simhash
+from app.parsing import ParseStats, owner_id, parse_entries
+from app.pipeline import Pipeline, StageStats
+from app.query_scheduler import QueryScheduler, QueryYields
+from app.settings import get_settings
+from app.spikes import SpikeDetector, publish_spikes
+from app.trending import TrendingTracker
+
+settings = get_settings()
 
 # Configure logging
 logging.basicConfig(
@@ -18,6 +40,7 @@ logging.basicConfig(
 )
 
 
+# seeds collection_state on the first run; manage queries with `python -m app.query_scheduler`
 SEARCH_KEYWORDS = [
     "meme AND (coin OR token OR airdrop) lang:en min_faves:5 -filter:quote",
     "new AND (coin OR token OR airdrop) lang:en min_faves:5 -filter:quote",
@@ -30,6 +53,7 @@ SEARCH_KEYWORDS = [
 
 
 class TwitterUser(BaseModel):
+    id: str
     created_at: datetime
     is_verified: bool
     is_blue_verified: bool
@@ -43,6 +67,7 @@ class TwitterUser(BaseModel):
     @classmethod
     def from_scrapestorm_owner_record(cls, record: dict):
         return cls(
+            id=owner_id(record),
             created_at=datetime.fromisoformat(record["created_at"]),
             is_verified=record["verified"],
             is_blue_verified=record["is_blue_verified"],
@@ -145,117 +170,409 @@ class Tweet(BaseModel):
         return self.author.is_spammer()
 
 
-def get_existing_tweet_ids(db: Session) -> Set[str]:
-    """Retrieves all existing Twitter IDs from the database."""
-    result = db.query(DBCoinTweetAnalysis.twitter_id).all()
-    return {str(row[0]) for row in result}
+async def fetch_new_entries(
+    client: ScrapeStormAPIClient, states: Dict[str, CollectionState], pages: Dict[str, int] | None = None
+) -> AsyncIterator[dict]:
+    """Streams raw tweets newer than each query's high-water mark, skipping ids already yielded this run.
+
+    With ``pages``, only the planned queries are polled, each for its planned
+    number of pages.
+    """
+    if pages is not None:
+        states = {query: states[query] for query in pages}
+    logging.info(f"Searching for keywords: {list(states)}")
+    yielded_ids = set()
+    max_pages = pages if pages is not None else settings.collection_max_pages
+    async for keyword, found in stream_new_tweets(client, states, max_pages):
+        if isinstance(found, Exception):
+            logging.error(f"Failed to fetch tweets for keyword '{keyword}': {found}")
+            continue
+        logging.info(f"Found {len(found)} tweets for keyword '{keyword}'.")
+        for entry in found:
+            if entry["id"] in yielded_ids:
+                continue
+            yielded_ids.add(entry["id"])
+            query_yields.add_source(entry["id"], keyword)
+            yield entry
 
 
-async def fetch_and_filter_tweets(client: ScrapeStormAPIClient) -> List[Tweet]:
-    """Fetches tweets from ScrapeStorm, converts them to Tweet models, and filters out spam and existing tweets."""
-    logging.info(f"Searching for keywords: {SEARCH_KEYWORDS}")
-    raw_results = []
-    for keyword in SEARCH_KEYWORDS:
-        try:
-            found = await client.search_tweets_async(keyword, num_pages=1)
-            raw_results.extend(found)
-            logging.info(f"Found {len(found)} tweets for keyword '{keyword}'.")
-        except Exception as e:
-            logging.error(f"Failed to fetch tweets for keyword '{keyword}': {e}")
+author_reputation = AuthorReputation(TwitterUser.calculate_account_score)
 
-    logging.info(f"Total raw results fetched: {len(raw_results)}")
 
-    unique_results = {res["id"]: res for res in raw_results}.values()
-    tweets = [Tweet.from_scrapestorm_tweet(res) for res in unique_results]
+parse_stats = ParseStats()
+query_yields = QueryYields()
+query_scheduler = QueryScheduler()
+trending = TrendingTracker()
+spike_detector = SpikeDetector()
 
-    non_spam_tweets = [tweet for tweet in tweets if not tweet.is_spam()]
-    logging.info(
-        f"Filtered out spam. Remaining tweets for analysis: {len(non_spam_tweets)}"
-    )
 
-    # Filter out tweets that already exist in the database
-    with get_session() as db:
-        existing_tweet_ids = get_existing_tweet_ids(db)
+def filter_spam(tweet: Tweet) -> Tweet | None:
+    """Drops tweets whose author looks like a spammer, using the cached author score."""
+    return None if author_reputation.is_spammer(tweet.author) else tweet
 
-    new_tweets = [
-        tweet for tweet in non_spam_tweets if str(tweet.id) not in existing_tweet_ids
-    ]
-    logging.info(
-        f"Filtered out {len(non_spam_tweets) - len(new_tweets)} existing tweets. New tweets for analysis: {len(new_tweets)}"
-    )
 
-    return new_tweets
+def parse_and_filter_spam(entries: List[dict]):
+    """Lean replacement for the parse and spam filter stages; see ``app.parsing``."""
+    return parse_entries(entries, author_reputation, parse_stats)
 
 
-def save_analyses_to_db(db: Session, analyses: List[dict]):
-    """Saves a list of tweet analyses to the database, ignoring duplicates."""
-    if not analyses:
-        logging.info("No new analyses to save.")
-        return
+@dataclass
+class DecisionMix:
+    """How the tweets of a run were decided."""
 
-    stmt = insert(DBCoinTweetAnalysis).values(analyses)
-    stmt = stmt.on_conflict_do_nothing(index_elements=["twitter_id"])
+    no_coin: int = 0
+    blue_chip: int = 0
+    near_duplicate: int = 0
+    sent_to_classifier: int = 0
 
-    try:
-        result = db.execute(stmt)
-        db.commit()
-        logging.info(
-            f"Successfully saved {result.rowcount} new tweet analyses to the database."
+    def __str__(self) -> str:
+        return (
+            f"{self.no_coin + self.blue_chip} dropped by rules "
+            f"(no coin: {self.no_coin}, blue chip only: {self.blue_chip}), "
+            f"{self.near_duplicate} labelled as near-duplicates, "
+            f"{self.sent_to_classifier} sent to the classifier"
         )
-    except Exception as e:
-        logging.error(f"Database error: {e}")
-        db.rollback()
 
 
-async def main():
-    """Main function to run the tweet analysis and save results."""
-    client = ScrapeStormAPIClient()
+pre_classifier = PreClassifier()
+decision_mix = DecisionMix()
 
-    tweets_to_analyze = await fetch_and_filter_tweets(client)
 
-    if not tweets_to_analyze:
-        logging.info("No tweets to analyze. Exiting.")
-        return
+def prefilter_tweet(tweet: Tweet) -> Tweet | None:
+    """Drops tweets that cannot mention a speculative coin."""
+    if not settings.prefilter_enabled:
+        return tweet
+    pre = pre_classifier.classify(tweet.text)
+    if pre.decision is Decision.no_coin:
+        decision_mix.no_coin += 1
+        return None
+    if pre.decision is Decision.blue_chip:
+        decision_mix.blue_chip += 1
+        return None
+    return tweet
 
-    results = []
-    batch_size = 10
-    for i in range(0, len(tweets_to_analyze), batch_size):
-        batch = tweets_to_analyze[i : i + batch_size]
-        tasks = [classify_tweet(tweet.text.replace("\n", " ")) for tweet in batch]
+
+def drop_existing_tweets(tweets: List[Tweet]) -> List[Tweet]:
+    """Drops tweets that were already stored or classified."""
+    with get_session() as db:
+        existing_tweet_ids = get_existing_tweet_ids(db, (tweet.id for tweet in tweets))
+    return [tweet for tweet in tweets if str(tweet.id) not in existing_tweet_ids]
+
+
+@dataclass
+class TweetCluster:
+    """Near-duplicate tweets that share one classification."""
+
+    tweets: List[Tweet]
+    fingerprint: int = 0
+    group: str = ""
+    analysis: CoinTweetAnalysis | None = None
+
+    @property
+    def representative(self) -> Tweet:
+        return self.tweets[0]
+
+
+# classified clusters of recent batches, so later copies reuse their label
+recent_clusters = NearDuplicateIndex()
+
+
+def collapse_near_duplicates(tweets: List[Tweet]) -> List[TweetCluster]:
+    """Groups near-duplicate tweets so each cluster is classified once.
+
+    Clusters close to a recently classified one take over its label directly.
+    """
+    if not settings.near_duplicate_enabled:
+        decision_mix.sent_to_classifier += len(tweets)
+        return [TweetCluster([tweet]) for tweet in tweets]
+
+    clusters = []
+    batch_index = NearDuplicateIndex(window=len(tweets))
+    for tweet in tweets:
+        fingerprint, group = simhash(tweet.text), cashtag_group(tweet.text)
+        cluster = batch_index.find(fingerprint, group)
+        if cluster is not None:
+            cluster.tweets.append(tweet)
+            continue
+        cluster = TweetCluster(
+            [tweet], fingerprint, group, analysis=recent_clusters.find(fingerprint, group)
+        )
+        batch_index.add(fingerprint, cluster, group)
+        clusters.append(cluster)
+
+    labelled = sum(1 for cluster in clusters if cluster.analysis is not None)
+    decision_mix.near_duplicate += len(tweets) - len(clusters) + sum(
+        len(cluster.tweets) for cluster in clusters if cluster.analysis is not None
+    )
+    decision_mix.sent_to_classifier += len(clusters) - labelled
+    if len(clusters) < len(tweets) or labelled:
         logging.info(
-            f"Analyzing batch {i//batch_size + 1}/{(len(tweets_to_analyze) + batch_size - 1)//batch_size} ({len(batch)} tweets)..."
+            f"Collapsed {len(tweets)} tweets into {len(clusters)} clusters, "
+            f"{labelled} labelled from recent clusters."
         )
+    return clusters
 
-        batch_results = await asyncio.gather(*tasks, return_exceptions=True)
-        results.extend(batch_results)
 
-    db_payload = []
-    for tweet, analysis_result in zip(tweets_to_analyze, results):
-        if isinstance(analysis_result, Exception):
-            logging.error(f"Analysis failed for tweet ID {tweet.id}: {analysis_result}")
+def _remember_cluster(cluster: TweetCluster):
+    if settings.near_duplicate_enabled:
+        recent_clusters.add(cluster.fingerprint, cluster.analysis, cluster.group)
+
+
+async def analyze_cluster(cluster: TweetCluster) -> TweetCluster:
+    """Classifies a cluster's representative tweet, unless it is already labelled."""
+    if cluster.analysis is None:
+        try:
+            cluster.analysis = await get_classifier().classify(cluster.representative.text.replace("\n", " "))
+        except Exception:
+            query_yields.fail(str(tweet.id) for tweet in cluster.tweets)
+            raise
+        _remember_cluster(cluster)
+    return cluster
+
+
+async def analyze_clusters(clusters: List[TweetCluster]) -> List[TweetCluster]:
+    """Classifies the representatives of a batch of clusters with one classifier call."""
+    pending = [cluster for cluster in clusters if cluster.analysis is None]
+    results = await get_classifier().classify_batch(
+        {str(c.representative.id): c.representative.text.replace("\n", " ") for c in pending}
+    )
+    analyzed = [cluster for cluster in clusters if cluster.analysis is not None]
+    for cluster in pending:
+        analysis_result = results[str(cluster.representative.id)]
+        if isinstance(analysis_result, BaseException):
+            logging.error(
+                f"Analysis failed for tweet ID {cluster.representative.id}: {analysis_result}"
+            )
+            query_yields.fail(str(tweet.id) for tweet in cluster.tweets)
             continue
+        cluster.analysis = analysis_result
+        _remember_cluster(cluster)
+        analyzed.append(cluster)
+    return analyzed
+
+
+analysis_writer = BulkWriter(DBCoinTweetAnalysis.__table__, conflict_columns=["twitter_id", "publish_date"])
+
+
+def save_analyses_to_db(db: Session, analyses: List[dict], overwrite: bool = False) -> List[dict]:
+    """Saves tweet analyses to the database, ignoring duplicates; returns the analyses that were not stored.
+
+    With ``overwrite``, analyses of tweets that are already stored are
+    replaced instead, e.g. when re-classifying archived tweets. Rows go
+    through ``analysis_writer``, so large payloads are COPYed and a bad row
+    only costs itself.
+    """
+    try:
+        stats = analysis_writer.write(db, analyses, overwrite=overwrite)
+    except Exception as e:
+        logging.error(f"Database error: {e}")
+        db.rollback()
+        return analyses
+    if not stats.rows:
+        logging.info("No new analyses to save.")
+    else:
+        logging.info(f"Successfully saved {stats.written} new tweet analyses to the database.")
+    return stats.rejected
+
+
+def persist_analyses(clusters: List[TweetCluster], overwrite: bool = False) -> List[dict]:
+    """Commits a micro-batch of classified clusters.
+
+    Every tweet of a speculative cluster is saved as its own analysis, so
+    mention counts are kept; tweets of other clusters are recorded as seen.
+    Raises if any analysis could not be stored, after marking its query as
+    failed, so the high-water mark does not move past it; the analyses that
+    were stored are still counted.
+    """
+    db_payload = []
+    # kept with their text, as negative examples for the local classifier
+    non_speculative = {}
+    for cluster in clusters:
+        analysis_result = cluster.analysis
         if (
             not analysis_result
             or not analysis_result.is_speculative_coin
             or not analysis_result.coin_name
         ):
+            non_speculative.update((str(tweet.id), tweet.text) for tweet in cluster.tweets)
             continue
 
-        db_item = {
-            "twitter_id": str(tweet.id),
-            "coin_name": analysis_result.coin_name,
-            "publish_date": tweet.created_at,
-            "sentiment": SentimentEnum[analysis_result.sentiment],
-            "keywords": analysis_result.keywords,
-            "text": tweet.text,
-            "author": tweet.author.name,
-        }
-        db_payload.append(db_item)
+        for tweet in cluster.tweets:
+            db_item = {
+                "twitter_id": str(tweet.id),
+                "coin_name": analysis_result.coin_name,
+                "publish_date": tweet.created_at,
+                "sentiment": SentimentEnum[analysis_result.sentiment],
+                "keywords": analysis_result.keywords,
+                "text": tweet.text,
+                "author": tweet.author.name,
+                "author_id": tweet.author.id,
+                "cluster_size": len(cluster.tweets),
+            }
+            db_payload.append(db_item)
+
+    with get_session() as db:
+        failed = save_analyses_to_db(db, db_payload, overwrite=overwrite)
+        query_yields.fail(item["twitter_id"] for item in failed)
+        if failed and len(failed) == len(db_payload):
+            raise RuntimeError(f"Failed to store {len(db_payload)} tweet analyses")
+        if failed:
+            rejected = {(item["twitter_id"], item["publish_date"]) for item in failed}
+            db_payload = [item for item in db_payload if (item["twitter_id"], item["publish_date"]) not in rejected]
+        record_seen_tweets(db, non_speculative, reason="non_speculative", texts=non_speculative)
+
+        spikes = []
+        if not overwrite:
+            # replays re-classify tweets that were already counted
+            latest = {}
+            for item in db_payload:
+                trending.observe(item["coin_name"], item["keywords"], item["publish_date"])
+                latest[item["coin_name"]] = max(latest.get(item["coin_name"], item["publish_date"]), item["publish_date"])
+            spikes = spike_detector.refresh(db, latest)
+        try:
+            publish_spikes(db, spikes)
+            db.commit()
+        except Exception as e:
+            logging.error(f"Failed to publish {len(spikes)} spikes: {e}")
+            db.rollback()
+    query_yields.count_useful(item["twitter_id"] for item in db_payload)
+    if failed:
+        raise RuntimeError(f"Failed to store {len(failed)} of {len(failed) + len(db_payload)} tweet analyses")
+    return db_payload
+
+
+async def persist_analyses_async(clusters: List[TweetCluster], overwrite: bool = False) -> List[dict]:
+    """Runs ``persist_analyses`` off the event loop."""
+    return await asyncio.to_thread(persist_analyses, clusters, overwrite)
+
+
+def build_pipeline(
+    skip_existing: bool = True,
+    persist: bool = True,
+    overwrite: bool = False,
+    persist_batch_size: int = settings.pipeline_persist_batch_size,
+) -> Pipeline:
+    """Builds the parse → spam filter → prefilter → dedup → near-dedup → classify → persist pipeline.
+
+    By default raw entries are parsed in batches by the lean parser, which
+    also drops spam; ``settings.parse_strict`` validates every entry with the
+    pydantic models instead.
+
+    Replays turn off ``skip_existing`` to re-classify stored tweets, with
+    ``overwrite`` to replace their analyses, or ``persist`` to measure
+    throughput without writing anything. They also persist in large batches,
+    which ``save_analyses_to_db`` writes with COPY.
+    """
+    classifier = get_classifier()
+    pipeline = Pipeline(queue_size=settings.pipeline_queue_size)
+    if settings.parse_strict:
+        pipeline.add_stage("parse", Tweet.from_scrapestorm_tweet, workers=settings.pipeline_parse_workers)
+        pipeline.add_stage("spam_filter", filter_spam, workers=settings.pipeline_filter_workers)
+    else:
+        pipeline.add_batch_stage(
+            "parse",
+            parse_and_filter_spam,
+            batch_size=settings.pipeline_parse_batch_size,
+            flush_interval=settings.pipeline_flush_interval,
+            workers=settings.pipeline_parse_workers,
+        )
+    pipeline.add_stage("prefilter", prefilter_tweet, workers=settings.pipeline_filter_workers)
+    if skip_existing:
+        pipeline.add_batch_stage(
+            "dedup",
+            lambda tweets: asyncio.to_thread(drop_existing_tweets, tweets),
+            batch_size=settings.pipeline_dedup_batch_size,
+            flush_interval=settings.pipeline_flush_interval,
+        )
+    pipeline.add_batch_stage(
+        "near_dedup",
+        collapse_near_duplicates,
+        batch_size=settings.pipeline_dedup_batch_size,
+        flush_interval=settings.pipeline_flush_interval,
+    )
+    if classifier.batch_size > 1:
+        pipeline.add_batch_stage(
+            "classify",
+            analyze_clusters,
+            batch_size=lambda: classifier.batch_size,
+            flush_interval=settings.pipeline_flush_interval,
+            workers=settings.pipeline_classify_workers,
+        )
+    else:
+        pipeline.add_stage("classify", analyze_cluster, workers=settings.pipeline_classify_workers)
+    if persist:
+        pipeline.add_batch_stage(
+            "persist",
+            lambda clusters: persist_analyses_async(clusters, overwrite),
+            batch_size=persist_batch_size,
+            flush_interval=settings.pipeline_flush_interval,
+        )
+    return pipeline
+
+
+def reset_run_stats():
+    """Starts fresh decision, parse, query yield and classification counters."""
+    global decision_mix, parse_stats, query_yields
+    decision_mix = DecisionMix()
+    parse_stats = ParseStats()
+    query_yields = QueryYields()
+    get_engine().reset_stats()
 
-    logging.info(f"Prepared {len(db_payload)} analyses for database insertion.")
 
+def log_run_summary():
+    engine = get_engine()
+    cached = engine.cache.stats.llm_calls_saved if engine.cache is not None else 0
+    logging.info(
+        f"Decisions: {decision_mix}; of those, {cached} answered from the cache "
+        f"and {engine.stats.completed + engine.stats.failed} by the LLM."
+    )
+    logging.info(f"Classification: {get_classifier().describe()}")
+    if engine.batch_size > 1:
+        logging.info(f"Batch classification: {engine.tuner}")
+    if engine.cache is not None:
+        logging.info(f"Classification cache: {engine.cache.stats}")
+    if not settings.parse_strict:
+        logging.info(f"Parsing: {parse_stats}")
+    logging.info(f"Author scores: {author_reputation}")
+
+
+async def main() -> List[StageStats]:
+    """Main function to run the tweet analysis and save results; returns the pipeline stage stats."""
+    with get_session() as db:
+        states = load_enabled_collection_states(db, SEARCH_KEYWORDS)
+        author_reputation.warm(db)
+        spike_detector.warm(db)
+
+    reset_run_stats()
+    progress = {query: collection_progress(state) for query, state in states.items()}
+    pages = query_scheduler.plan(states)
+    archive = PayloadArchive() if settings.archive_enabled else None
+    try:
+        async with ScrapeStormAPIClient(archive=archive) as client:
+            stats = await build_pipeline().run(fetch_new_entries(client, states, pages))
+    finally:
+        if archive is not None:
+            archive.close()
+    failed = set(query_yields.failed)
+    if sum(stage.errors for stage in stats):
+        # a stage that raised dropped its items without saying which query they came from
+        failed = set(states)
+    for query in failed:
+        # tweets that were not stored are behind the new mark, so the query is fetched again from the old one
+        logging.warning(f"Tweets of '{query}' were not stored, keeping its previous high-water mark.")
+        rewind_collection_state(states[query], progress[query])
+    query_scheduler.record(states, query_yields)
+    log_run_summary()
+
+    engine = get_engine()
     with get_session() as db:
-        save_analyses_to_db(db, db_payload)
+        author_reputation.flush(db)
+        trending.checkpoint(db)
+        prune_seen_tweets(db)
+        if engine.cache is not None:
+            engine.cache.evict_expired(db)
+        save_collection_states(db, states.values())
+    return stats
 
 
 if __name__ == "__main__":
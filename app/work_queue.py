@@ -0,0 +1,220 @@
+"""Postgres-backed work queue and cross-process locks.
+
+Work items are claimed with ``FOR UPDATE SKIP LOCKED``, so any number of
+workers can poll the same table without handing one item to two of them. A
+claimed item is leased: if its worker dies, the item becomes claimable
+again once ``locked_until`` passes. Advisory locks serialize work that must
+not run twice at once, such as paging through one query, and
+``claim_tick`` lets exactly one replica run a singleton job per tick.
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List
+
+from sqlalchemy import delete, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.database import engine
+from app.models import ScheduledJob, WorkItem
+from app.settings import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ClaimedItem:
+    id: int
+    kind: str
+    payload: Dict[str, Any]
+    attempts: int
+
+
+class RetryLater(Exception):
+    """Raised by a handler to put its item back without counting the attempt, e.g. when a lock is busy."""
+
+    def __init__(self, message: str, delay: float = 5.0):
+        super().__init__(message)
+        self.delay = delay
+
+
+def enqueue(
+    db: Session,
+    kind: str,
+    payloads: Iterable[Dict[str, Any]],
+    priority: int = 0,
+    dedup_key: str | None = None,
+) -> int:
+    """Adds work items without committing; with ``dedup_key``, only if no item with that key is still open.
+
+    Returns:
+        Number of items added
+    """
+    rows = [{"kind": kind, "payload": payload, "priority": priority, "dedup_key": dedup_key} for payload in payloads]
+    if not rows:
+        return 0
+    stmt = insert(WorkItem).values(rows)
+    if dedup_key is not None:
+        stmt = stmt.on_conflict_do_nothing(
+            index_elements=["dedup_key"], index_where=text("status IN ('pending', 'running')")
+        )
+    return db.execute(stmt).rowcount
+
+
+def claim(
+    db: Session,
+    kinds: Iterable[str],
+    worker_id: str,
+    limit: int = 1,
+    lease: float = settings.work_lease_seconds,
+) -> List[ClaimedItem]:
+    """Claims up to ``limit`` due items, including ones whose lease ran out, and commits the claim."""
+    now = datetime.now(timezone.utc)
+    due = (
+        select(WorkItem.id)
+        .where(
+            WorkItem.kind.in_(list(kinds)),
+            ((WorkItem.status == "pending") & (WorkItem.available_at <= now))
+            | ((WorkItem.status == "running") & (WorkItem.locked_until < now)),
+        )
+        .order_by(WorkItem.priority, WorkItem.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    stmt = (
+        update(WorkItem)
+        .where(WorkItem.id.in_(due.scalar_subquery()))
+        .values(
+            status="running",
+            attempts=WorkItem.attempts + 1,
+            locked_by=worker_id,
+            locked_until=now + timedelta(seconds=lease),
+        )
+        .returning(WorkItem.id, WorkItem.kind, WorkItem.payload, WorkItem.attempts)
+    )
+    items = [ClaimedItem(*row) for row in db.execute(stmt)]
+    db.commit()
+    return items
+
+
+def complete(db: Session, item_id: int):
+    db.execute(
+        update(WorkItem)
+        .where(WorkItem.id == item_id)
+        .values(status="done", locked_by=None, locked_until=None, finished_at=datetime.now(timezone.utc))
+    )
+    db.commit()
+
+
+def release(db: Session, item_id: int, delay: float):
+    """Puts a claimed item back for later, refunding its attempt."""
+    db.execute(
+        update(WorkItem)
+        .where(WorkItem.id == item_id)
+        .values(
+            status="pending",
+            attempts=WorkItem.attempts - 1,
+            locked_by=None,
+            locked_until=None,
+            available_at=datetime.now(timezone.utc) + timedelta(seconds=delay),
+        )
+    )
+    db.commit()
+
+
+def fail(db: Session, item: ClaimedItem, error: str, max_attempts: int = settings.work_max_attempts):
+    """Retries a failed item with exponential backoff, or gives up on it after ``max_attempts``."""
+    now = datetime.now(timezone.utc)
+    if item.attempts >= max_attempts:
+        values = {"status": "failed", "finished_at": now}
+        logger.error(f"Giving up on {item.kind} item {item.id} after {item.attempts} attempts: {error}")
+    else:
+        values = {"status": "pending", "available_at": now + timedelta(seconds=min(600, 5 * 2**item.attempts))}
+        logger.warning(f"{item.kind} item {item.id} failed (attempt {item.attempts}), retrying: {error}")
+    db.execute(
+        update(WorkItem)
+        .where(WorkItem.id == item.id)
+        .values(locked_by=None, locked_until=None, error=error, **values)
+    )
+    db.commit()
+
+
+def prune(db: Session, retention_hours: int = settings.work_retention_hours):
+    """Deletes finished items older than the retention window; failed ones are kept for inspection."""
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=retention_hours)
+    result = db.execute(delete(WorkItem).where(WorkItem.status == "done", WorkItem.finished_at < cutoff))
+    db.commit()
+    if result.rowcount:
+        logger.info(f"Pruned {result.rowcount} finished work items.")
+
+
+def queue_depth(db: Session) -> Dict[str, int]:
+    """Returns the number of open items per kind and status, e.g. ``{"classify pending": 12}``."""
+    rows = db.execute(
+        select(WorkItem.kind, WorkItem.status, text("count(*)"))
+        .where(WorkItem.status.in_(["pending", "running"]))
+        .group_by(WorkItem.kind, WorkItem.status)
+    )
+    return {f"{kind} {status}": count for kind, status, count in rows}
+
+
+def claim_tick(db: Session, job: str, tick_at: datetime, worker_id: str) -> bool:
+    """Claims ``tick_at`` of a singleton job; only the first replica to ask gets True."""
+    stmt = insert(ScheduledJob).values(job=job, last_tick_at=tick_at, claimed_by=worker_id)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["job"],
+        set_={"last_tick_at": stmt.excluded.last_tick_at, "claimed_by": stmt.excluded.claimed_by},
+        where=ScheduledJob.last_tick_at < stmt.excluded.last_tick_at,
+    ).returning(ScheduledJob.job)
+    claimed = db.execute(stmt).first() is not None
+    db.commit()
+    return claimed
+
+
+class AdvisoryLock:
+    """Session-level Postgres advisory lock, held on its own connection until released."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._connection = None
+
+    def acquire(self) -> bool:
+        """Tries to take the lock without waiting."""
+        connection = engine.connect()
+        try:
+            acquired = connection.execute(
+                text("SELECT pg_try_advisory_lock(hashtext(:name))"), {"name": self.name}
+            ).scalar()
+            # the lock belongs to the session, not to this transaction
+            connection.commit()
+        except Exception:
+            connection.close()
+            raise
+        if not acquired:
+            connection.close()
+            return False
+        self._connection = connection
+        return True
+
+    def release(self):
+        if self._connection is None:
+            return
+        try:
+            self._connection.execute(text("SELECT pg_advisory_unlock(hashtext(:name))"), {"name": self.name})
+            self._connection.commit()
+        except Exception as e:
+            # a pooled connection must never keep the lock
+            logger.error(f"Could not release advisory lock '{self.name}': {e}")
+            self._connection.invalidate()
+        finally:
+            self._connection.close()
+            self._connection = None
+
+    def __enter__(self) -> bool:
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
@@ -0,0 +1,289 @@
+"""Ingestion worker that shares work with its replicas through Postgres.
+
+Every replica runs the same process: worker loops that claim items from
+``work_items``, plus the scheduler with the singleton jobs, which run on
+one replica per tick. Each tick ``plan_ingest`` enqueues one fetch item per
+due query; a fetch pages through its query under an advisory lock and
+enqueues the new tweets as classification chunks, in the same transaction
+that advances the query's high-water mark. Throughput scales by adding
+replicas::
+
+    docker compose up --scale scheduler=3
+    python -m app.worker --concurrency 8
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import socket
+from typing import Any, AsyncIterator, Dict, List
+
+from sqlalchemy import update
+
+from app import tweet_analysis, work_queue
+from app.archive import PayloadArchive
+from app.collection import collect_query, load_enabled_collection_states
+from app.collectors.scrapestorm.api_client import ScrapeStormAPIClient
+from app.database import get_db
+from app.dedup import prune_seen_tweets
+from app.llm.classification import get_engine
+from app.models import CollectionState
+from app.partitions import maintain_partitions
+from app.scheduler import Scheduler
+from app.settings import get_settings
+from app.spikes import prune_spike_events
+from app.trading_simulation import follow_spikes, main as run_trading_simulation
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+FETCH_QUERY = "fetch_query"
+CLASSIFY = "classify"
+# classification drains before more fetching piles up
+PRIORITIES = {CLASSIFY: 0, FETCH_QUERY: 1}
+
+
+def plan_ingest_tick() -> Dict[str, int]:
+    """Folds in the queries' yields, plans this tick's pages and enqueues the fetches."""
+    with get_db() as db:
+        states = load_enabled_collection_states(db, tweet_analysis.SEARCH_KEYWORDS)
+        # only the planning columns change here, so concurrent fetches keep their updates
+        db.add_all(states.values())
+        tweet_analysis.query_scheduler.update_yields(states)
+        pages = tweet_analysis.query_scheduler.plan(states)
+        for query, count in pages.items():
+            # a query whose previous fetch is still open is not queued twice
+            work_queue.enqueue(
+                db, FETCH_QUERY, [{"query": query, "pages": count}], PRIORITIES[FETCH_QUERY], f"fetch:{query}"
+            )
+        db.commit()
+    return pages
+
+
+async def plan_ingest():
+    await asyncio.to_thread(plan_ingest_tick)
+
+
+def run_maintenance():
+    engine = get_engine()
+    with get_db() as db:
+        prune_seen_tweets(db)
+        if engine.cache is not None:
+            engine.cache.evict_expired(db)
+        work_queue.prune(db)
+        prune_spike_events(db)
+        maintain_partitions(db)
+        logger.info(f"Work queue: {work_queue.queue_depth(db) or 'empty'}")
+
+
+async def maintenance():
+    await asyncio.to_thread(run_maintenance)
+
+
+async def _iterate(entries: List[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+    for entry in entries:
+        yield entry
+
+
+class IngestWorker:
+    """Claims fetch and classification items and runs them, ``concurrency`` at a time."""
+
+    def __init__(
+        self,
+        concurrency: int = settings.worker_concurrency,
+        poll_interval: float = settings.worker_poll_interval,
+        worker_id: str | None = None,
+    ):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.handlers = {FETCH_QUERY: self.fetch_query, CLASSIFY: self.classify}
+        self.archive = PayloadArchive(writer=self.worker_id) if settings.archive_enabled else None
+        self.client = ScrapeStormAPIClient(archive=self.archive)
+
+    async def __aenter__(self) -> "IngestWorker":
+        await self.client.__aenter__()
+        with get_db() as db:
+            tweet_analysis.author_reputation.warm(db)
+            tweet_analysis.spike_detector.warm(db)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.client.__aexit__(exc_type, exc, tb)
+        await asyncio.to_thread(self._checkpoint_trending)
+        if self.archive is not None:
+            self.archive.close()
+
+    async def fetch_query(self, payload: Dict[str, Any]):
+        """Pages through one query and enqueues its new tweets in classification chunks."""
+        query = payload["query"]
+        lock = work_queue.AdvisoryLock(f"fetch:{query}")
+        if not await asyncio.to_thread(lock.acquire):
+            raise work_queue.RetryLater(f"Query '{query}' is being fetched by another worker")
+        try:
+            with get_db() as db:
+                state = db.get(CollectionState, query)
+            if state is None or not state.enabled:
+                return
+            requests_before = state.requests_total or 0
+            try:
+                entries = await collect_query(self.client, state, payload["pages"])
+            except Exception:
+                # the pages fetched before the failing one are charged all the same
+                with get_db() as db:
+                    db.execute(
+                        update(CollectionState)
+                        .where(CollectionState.query == query)
+                        .values(requests_total=CollectionState.requests_total + (state.requests_total - requests_before))
+                    )
+                    db.commit()
+                raise
+            logger.info(f"Found {len(entries)} tweets for keyword '{query}'.")
+
+            chunk_size = settings.work_classify_chunk_size
+            chunks = [{"query": query, "entries": entries[i : i + chunk_size]} for i in range(0, len(entries), chunk_size)]
+            with get_db() as db:
+                # the high-water mark only moves together with the enqueued tweets
+                db.execute(
+                    update(CollectionState)
+                    .where(CollectionState.query == query)
+                    .values(
+                        newest_tweet_id=state.newest_tweet_id,
+                        newest_tweet_at=state.newest_tweet_at,
+                        last_cursor=state.last_cursor,
+                        backfill_until_id=state.backfill_until_id,
+                        last_polled_at=state.last_polled_at,
+                        requests_total=CollectionState.requests_total + (state.requests_total - requests_before),
+                    )
+                )
+                work_queue.enqueue(db, CLASSIFY, chunks, PRIORITIES[CLASSIFY])
+                db.commit()
+        finally:
+            await asyncio.to_thread(lock.release)
+
+    async def classify(self, payload: Dict[str, Any]):
+        """Runs one chunk of raw tweets through the pipeline and credits the useful ones to its query."""
+        query, entries = payload["query"], payload["entries"]
+        yields = tweet_analysis.query_yields
+        for entry in entries:
+            yields.add_source(entry["id"], query)
+        try:
+            stats = await tweet_analysis.build_pipeline().run(_iterate(entries))
+        finally:
+            yields.forget(entry["id"] for entry in entries)
+
+        with get_db() as db:
+            tweet_analysis.author_reputation.flush(db)
+            for source, useful in yields.drain().items():
+                db.execute(
+                    update(CollectionState)
+                    .where(CollectionState.query == source)
+                    .values(useful_total=CollectionState.useful_total + useful)
+                )
+            db.commit()
+        errors = sum(stage.errors for stage in stats)
+        if errors:
+            # stored tweets are skipped on the retry, so only the failed ones are classified again
+            raise RuntimeError(f"{errors} tweets of the chunk failed")
+        logger.info(f"Classified {len(entries)} tweets from '{query}'.")
+
+    def _checkpoint_trending(self):
+        try:
+            with get_db() as db:
+                tweet_analysis.trending.checkpoint(db)
+        except Exception as e:
+            logger.error(f"Worker {self.worker_id} could not checkpoint trending sketches: {e}")
+
+    async def _checkpoint_forever(self):
+        while True:
+            await asyncio.sleep(settings.trending_checkpoint_interval)
+            await asyncio.to_thread(self._checkpoint_trending)
+
+    def _claim(self) -> List[work_queue.ClaimedItem]:
+        with get_db() as db:
+            return work_queue.claim(db, self.handlers, self.worker_id)
+
+    def _finish(self, item: work_queue.ClaimedItem, error: Exception | None):
+        with get_db() as db:
+            if error is None:
+                work_queue.complete(db, item.id)
+            elif isinstance(error, work_queue.RetryLater):
+                work_queue.release(db, item.id, error.delay)
+            else:
+                work_queue.fail(db, item, f"{type(error).__name__}: {error}")
+
+    async def _run_item(self, item: work_queue.ClaimedItem):
+        error = None
+        try:
+            # cancelled before the lease runs out, so no other worker picks the item up meanwhile
+            await asyncio.wait_for(self.handlers[item.kind](item.payload), timeout=settings.work_lease_seconds * 0.9)
+        except Exception as e:
+            error = e
+        await asyncio.to_thread(self._finish, item, error)
+
+    async def _loop(self):
+        while True:
+            try:
+                items = await asyncio.to_thread(self._claim)
+            except Exception as e:
+                logger.error(f"Worker {self.worker_id} could not claim work: {e}")
+                items = []
+            if not items:
+                await asyncio.sleep(self.poll_interval)
+                continue
+            for item in items:
+                await self._run_item(item)
+
+    async def run_forever(self):
+        logger.info(f"Worker {self.worker_id} started with {self.concurrency} loops.")
+        await asyncio.gather(*(self._loop() for _ in range(self.concurrency)), self._checkpoint_forever())
+
+
+def build_singleton_scheduler(replica_id: str) -> Scheduler:
+    scheduler = Scheduler(replica_id=replica_id)
+    scheduler.add_job(
+        "plan_ingest",
+        plan_ingest,
+        settings.scheduler_ingest_interval,
+        settings.scheduler_plan_ingest_deadline,
+        singleton=True,
+    )
+    scheduler.add_job(
+        "trading",
+        run_trading_simulation,
+        settings.scheduler_trading_interval,
+        settings.scheduler_trading_deadline,
+        singleton=True,
+    )
+    scheduler.add_job(
+        "maintenance",
+        maintenance,
+        settings.scheduler_maintenance_interval,
+        settings.scheduler_maintenance_deadline,
+        singleton=True,
+    )
+    return scheduler
+
+
+async def run(concurrency: int, schedule: bool):
+    async with IngestWorker(concurrency) as worker:
+        tasks = [worker.run_forever()]
+        if schedule:
+            tasks.append(build_singleton_scheduler(worker.worker_id).run_forever())
+            tasks.append(follow_spikes())
+        await asyncio.gather(*tasks)
+
+
+def main():
+    """Runs an ingestion worker, together with the singleton jobs unless told otherwise."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--concurrency", type=int, default=settings.worker_concurrency)
+    parser.add_argument("--no-schedule", action="store_true", help="only work the queue, never run singleton jobs")
+    args = parser.parse_args()
+    asyncio.run(run(args.concurrency, not args.no_schedule))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    main()